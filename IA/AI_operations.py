@@ -1,70 +1,153 @@
+import asyncio
 import time
 import collections
 import logging
+import threading
 
 # Configuração do logging para o RateLimiter
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def usage_tokens(response) -> int | None:
+    """Extrai o total de tokens (entrada + saída) do `usage_metadata` da resposta, se houver."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return None
+    total = getattr(usage, 'total_token_count', None)
+    if total:
+        return int(total)
+    prompt = getattr(usage, 'prompt_token_count', None) or 0
+    output = getattr(usage, 'candidates_token_count', None) or 0
+    return int(prompt + output) if (prompt or output) else None
+
+class Reserva:
+    """Tokens reservados no limitador para uma chamada, ajustáveis após a resposta."""
+    __slots__ = ('timestamp', 'tokens')
+
+    def __init__(self, timestamp: float, tokens: int):
+        self.timestamp = timestamp
+        self.tokens = tokens
+
 class RateLimiter:
     """
     Gerencia e impõe limites de taxa para chamadas de API de IA (RPM e TPM).
+
+    Usa janelas deslizantes de 60s com total de tokens mantido incrementalmente,
+    é seguro entre threads e oferece aquisição bloqueante (`acquire`) e
+    assíncrona (`acquire_async`). A estimativa reservada pode ser corrigida
+    depois da chamada com `reconcile`.
     """
     def __init__(self, rpm_limit: int, tpm_limit: int):
         self.rpm_limit = rpm_limit
         self.tpm_limit = tpm_limit
         self.request_timestamps = collections.deque()
         self.token_usage = collections.deque()
+        self.tokens_in_window = 0
+        self._lock = threading.Lock()
 
-    def _cleanup_old_requests(self):
-        current_time = time.time()
-        while self.request_timestamps and self.request_timestamps[0] <= current_time - 60:
+    def _cleanup(self, current_time: float):
+        limite = current_time - 60
+        while self.request_timestamps and self.request_timestamps[0] <= limite:
             self.request_timestamps.popleft()
+        while self.token_usage and self.token_usage[0].timestamp <= limite:
+            self.tokens_in_window -= self.token_usage.popleft().tokens
 
-    def _cleanup_old_tokens(self):
-        current_time = time.time()
-        while self.token_usage and self.token_usage[0][0] <= current_time - 60:
-            self.token_usage.popleft()
+    def _try_acquire(self, tokens_to_send: int) -> tuple[Reserva | None, float]:
+        """Reserva um slot se houver capacidade; senão, retorna o tempo de espera estimado."""
+        if tokens_to_send > self.tpm_limit:
+            error_msg = f"[RateLimiter] A requisição única ({tokens_to_send} tokens) excede o limite total de TPM ({self.tpm_limit}). Não é possível prosseguir."
+            logging.error(error_msg)
+            raise ValueError(error_msg)
+
+        with self._lock:
+            current_time = time.time()
+            self._cleanup(current_time)
+
+            time_to_wait = 0.0
+            if len(self.request_timestamps) >= self.rpm_limit:
+                time_to_wait = self.request_timestamps[0] - (current_time - 60) + 0.1 # Adiciona margem
+
+            excedente = self.tokens_in_window + tokens_to_send - self.tpm_limit
+            if excedente > 0:
+                # Espera até que as reservas mais antigas liberem tokens suficientes
+                liberados = 0
+                for reserva in self.token_usage:
+                    liberados += reserva.tokens
+                    if liberados >= excedente:
+                        time_to_wait = max(time_to_wait, reserva.timestamp - (current_time - 60) + 0.1)
+                        break
 
-    def wait_for_rpm_slot(self):
-        self._cleanup_old_requests()
-        if len(self.request_timestamps) >= self.rpm_limit:
-            time_to_wait = self.request_timestamps[0] - (time.time() - 60) + 0.1 # Adiciona margem
-            if time_to_wait > 0:
-                logging.warning(f"[RateLimiter] Limite de RPM ({self.rpm_limit}) atingido. Aguardando {time_to_wait:.2f} segundos.")
-                time.sleep(time_to_wait)
-        self.request_timestamps.append(time.time())
-
-    def wait_for_tpm_slot(self, tokens_to_send: int):
-        # MELHORIA: Lógica de espera do TPM mais inteligente.
-        self._cleanup_old_tokens()
-        current_tokens = sum(count for _, count in self.token_usage)
-
-        while current_tokens + tokens_to_send > self.tpm_limit:
-            if not self.token_usage:
-                error_msg = f"[RateLimiter] A requisição única ({tokens_to_send} tokens) excede o limite total de TPM ({self.tpm_limit}). Não é possível prosseguir."
-                logging.error(error_msg)
-                raise ValueError(error_msg)
-
-            time_to_wait = self.token_usage[0][0] - (time.time() - 60) + 0.1 # Adiciona margem
             if time_to_wait > 0:
-                logging.warning(f"[RateLimiter] Limite de TPM seria excedido. Aguardando {time_to_wait:.2f}s para liberar tokens.")
-                time.sleep(time_to_wait)
-            
-            self._cleanup_old_tokens()
-            current_tokens = sum(count for _, count in self.token_usage)
-        
-        self.token_usage.append((time.time(), tokens_to_send))
+                return None, time_to_wait
+
+            reserva = Reserva(current_time, tokens_to_send)
+            self.request_timestamps.append(current_time)
+            self.token_usage.append(reserva)
+            self.tokens_in_window += tokens_to_send
+            return reserva, 0.0
+
+    def acquire(self, tokens_to_send: int) -> Reserva:
+        """Bloqueia até haver slot de RPM e TPM disponível e reserva os tokens."""
+        while True:
+            reserva, time_to_wait = self._try_acquire(tokens_to_send)
+            if reserva is not None:
+                return reserva
+            logging.warning(f"[RateLimiter] Limite de RPM/TPM atingido. Aguardando {time_to_wait:.2f} segundos.")
+            time.sleep(time_to_wait)
+
+    async def acquire_async(self, tokens_to_send: int) -> Reserva:
+        """Versão assíncrona de `acquire`, que cede o event loop durante a espera."""
+        while True:
+            reserva, time_to_wait = self._try_acquire(tokens_to_send)
+            if reserva is not None:
+                return reserva
+            logging.warning(f"[RateLimiter] Limite de RPM/TPM atingido. Aguardando {time_to_wait:.2f} segundos.")
+            await asyncio.sleep(time_to_wait)
+
+    def reconcile(self, reserva: Reserva, actual_tokens: int):
+        """Substitui a estimativa reservada pelo consumo real informado pela API."""
+        with self._lock:
+            # Um único instante para a limpeza e para a verificação da janela
+            agora = time.time()
+            self._cleanup(agora)
+            # Reservas que já saíram da janela não afetam mais o total
+            if reserva.timestamp > agora - 60:
+                self.tokens_in_window += actual_tokens - reserva.tokens
+            reserva.tokens = actual_tokens
 
     def call_api(self, api_function, *args, **kwargs):
         # O número de tokens deve ser passado como um argumento nomeado para esta função.
         prompt_tokens = kwargs.pop('prompt_tokens', 1000) # Remove 'prompt_tokens' de kwargs
 
         # Espera por um slot de RPM e TPM
-        self.wait_for_rpm_slot()
-        self.wait_for_tpm_slot(prompt_tokens)
+        reserva = self.acquire(prompt_tokens)
 
         logging.info(f"[RateLimiter] Realizando chamada para a API com {prompt_tokens} tokens.")
-        return api_function(*args, **kwargs)
+        response = api_function(*args, **kwargs)
+        self._reconcile_with_usage(reserva, response)
+        return response
+
+    def _reconcile_with_usage(self, reserva: Reserva, response):
+        """Corrige a reserva com o consumo real (entrada + saída) informado em `usage_metadata`."""
+        actual_tokens = usage_tokens(response)
+        if actual_tokens is None:
+            return
+        if abs(actual_tokens - reserva.tokens) > reserva.tokens * 0.5:
+            logging.info(f"[RateLimiter] Estimativa de {reserva.tokens} tokens corrigida para o consumo real de {actual_tokens}.")
+        self.reconcile(reserva, actual_tokens)
+
+    async def call_api_async(self, api_function, *args, **kwargs):
+        """Versão assíncrona de `call_api`; funções síncronas são executadas em uma thread."""
+        prompt_tokens = kwargs.pop('prompt_tokens', 1000)
+
+        reserva = await self.acquire_async(prompt_tokens)
+
+        logging.info(f"[RateLimiter] Realizando chamada assíncrona para a API com {prompt_tokens} tokens.")
+        if asyncio.iscoroutinefunction(api_function):
+            response = await api_function(*args, **kwargs)
+        else:
+            response = await asyncio.to_thread(api_function, *args, **kwargs)
+        self._reconcile_with_usage(reserva, response)
+        return response
 
 if __name__ == '__main__':
     gemini_limiter = RateLimiter(rpm_limit=100, tpm_limit=5250000)
@@ -1,12 +1,39 @@
 import os
+import threading
+import httpx
 from google import genai
+from google.genai import types
 import streamlit as st
 import logging
+from .AI_operations import RateLimiter
+from .backends import GeminiBackend, RecordingBackend, local_backend_from_env
+from .uploads import UploadRegistry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Cota da chave de API, compartilhada por todas as sessões do processo
+RPM_LIMIT = int(os.getenv('GEMINI_RPM_LIMIT', '15'))
+TPM_LIMIT = int(os.getenv('GEMINI_TPM_LIMIT', '1000000'))
+
+# Pool de conexões HTTP reaproveitadas (keep-alive) entre as chamadas à API
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120)
+
+_lock = threading.Lock()
+_client = None
+_backend = None
+_rate_limiter = None
+_upload_registry = None
+# Falha ao criar o cliente, memorizada para não repetir a tentativa (e o log) a cada chamada
+_api_error = None
+
 def load_api():
+    """
+    Cria o cliente Gemini com a chave dos secrets ou do ambiente.
+
+    Pode rodar nas threads da fila de jobs, onde não há contexto do Streamlit:
+    por isso não usa `st.*` e levanta ValueError em vez de exibir o erro.
+    """
     try:
         # Tentar carregar a chave API de múltiplas fontes
         api_key = None
@@ -15,7 +42,7 @@ def load_api():
         try:
             api_key = st.secrets["general"]["GOOGLE_API_KEY"]
             logging.info("API key loaded from Streamlit secrets.")
-        except (KeyError, TypeError, AttributeError):
+        except (KeyError, TypeError, AttributeError, FileNotFoundError):
             logging.info("API key not found in Streamlit secrets, trying environment variables.")
         
         # 2. Se não encontrou nos secrets, tentar carregar do arquivo .env
@@ -26,18 +53,101 @@ def load_api():
 
         # 3. Verificar se uma chave foi encontrada
         if not api_key:
-            error_msg = "Google API key not found. Please set the GOOGLE_API_KEY environment variable or in Streamlit secrets."
-            logging.error(error_msg)
-            st.error(error_msg)
-            return None
+            raise ValueError("Google API key not found. Please set the GOOGLE_API_KEY environment variable or in Streamlit secrets.")
 
-        # Instanciar o Cliente da nova SDK
-        client = genai.Client(api_key=api_key)
+        # Instanciar o Cliente da nova SDK, com conexões persistentes
+        client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(client_args={'limits': HTTP_LIMITS})
+        )
         logging.info("API Client loaded successfully.")
         return client
 
+    except ValueError:
+        raise
     except Exception as e:
-        error_msg = f"Error loading API: {str(e)}"
-        logging.exception(error_msg)
-        st.error(error_msg)
+        raise ValueError(f"Error loading API: {str(e)}") from e
+
+def get_backend_name() -> str:
+    """Retorna o backend de modelo configurado ('gemini' por padrão ou 'local')."""
+    try:
+        name = st.secrets["general"]["LLM_BACKEND"]
+    except (KeyError, TypeError, AttributeError, FileNotFoundError):
+        name = os.getenv('LLM_BACKEND', 'gemini')
+    return str(name).strip().lower()
+
+def load_backend():
+    """
+    Cria o backend de modelo conforme a configuração LLM_BACKEND.
+
+    'local' usa o substituto determinístico (sem chave de API), útil para testes
+    de carga e benchmarks offline; com LLM_RECORD_FIXTURES definido, as respostas
+    do Gemini são gravadas como fixtures para esse substituto.
+    """
+    name = get_backend_name()
+    if name == 'local':
+        logging.info("Using local LLM backend (fixtures).")
+        return local_backend_from_env()
+
+    client = get_client()
+    if client is None:
         return None
+    backend = GeminiBackend(client)
+
+    record_dir = os.getenv('LLM_RECORD_FIXTURES')
+    if record_dir:
+        logging.info(f"Recording Gemini responses as fixtures in {record_dir}.")
+        backend = RecordingBackend(backend, record_dir)
+    return backend
+
+def get_client():
+    """
+    Retorna o cliente Gemini do processo, criado na primeira chamada.
+
+    Todas as sessões compartilham o mesmo cliente e, portanto, o mesmo pool de
+    conexões. Se a chave não estiver configurada, retorna None; a falha fica
+    memorizada (ver `get_api_error`) e só é registrada no log uma vez.
+    """
+    global _client, _api_error
+    with _lock:
+        if _client is None and _api_error is None:
+            try:
+                _client = load_api()
+            except ValueError as e:
+                _api_error = str(e)
+                logging.error(_api_error)
+        return _client
+
+def get_api_error() -> str | None:
+    """Mensagem da falha ao criar o cliente, para ser exibida pela interface (thread do script)."""
+    with _lock:
+        return _api_error
+
+def get_backend():
+    """Retorna o backend de modelo do processo (ver `load_backend`), criado uma única vez."""
+    global _backend
+    with _lock:
+        if _backend is not None:
+            return _backend
+    backend = load_backend()
+    with _lock:
+        if _backend is None and backend is not None:
+            _backend = backend
+        return _backend
+
+def get_rate_limiter() -> RateLimiter:
+    """Retorna o RateLimiter do processo: a cota da chave vale para todas as sessões juntas."""
+    global _rate_limiter
+    with _lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(rpm_limit=RPM_LIMIT, tpm_limit=TPM_LIMIT)
+        return _rate_limiter
+
+def get_upload_registry() -> UploadRegistry:
+    """Retorna o registro de uploads do backend compartilhado."""
+    global _upload_registry
+    backend = get_backend()
+    with _lock:
+        if _upload_registry is None or _upload_registry.backend is not backend:
+            _upload_registry = UploadRegistry(backend)
+        return _upload_registry
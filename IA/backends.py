@@ -0,0 +1,254 @@
+import abc
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from google.genai import errors, types
+
+# Tempo máximo de espera pelo processamento de um arquivo enviado à Files API
+TIMEOUT_PROCESSAMENTO_ARQUIVO = 60
+
+
+class UploadError(RuntimeError):
+    """O documento não pôde ser disponibilizado pela Files API (falha ou processamento demorado)."""
+
+
+class LLMBackend(abc.ABC):
+    """
+    Interface dos backends de modelo usados por PDFQA.
+
+    `generate_content` recebe os mesmos argumentos de `client.models.generate_content`
+    e retorna um objeto com `.text` e `.usage_metadata`. Backends com `supports_upload`
+    implementam `upload_file`, que envia um documento e retorna uma referência
+    com `.uri`, `.mime_type` e `.expiration_time`, ou levanta `UploadError`.
+    """
+    name = "base"
+    supports_upload = False
+
+    @abc.abstractmethod
+    def generate_content(self, model: str, contents: list, config=None):
+        ...
+
+    def upload_file(self, data: bytes, mime_type: str, display_name: str | None = None):
+        raise NotImplementedError(f"O backend '{self.name}' não suporta envio de arquivos.")
+
+
+class GeminiBackend(LLMBackend):
+    """Backend real, que delega ao cliente da SDK google-genai."""
+    name = "gemini"
+    supports_upload = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def generate_content(self, model: str, contents: list, config=None):
+        return self.client.models.generate_content(model=model, contents=contents, config=config)
+
+    def upload_file(self, data: bytes, mime_type: str, display_name: str | None = None):
+        file = self.client.files.upload(
+            file=io.BytesIO(data),
+            config=types.UploadFileConfig(mime_type=mime_type, display_name=display_name)
+        )
+        # Arquivos grandes passam por processamento antes de poderem ser usados
+        limite = time.time() + TIMEOUT_PROCESSAMENTO_ARQUIVO
+        while file.state == types.FileState.PROCESSING and time.time() < limite:
+            time.sleep(1)
+            file = self.client.files.get(name=file.name)
+        if file.state == types.FileState.FAILED:
+            raise UploadError(f"Falha no processamento do arquivo enviado: {file.error}")
+        if file.state == types.FileState.PROCESSING:
+            raise UploadError(f"Arquivo {file.name} ainda em processamento após {TIMEOUT_PROCESSAMENTO_ARQUIVO}s.")
+        return file
+
+
+def _iter_content_bytes(contents: list, files: dict | None = None):
+    """
+    Percorre o conteúdo da requisição (textos e partes binárias) como bytes.
+
+    Referências da Files API são resolvidas pelo dicionário `files` (uri -> bytes),
+    para que o mesmo documento tenha a mesma chave enviado inline ou por upload.
+    """
+    for item in contents:
+        if isinstance(item, str):
+            yield item.encode('utf-8')
+            continue
+        inline_data = getattr(item, 'inline_data', None)
+        if inline_data is not None and inline_data.data is not None:
+            yield inline_data.data
+        file_data = getattr(item, 'file_data', None)
+        if file_data is not None and file_data.file_uri:
+            yield (files or {}).get(file_data.file_uri, file_data.file_uri.encode('utf-8'))
+        text = getattr(item, 'text', None)
+        if text:
+            yield text.encode('utf-8')
+
+
+def fixture_key(contents: list, files: dict | None = None) -> str:
+    """Chave da fixture: SHA-256 de todo o conteúdo enviado ao modelo."""
+    h = hashlib.sha256()
+    for data in _iter_content_bytes(contents, files):
+        h.update(len(data).to_bytes(8, 'big'))
+        h.update(data)
+    return h.hexdigest()
+
+
+def _is_json_request(config) -> bool:
+    return getattr(config, 'response_mime_type', None) == "application/json"
+
+
+class LocalBackend(LLMBackend):
+    """
+    Substituto local e determinístico do Gemini para testes de carga e benchmarks.
+
+    Responde a partir de fixtures gravadas (`<fixtures_dir>/<chave>.json` ou
+    `default.json`, com os campos "text" e opcionalmente "usage"), simulando
+    latência, erros 429 e consumo de tokens configuráveis. Uploads ficam em
+    memória e expiram após `file_ttl` segundos; referências vencidas geram 404,
+    como na Files API.
+    """
+    name = "local"
+    supports_upload = True
+
+    def __init__(self, fixtures_dir: str | None = None, latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int | None = None,
+                 file_ttl: float = 48 * 3600):
+        self.fixtures_dir = Path(fixtures_dir) if fixtures_dir else None
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.file_ttl = file_ttl
+        self._files = {}
+        self._files_expiration = {}
+        self.calls = 0
+        self.errors_injected = 0
+        self.uploads = 0
+
+    def _load_fixture(self, key: str) -> dict | None:
+        if self.fixtures_dir is None:
+            return None
+        for name in (f"{key}.json", "default.json"):
+            path = self.fixtures_dir / name
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        return None
+
+    def _simulate_call(self):
+        """Conta a chamada, aplica a latência simulada e injeta erros 429 conforme `error_rate`."""
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.latency_jitter, self.latency_jitter))
+            inject_error = self._random.random() < self.error_rate
+        time.sleep(delay)
+
+        if inject_error:
+            with self._lock:
+                self.errors_injected += 1
+            raise errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                                     "message": "Limite simulado pelo backend local."}})
+
+    def upload_file(self, data: bytes, mime_type: str, display_name: str | None = None):
+        name = f"files/{hashlib.sha256(data).hexdigest()[:16]}"
+        uri = f"local://{name}"
+        expiration_time = datetime.now(timezone.utc) + timedelta(seconds=self.file_ttl)
+        with self._lock:
+            self.uploads += 1
+            self._files[uri] = data
+            self._files_expiration[uri] = expiration_time
+        return SimpleNamespace(name=name, uri=uri, mime_type=mime_type, display_name=display_name,
+                               size_bytes=len(data), expiration_time=expiration_time)
+
+    def _check_files(self, contents: list):
+        """Rejeita referências a arquivos desconhecidos ou vencidos, como a Files API."""
+        agora = datetime.now(timezone.utc)
+        for item in contents:
+            file_data = getattr(item, 'file_data', None)
+            if file_data is None or not file_data.file_uri:
+                continue
+            expiration_time = self._files_expiration.get(file_data.file_uri)
+            if expiration_time is None or expiration_time <= agora:
+                raise errors.ClientError(404, {"error": {"code": 404, "status": "NOT_FOUND",
+                                                         "message": f"Arquivo {file_data.file_uri} não encontrado ou expirado."}})
+
+    def _reply(self, contents: list, config) -> tuple[str, SimpleNamespace]:
+        """Texto da resposta e `usage_metadata` para a requisição."""
+        self._check_files(contents)
+        fixture = self._load_fixture(fixture_key(contents, self._files)) or {}
+        text = fixture.get("text", "[]" if _is_json_request(config) else "Resposta simulada pelo backend local.")
+
+        # Consumo de tokens: o da fixture, ou uma estimativa de 4 bytes por token
+        usage = fixture.get("usage", {})
+        prompt_tokens = usage.get("prompt_token_count", sum(len(data) for data in _iter_content_bytes(contents, self._files)) // 4)
+        output_tokens = usage.get("candidates_token_count", len(text) // 4)
+        return text, SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+    def generate_content(self, model: str, contents: list, config=None):
+        self._simulate_call()
+        text, usage_metadata = self._reply(contents, config)
+        return SimpleNamespace(text=text, usage_metadata=usage_metadata)
+
+
+class RecordingBackend(LLMBackend):
+    """Envolve outro backend e grava cada resposta como fixture para o LocalBackend."""
+    name = "recording"
+
+    def __init__(self, inner: LLMBackend, fixtures_dir: str):
+        self.inner = inner
+        self.fixtures_dir = Path(fixtures_dir)
+        self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+        # Conteúdo dos uploads, para gravar as fixtures com a mesma chave do envio inline
+        self._files = {}
+
+    @property
+    def supports_upload(self) -> bool:
+        return self.inner.supports_upload
+
+    def _save(self, contents: list, text: str, usage):
+        fixture = {"text": text}
+        if usage is not None:
+            fixture["usage"] = {
+                "prompt_token_count": usage.prompt_token_count,
+                "candidates_token_count": usage.candidates_token_count,
+            }
+        try:
+            with open(self.fixtures_dir / f"{fixture_key(contents, self._files)}.json", 'w', encoding='utf-8') as f:
+                json.dump(fixture, f, ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"[RecordingBackend] Não foi possível gravar a fixture: {e}")
+
+    def generate_content(self, model: str, contents: list, config=None):
+        response = self.inner.generate_content(model=model, contents=contents, config=config)
+        self._save(contents, response.text, getattr(response, 'usage_metadata', None))
+        return response
+
+    def upload_file(self, data: bytes, mime_type: str, display_name: str | None = None):
+        file = self.inner.upload_file(data, mime_type, display_name=display_name)
+        self._files[file.uri] = data
+        return file
+
+
+def local_backend_from_env() -> LocalBackend:
+    """Cria o LocalBackend com parâmetros lidos das variáveis de ambiente LLM_LOCAL_*."""
+    seed = os.getenv('LLM_LOCAL_SEED')
+    return LocalBackend(
+        fixtures_dir=os.getenv('LLM_LOCAL_FIXTURES'),
+        latency=float(os.getenv('LLM_LOCAL_LATENCY', '0')),
+        latency_jitter=float(os.getenv('LLM_LOCAL_LATENCY_JITTER', '0')),
+        error_rate=float(os.getenv('LLM_LOCAL_ERROR_RATE', '0')),
+        seed=int(seed) if seed else None,
+        file_ttl=float(os.getenv('LLM_LOCAL_FILE_TTL', str(48 * 3600))),
+    )
@@ -0,0 +1,381 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+# Diretório padrão do cache em disco (pode ser alterado pela variável de ambiente)
+DIRETORIO_PADRAO = os.getenv('CALC_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'calc_train_ia'))
+# Similaridade mínima (cosseno TF-IDF de n-gramas de caracteres) para reaproveitar uma resposta
+LIMIAR_SIMILARIDADE_PADRAO = float(os.getenv('CALC_ANSWER_SIMILARITY', '0.9'))
+# Palavras ignoradas na comparação de perguntas ("qual é a carga" ~ "qual a carga")
+STOPWORDS = frozenset(
+    "a o e as os da do das dos de um uma uns umas que para por com no na nos nas em ao aos sao ser".split()
+)
+
+
+def chave_extracao(dados: bytes, prompt: str, model_name: str) -> str:
+    """Gera a chave de cache (SHA-256) a partir do conteúdo, do prompt e do modelo."""
+    h = hashlib.sha256()
+    for parte in (dados, prompt.encode('utf-8'), model_name.encode('utf-8')):
+        # O tamanho de cada parte evita colisões por concatenação
+        h.update(len(parte).to_bytes(8, 'big'))
+        h.update(parte)
+    return h.hexdigest()
+
+
+def chave_documentos(chaves_documentos: list, model_name: str) -> str:
+    """Chave do conjunto de documentos de uma pergunta (independe da ordem de envio)."""
+    h = hashlib.sha256(model_name.encode('utf-8'))
+    for chave in sorted(chaves_documentos):
+        h.update(chave.encode('ascii'))
+    return h.hexdigest()
+
+
+def normalizar_pergunta(pergunta: str) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços simples."""
+    texto = unicodedata.normalize('NFKD', pergunta.casefold())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', texto).split())
+
+
+def _ngramas(texto: str, n: int) -> collections.Counter:
+    """n-gramas de caracteres da pergunta normalizada, sem as stopwords."""
+    texto = f" {' '.join(p for p in texto.split() if p not in STOPWORDS) or texto} "
+    return collections.Counter(texto[i:i + n] for i in range(max(1, len(texto) - n + 1)))
+
+
+class ExtractionCache:
+    """
+    Cache em dois níveis para resultados de extração da IA: LRU em memória e
+    arquivos JSON em disco com remoção dos mais antigos ao exceder o tamanho máximo.
+
+    O tamanho ocupado em disco é mantido em memória; o diretório só é
+    percorrido na abertura e quando é preciso remover arquivos.
+    """
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO, max_itens_memoria: int = 128, max_bytes_disco: int = 200 * 1024 * 1024):
+        self.diretorio = Path(diretorio) / 'extracoes'
+        self.max_itens_memoria = max_itens_memoria
+        self.max_bytes_disco = max_bytes_disco
+        self._memoria = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+        self._bytes_disco = 0
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logging.warning(f"[Cache] Não foi possível criar o diretório de cache em disco ({e}). Usando apenas memória.")
+            self.diretorio = None
+        else:
+            self._bytes_disco = sum(tamanho for _, tamanho, _ in self._arquivos_disco())
+
+    def _guardar_memoria(self, chave: str, valor):
+        self._memoria[chave] = valor
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.max_itens_memoria:
+            self._memoria.popitem(last=False)
+
+    def get(self, chave: str):
+        """Retorna o JSON armazenado para a chave, ou None se não houver."""
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.hits_memoria += 1
+                return self._memoria[chave]
+
+        if self.diretorio is not None:
+            caminho = self.diretorio / f"{chave}.json"
+            try:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    valor = json.load(f)
+                os.utime(caminho)  # Marca como usado recentemente para a remoção por idade
+                with self._lock:
+                    self._guardar_memoria(chave, valor)
+                    self.hits_disco += 1
+                return valor
+            except (OSError, ValueError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, chave: str, valor):
+        """Armazena o JSON nos dois níveis do cache."""
+        with self._lock:
+            self._guardar_memoria(chave, valor)
+
+        if self.diretorio is None:
+            return
+        try:
+            destino = self.diretorio / f"{chave}.json"
+            temporario = self.diretorio / f"{chave}.{threading.get_ident()}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump(valor, f, ensure_ascii=False)
+            tamanho = temporario.stat().st_size
+            try:
+                substituido = destino.stat().st_size
+            except OSError:
+                substituido = 0
+            os.replace(temporario, destino)
+        except OSError as e:
+            logging.warning(f"[Cache] Falha ao gravar no cache em disco: {e}")
+            return
+
+        with self._lock:
+            self._bytes_disco += tamanho - substituido
+            excedeu = self._bytes_disco > self.max_bytes_disco
+        if excedeu:
+            self._remover_excedente()
+
+    def _arquivos_disco(self) -> list:
+        """Lista (mtime, tamanho, caminho) dos arquivos do cache em disco."""
+        arquivos = []
+        for caminho in self.diretorio.glob('*.json'):
+            try:
+                info = caminho.stat()
+            except OSError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, caminho))
+        return arquivos
+
+    def _remover_excedente(self):
+        """Remove os arquivos menos usados até o cache em disco caber no tamanho máximo."""
+        arquivos = self._arquivos_disco()
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.max_bytes_disco:
+                break
+            try:
+                caminho.unlink()
+            except OSError:
+                continue
+            total -= tamanho
+        # A varredura corrige eventuais desvios da contagem incremental
+        with self._lock:
+            self._bytes_disco = total
+
+    def clear(self):
+        """Remove todos os itens do cache, em memória e em disco."""
+        with self._lock:
+            self._memoria.clear()
+        if self.diretorio is None:
+            return
+        restante = 0
+        for _, tamanho, caminho in self._arquivos_disco():
+            try:
+                caminho.unlink()
+            except OSError:
+                restante += tamanho
+        with self._lock:
+            self._bytes_disco = restante
+
+    def stats(self) -> dict:
+        """Retorna os contadores de acertos e falhas do cache."""
+        with self._lock:
+            hits = self.hits_memoria + self.hits_disco
+            total = hits + self.misses
+            return {
+                'hits_memoria': self.hits_memoria,
+                'hits_disco': self.hits_disco,
+                'misses': self.misses,
+                'taxa_acerto': (hits / total) if total else 0.0,
+                'itens_memoria': len(self._memoria),
+            }
+
+
+class _Resposta:
+    __slots__ = ('pergunta', 'resposta', 'criado_em')
+
+    def __init__(self, pergunta: str, resposta: str, criado_em: float):
+        self.pergunta = pergunta
+        self.resposta = resposta
+        self.criado_em = criado_em
+
+
+class _IndiceDocumento:
+    """Índice TF-IDF das perguntas já respondidas sobre um conjunto de documentos."""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.perguntas = []
+        self._indice = None
+
+    def adicionar(self, pergunta: str):
+        self.perguntas.append(pergunta)
+        self._indice = None
+
+    def remover(self, pergunta: str):
+        self.perguntas.remove(pergunta)
+        self._indice = None
+
+    def _construir(self):
+        """Monta a matriz TF-IDF normalizada; refeita apenas quando as perguntas mudam."""
+        vocabulario = {}
+        linhas, colunas, contagens = [], [], []
+        for i, pergunta in enumerate(self.perguntas):
+            for ngrama, contagem in _ngramas(pergunta, self.n).items():
+                linhas.append(i)
+                colunas.append(vocabulario.setdefault(ngrama, len(vocabulario)))
+                contagens.append(contagem)
+
+        tf = np.zeros((len(self.perguntas), len(vocabulario)))
+        tf[linhas, colunas] = contagens
+        total = len(self.perguntas)
+        idf = np.log((1 + total) / (1 + np.count_nonzero(tf, axis=0))) + 1
+        matriz = tf * idf
+        matriz /= np.linalg.norm(matriz, axis=1, keepdims=True)
+        # n-gramas ausentes do índice têm o maior idf possível
+        self._indice = (vocabulario, idf, matriz, np.log(1 + total) + 1)
+
+    def mais_similar(self, pergunta: str) -> tuple[str | None, float]:
+        """Retorna a pergunta indexada mais parecida e a similaridade de cosseno."""
+        if not self.perguntas:
+            return None, 0.0
+        if self._indice is None:
+            self._construir()
+        vocabulario, idf, matriz, idf_ausente = self._indice
+
+        vetor = np.zeros(len(vocabulario))
+        norma_ausentes = 0.0
+        for ngrama, contagem in _ngramas(pergunta, self.n).items():
+            indice = vocabulario.get(ngrama)
+            if indice is None:
+                norma_ausentes += (contagem * idf_ausente) ** 2
+            else:
+                vetor[indice] = contagem * idf[indice]
+        norma = np.sqrt(vetor @ vetor + norma_ausentes)
+        if norma == 0:
+            return None, 0.0
+
+        similaridades = matriz @ vetor / norma
+        melhor = int(np.argmax(similaridades))
+        return self.perguntas[melhor], float(similaridades[melhor])
+
+
+class AnswerCache:
+    """
+    Cache em memória de respostas da IA, por conjunto de documentos e pergunta.
+
+    Além da pergunta normalizada idêntica, encontra perguntas quase iguais
+    (ex: "Qual a carga horária mínima?" e "qual é a carga horaria minima")
+    pela similaridade TF-IDF de n-gramas de caracteres, acima de `limiar`.
+    Perguntas com números diferentes nunca são consideradas equivalentes.
+    Itens expiram após `ttl_segundos` e os menos usados são removidos além de
+    `max_itens`.
+    """
+    def __init__(self, max_itens: int = 512, ttl_segundos: float = 7 * 24 * 3600,
+                 limiar: float = LIMIAR_SIMILARIDADE_PADRAO, n: int = 3):
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self.limiar = limiar
+        self.n = n
+        self._itens = collections.OrderedDict()
+        self._indices = {}
+        self._lock = threading.Lock()
+        self.hits_exatos = 0
+        self.hits_similares = 0
+        self.misses = 0
+
+    def _remover(self, chave: tuple):
+        del self._itens[chave]
+        chave_docs, pergunta = chave
+        indice = self._indices[chave_docs]
+        indice.remover(pergunta)
+        if not indice.perguntas:
+            del self._indices[chave_docs]
+
+    def _valido(self, chave: tuple) -> bool:
+        """Remove o item se estiver expirado; retorna se ele continua no cache."""
+        item = self._itens.get(chave)
+        if item is None:
+            return False
+        if time.time() - item.criado_em > self.ttl_segundos:
+            self._remover(chave)
+            return False
+        return True
+
+    def get(self, chave_docs: str, pergunta: str) -> tuple[str, float] | None:
+        """Retorna (resposta, similaridade) de uma pergunta igual ou parecida, ou None."""
+        normalizada = normalizar_pergunta(pergunta)
+        with self._lock:
+            chave = (chave_docs, normalizada)
+            if self._valido(chave):
+                self._itens.move_to_end(chave)
+                self.hits_exatos += 1
+                return self._itens[chave].resposta, 1.0
+
+            indice = self._indices.get(chave_docs)
+            parecida, similaridade = indice.mais_similar(normalizada) if indice else (None, 0.0)
+            if (parecida is not None and similaridade >= self.limiar
+                    and re.findall(r'\d+', parecida) == re.findall(r'\d+', normalizada)
+                    and self._valido((chave_docs, parecida))):
+                self._itens.move_to_end((chave_docs, parecida))
+                self.hits_similares += 1
+                item = self._itens[(chave_docs, parecida)]
+                logging.info(f"[Cache] Pergunta '{pergunta}' respondida pela similar '{item.pergunta}' ({similaridade:.2f}).")
+                return item.resposta, similaridade
+
+            self.misses += 1
+            return None
+
+    def set(self, chave_docs: str, pergunta: str, resposta: str):
+        normalizada = normalizar_pergunta(pergunta)
+        with self._lock:
+            chave = (chave_docs, normalizada)
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = _Resposta(pergunta, resposta, time.time())
+            self._indices.setdefault(chave_docs, _IndiceDocumento(self.n)).adicionar(normalizada)
+            while len(self._itens) > self.max_itens:
+                self._remover(next(iter(self._itens)))
+
+    def clear(self):
+        with self._lock:
+            self._itens.clear()
+            self._indices.clear()
+
+    def stats(self) -> dict:
+        """Retorna os contadores de acertos (exatos e por similaridade) e falhas."""
+        with self._lock:
+            hits = self.hits_exatos + self.hits_similares
+            total = hits + self.misses
+            return {
+                'hits_exatos': self.hits_exatos,
+                'hits_similares': self.hits_similares,
+                'misses': self.misses,
+                'taxa_acerto': (hits / total) if total else 0.0,
+                'itens': len(self._itens),
+            }
+
+
+_cache_global = None
+_cache_lock = threading.Lock()
+_answer_cache_global = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Retorna o cache de extração compartilhado por todas as sessões do processo."""
+    global _cache_global
+    with _cache_lock:
+        if _cache_global is None:
+            _cache_global = ExtractionCache()
+        return _cache_global
+
+
+def get_answer_cache() -> AnswerCache:
+    """Retorna o cache de respostas compartilhado por todas as sessões do processo."""
+    global _answer_cache_global
+    with _cache_lock:
+        if _answer_cache_global is None:
+            _answer_cache_global = AnswerCache()
+        return _answer_cache_global
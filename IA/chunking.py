@@ -0,0 +1,109 @@
+import io
+import logging
+from collections import Counter
+
+from pypdf import PdfReader, PdfWriter
+
+from utils.teams_parser import CODIFICACAO_ALTERNATIVA, TAMANHO_BLOCO_CSV, detectar_codificacao
+
+from .tokens import estimar_tokens_texto
+
+# Limites padrão de cada parte enviada à IA
+MAX_TOKENS_POR_PARTE = 20_000
+PAGINAS_POR_PARTE = 10
+# Registros no fim de uma parte e no início da seguinte comparados como possível repetição
+JANELA_SOBREPOSICAO = 5
+
+
+def dividir_csv(texto: str, max_tokens: int = MAX_TOKENS_POR_PARTE) -> list:
+    """
+    Divide o texto CSV em lotes de linhas com até `max_tokens` estimados.
+
+    A primeira linha não vazia é tratada como cabeçalho e repetida em cada lote,
+    para que a IA identifique as colunas em todas as partes.
+    """
+    linhas = texto.splitlines()
+    inicio = next((i for i, linha in enumerate(linhas) if linha.strip()), None)
+    if inicio is None:
+        return [texto]
+
+    cabecalho = linhas[inicio]
+    tokens_cabecalho = estimar_tokens_texto(cabecalho)
+    partes, atual, tokens_atual = [], [], tokens_cabecalho
+    for linha in linhas[inicio + 1:]:
+        tokens_linha = estimar_tokens_texto(linha)
+        if atual and tokens_atual + tokens_linha > max_tokens:
+            partes.append("\n".join([cabecalho] + atual))
+            atual, tokens_atual = [], tokens_cabecalho
+        atual.append(linha)
+        tokens_atual += tokens_linha
+
+    if atual or not partes:
+        partes.append("\n".join([cabecalho] + atual))
+    return partes
+
+
+def dividir_pdf(pdf_bytes: bytes, paginas_por_parte: int = PAGINAS_POR_PARTE) -> list:
+    """Divide um PDF em documentos menores com até `paginas_por_parte` páginas cada."""
+    try:
+        leitor = PdfReader(io.BytesIO(pdf_bytes))
+        total_paginas = len(leitor.pages)
+    except Exception as e:
+        logging.warning(f"[Chunking] Não foi possível ler o PDF para dividi-lo ({e}). Enviando o arquivo inteiro.")
+        return [pdf_bytes]
+
+    if total_paginas <= paginas_por_parte:
+        return [pdf_bytes]
+
+    partes = []
+    for inicio in range(0, total_paginas, paginas_por_parte):
+        escritor = PdfWriter()
+        for indice in range(inicio, min(inicio + paginas_por_parte, total_paginas)):
+            escritor.add_page(leitor.pages[indice])
+        saida = io.BytesIO()
+        escritor.write(saida)
+        partes.append(saida.getvalue())
+    return partes
+
+
+def dividir_arquivo(file_bytes: bytes, mime_type: str) -> list:
+    """Divide o conteúdo em partes conforme o tipo (páginas para PDF, linhas para texto)."""
+    if mime_type == 'application/pdf':
+        return dividir_pdf(file_bytes)
+    if mime_type.startswith('text/'):
+        # Mesma detecção da leitura local: exportações do Teams/Excel muitas vezes não são UTF-8
+        encoding = detectar_codificacao(file_bytes[:TAMANHO_BLOCO_CSV])
+        try:
+            texto = file_bytes.decode(encoding)
+        except UnicodeDecodeError:
+            texto = file_bytes.decode(CODIFICACAO_ALTERNATIVA)
+        return [parte.encode('utf-8') for parte in dividir_csv(texto)]
+    return [file_bytes]
+
+
+def _chave_registro(registro: dict) -> tuple:
+    return registro.get('Full Name'), registro.get('Timestamp'), registro.get('Action')
+
+
+def mesclar_registros(partes: list, janela: int = JANELA_SOBREPOSICAO) -> list:
+    """
+    Junta os arrays JSON de cada parte, na ordem original.
+
+    Só é descartado um registro entre os `janela` primeiros de uma parte que
+    repete um dos `janela` últimos da parte anterior (linha que a IA devolveu
+    nas duas partes da quebra). Registros idênticos em outros pontos do arquivo
+    são mantidos: podem ser linhas legítimas.
+    """
+    registros = []
+    cauda = Counter()
+    for parte in partes:
+        validos = [registro for registro in parte or [] if isinstance(registro, dict)]
+        for posicao, registro in enumerate(validos):
+            chave = _chave_registro(registro)
+            if posicao < janela and cauda[chave] > 0:
+                cauda[chave] -= 1
+                continue
+            registros.append(registro)
+        if validos:
+            cauda = Counter(_chave_registro(registro) for registro in validos[-janela:])
+    return registros
@@ -1,71 +1,228 @@
-from google import genai
-from google.genai import types
-from .api_load import load_api
-from .AI_operations import RateLimiter
+from google.genai import errors, types
+from .api_load import get_backend, get_rate_limiter, get_upload_registry
+from .cache import chave_documentos, chave_extracao, get_answer_cache, get_extraction_cache
+from . import chunking
+from .tokens import estimar_tokens, estimar_tokens_texto
+from .uploads import UploadRegistry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import logging
 import time
 import streamlit as st
 import re
 import json
 
+class ExtractionError(Exception):
+    """Falha na extração estruturada, com a resposta bruta da IA para depuração."""
+    def __init__(self, message, raw_response=None):
+        super().__init__(message)
+        self.raw_response = raw_response
+
 class PDFQA:
-    def __init__(self):
-        # Agora self.client é a instância do genai.Client
-        self.client = load_api()
+    def __init__(self, backend=None, limiter=None):
+        # Backend do modelo (Gemini ou substituto local) e RateLimiter são os do processo,
+        # compartilhados por todas as sessões; instâncias podem receber os seus (ex: testes)
+        self.backend = backend or get_backend()
         # Atualize o nome do modelo conforme necessário (ex: gemini-2.0-flash ou 1.5-flash)
         self.model_name = 'gemini-3.1-flash-lite-preview' 
-        self.limiter = RateLimiter(rpm_limit=15, tpm_limit=1_000_000)
+        self.limiter = limiter or get_rate_limiter()
+        self.cache = get_extraction_cache()
+        # PDFs das perguntas são enviados uma vez pela Files API e reaproveitados
+        self.uploads = UploadRegistry(backend) if backend else get_upload_registry()
+        # Paralelismo e tentativas da extração em partes (arquivos grandes)
+        self.max_workers = 4
+        self.max_attempts = 3
+        # Respostas a perguntas já feitas (ou quase iguais) sobre os mesmos documentos
+        self.answers = get_answer_cache()
+        # Indicam se a última extração/resposta foi servida pelo cache (sem chamada à API)
+        self.last_extraction_cached = False
+        self.last_answer_cached = False
 
-    def ask_gemini(self, pdf_files, question):
-        try:
-            contents = []
-            for pdf_file in pdf_files:
-                pdf_file.seek(0) # Garante que o ponteiro do arquivo esteja no início
-                pdf_bytes = pdf_file.read()
-                
-                # Nova forma de passar arquivos binários (SDK v1.0+)
-                part = types.Part.from_bytes(
-                    data=pdf_bytes, 
-                    mime_type="application/pdf"
+    @staticmethod
+    def _read_documents(pdf_files):
+        """Lê os PDFs uma única vez: retorna [(sha256, bytes, nome), ...]."""
+        documentos = []
+        for pdf_file in pdf_files:
+            pdf_file.seek(0) # Garante que o ponteiro do arquivo esteja no início
+            pdf_bytes = pdf_file.read()
+            documentos.append((hashlib.sha256(pdf_bytes).hexdigest(), pdf_bytes, getattr(pdf_file, 'name', None)))
+        return documentos
+
+    def _question_contents(self, documentos, question):
+        """
+        Monta o conteúdo da pergunta (referências dos PDFs + texto).
+
+        Retorna (contents, estimativa_de_tokens).
+        """
+        contents = []
+        prompt_tokens_estimate = estimar_tokens_texto(question)
+        for chave, pdf_bytes, nome in documentos:
+            # O documento é enviado uma única vez; as perguntas seguintes usam a referência
+            _, part, tokens = self.uploads.get_part(pdf_bytes, "application/pdf", nome, chave=chave)
+            contents.append(part)
+            prompt_tokens_estimate += tokens
+
+        # Adiciona a pergunta (texto)
+        contents.append(question)
+        return contents, prompt_tokens_estimate
+
+    @staticmethod
+    def _is_missing_file_error(error) -> bool:
+        """Indica se a API recusou a chamada por um arquivo enviado que não existe mais."""
+        return isinstance(error, errors.ClientError) and error.code in (403, 404)
+
+    def _ask(self, documentos, question):
+        """Pergunta ao modelo sobre os documentos; erros são propagados."""
+        for tentativa in range(2):
+            contents, prompt_tokens_estimate = self._question_contents(documentos, question)
+            try:
+                # Chamada ao backend configurado (Gemini ou substituto local)
+                response = self.limiter.call_api(
+                    self.backend.generate_content,
+                    model=self.model_name,
+                    contents=contents,
+                    prompt_tokens=prompt_tokens_estimate
                 )
-                contents.append(part)
-            
-            # Adiciona a pergunta (texto)
-            contents.append(question)
-            
-            prompt_tokens_estimate = len(question) // 4 
-
-            # Chamada atualizada para client.models.generate_content
-            response = self.limiter.call_api(
-                self.client.models.generate_content,
-                model=self.model_name,
-                contents=contents,
-                prompt_tokens=prompt_tokens_estimate
-            )
+                return response.text
+            except errors.ClientError as e:
+                # Arquivo removido antes do TTL: reenvia os documentos e tenta de novo
+                if tentativa or not self._is_missing_file_error(e):
+                    raise
+                logging.warning(f"[PDFQA] Arquivo enviado não encontrado ({e.code}). Reenviando os documentos.")
+                self.uploads.invalidate([chave for chave, _, _ in documentos])
 
-            return response.text
-            
+    def ask_gemini(self, pdf_files, question):
+        try:
+            return self._ask(self._read_documents(pdf_files), question)
         except Exception as e:
             st.error(f"Erro ao obter resposta do modelo Gemini: {str(e)}")
             return None
 
+    def _cached_answer(self, documentos, question):
+        """Procura a pergunta (ou uma quase igual) no cache de respostas; retorna (chave, resposta|None)."""
+        chave = chave_documentos([chave for chave, _, _ in documentos], self.model_name)
+        encontrada = self.answers.get(chave, question)
+        self.last_answer_cached = encontrada is not None
+        return chave, encontrada[0] if encontrada else None
+
     def _clean_json_string(self, text):
         match = re.search(r'```(?:json)?\s*({.*?}|\[.*?\])\s*```', text, re.DOTALL)
         if match:
             return match.group(1)
         return text.strip()
 
+    def _extract_part(self, file_bytes, mime_type, prompt):
+        """
+        Extrai o JSON de uma única parte, sem interagir com a interface nem com o cache.
+
+        Pode ser chamada de threads de trabalho.
+        """
+        # Criar a parte do arquivo usando a nova SDK
+        contents = [prompt, types.Part.from_bytes(data=file_bytes, mime_type=mime_type)]
+
+        # Configuração atualizada para JSON mode
+        config = types.GenerateContentConfig(
+            response_mime_type="application/json"
+        )
+
+        prompt_tokens_estimate = estimar_tokens(prompt, [(file_bytes, mime_type)])
+
+        response = self.limiter.call_api(
+            self.backend.generate_content,
+            model=self.model_name,
+            contents=contents,
+            config=config,
+            prompt_tokens=prompt_tokens_estimate
+        )
+
+        if not response or not response.text:
+            raise ExtractionError("A IA não retornou uma resposta válida. A resposta estava vazia.")
+        try:
+            extracted_data = json.loads(self._clean_json_string(response.text))
+        except json.JSONDecodeError as e:
+            raise ExtractionError("A IA não retornou um JSON válido. Verifique o documento ou o prompt.", response.text) from e
+        return extracted_data
+
+    def _extract_parts(self, parts, mime_type, prompt, progress_callback=None):
+        """
+        Extrai as partes em paralelo (limitadas pelo RateLimiter) e junta os resultados.
+
+        Partes que falharem são reenviadas isoladamente, com espera crescente,
+        até `max_attempts` tentativas. Retorna os registros mesclados.
+        """
+        results = [None] * len(parts)
+        pending = list(range(len(parts)))
+        done = 0
+        failures = {}
+
+        for attempt in range(1, self.max_attempts + 1):
+            failures = {}
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as executor:
+                futures = {executor.submit(self._extract_part, parts[i], mime_type, prompt): i for i in pending}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        logging.warning(f"[PDFQA] Parte {index + 1}/{len(parts)} falhou na tentativa {attempt}: {e}")
+                        failures[index] = e
+                        continue
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, len(parts))
+
+            if not failures:
+                break
+            pending = sorted(failures)
+            if attempt < self.max_attempts:
+                time.sleep(2 ** attempt)
+
+        if failures:
+            first_error = failures[pending[0]]
+            raise ExtractionError(
+                f"{len(failures)} de {len(parts)} partes falharam após {self.max_attempts} tentativas: {first_error}",
+                getattr(first_error, 'raw_response', None)
+            )
+        return chunking.mesclar_registros(results)
+
+    def extract_data(self, file_bytes, mime_type, prompt, progress_callback=None):
+        """
+        Extrai dados estruturados do conteúdo, dividindo arquivos grandes em partes.
+
+        Não usa a interface do Streamlit. Retorna (dados, veio_do_cache) e
+        levanta ExtractionError em caso de falha.
+        """
+        # O cache é consultado e gravado uma única vez por arquivo, não por parte
+        cache_key = chave_extracao(file_bytes, prompt, self.model_name)
+        cached_data = self.cache.get(cache_key)
+        if cached_data is not None:
+            return cached_data, True
+
+        parts = chunking.dividir_arquivo(file_bytes, mime_type)
+        if len(parts) == 1:
+            extracted_data = self._extract_part(file_bytes, mime_type, prompt)
+        else:
+            logging.info(f"[PDFQA] Arquivo dividido em {len(parts)} partes para extração paralela.")
+            extracted_data = self._extract_parts(parts, mime_type, prompt, progress_callback)
+        self.cache.set(cache_key, extracted_data)
+        return extracted_data, False
+
     def extract_structured_data(self, uploaded_file, prompt, csv_data=None):
         """
         Extrai dados estruturados de um arquivo (PDF, CSV, etc.) usando a IA.
+
+        Resultados são reaproveitados do cache quando o mesmo conteúdo é enviado
+        com o mesmo prompt e modelo; nesse caso não há chamada à API nem espera
+        no RateLimiter, e `last_extraction_cached` fica True. Arquivos grandes
+        são divididos em partes extraídas em paralelo.
         """
+        self.last_extraction_cached = False
         if not uploaded_file and not csv_data:
             st.warning("Nenhum arquivo fornecido para extração.")
             return None
 
         try:
             with st.spinner(f"Analisando com IA para extrair dados..."):
-                contents = [prompt]
-
                 if csv_data:
                     file_bytes = csv_data.encode('utf-8')
                     mime_type = 'text/csv'
@@ -77,53 +234,40 @@ class PDFQA:
                     
                     st.info(f"Arquivo carregado: {len(file_bytes)} bytes")
 
-                # Criar a parte do arquivo usando a nova SDK
-                file_part = types.Part.from_bytes(
-                    data=file_bytes,
-                    mime_type=mime_type
-                )
-                contents.append(file_part)
-                
-                # Configuração atualizada para JSON mode
-                config = types.GenerateContentConfig(
-                    response_mime_type="application/json"
-                )
+                extracted_data, cached = self.extract_data(file_bytes, mime_type, prompt)
+                self.last_extraction_cached = cached
 
-                prompt_tokens_estimate = len(prompt) // 4
-                
-                response = self.limiter.call_api(
-                    self.client.models.generate_content,
-                    model=self.model_name,
-                    contents=contents,
-                    config=config,
-                    prompt_tokens=prompt_tokens_estimate
-                )
-                
-                if response and response.text:
-                    cleaned_response = self._clean_json_string(response.text)
-                    extracted_data = json.loads(cleaned_response)
-                    
-                    st.success(f"Dados extraídos com sucesso de '{uploaded_file.name if uploaded_file else 'CSV'}'!")
-                    return extracted_data
+                source_name = uploaded_file.name if uploaded_file else 'CSV'
+                if cached:
+                    st.success(f"Dados de '{source_name}' recuperados do cache.")
                 else:
-                    st.error("A IA não retornou uma resposta válida. A resposta estava vazia.")
-                    return None
+                    st.success(f"Dados extraídos com sucesso de '{source_name}'!")
+                return extracted_data
                 
-        except json.JSONDecodeError:
-            st.error("Erro na extração: A IA não retornou um JSON válido. Verifique o documento ou o prompt.")
-            if 'response' in locals() and hasattr(response, 'text'):
-                st.text_area("Resposta recebida da IA (para depuração):", value=response.text, height=150)
+        except ExtractionError as e:
+            st.error(f"Erro na extração: {e}")
+            if e.raw_response:
+                st.text_area("Resposta recebida da IA (para depuração):", value=e.raw_response, height=150)
             return None
         except Exception as e:
             st.error(f"Ocorreu um erro ao processar o arquivo com a IA: {e}")
-            if 'response' in locals() and hasattr(response, 'text'):
-                st.text_area("Resposta recebida da IA (para depuração):", value=response.text, height=150)
             return None
 
     def answer_question(self, pdf_files, question):
+        """
+        Responde à pergunta sobre os PDFs e retorna (resposta, duração).
+
+        Perguntas iguais ou quase iguais sobre os mesmos documentos são
+        respondidas pelo cache, sem chamada à API nem espera no RateLimiter.
+        """
         start_time = time.time()
         try:
-            answer = self.ask_gemini(pdf_files, question)
+            documentos = self._read_documents(pdf_files)
+            chave, answer = self._cached_answer(documentos, question)
+            if answer is None:
+                answer = self._ask(documentos, question)
+                if answer:
+                    self.answers.set(chave, question, answer)
             duration = time.time() - start_time
             if answer:
                 return answer, duration
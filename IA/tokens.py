@@ -0,0 +1,47 @@
+import io
+import logging
+import re
+
+from pypdf import PdfReader
+
+# O Gemini contabiliza cada página de PDF como uma imagem de tamanho fixo
+TOKENS_POR_PAGINA_PDF = 258
+# Outros anexos binários (ex: imagens) também contam como uma imagem
+TOKENS_POR_IMAGEM = 258
+CARACTERES_POR_TOKEN = 4
+
+_RE_PAGINA_PDF = re.compile(rb"/Type\s*/Page(?!s)")
+
+
+def estimar_tokens_texto(texto: str) -> int:
+    """Estimativa de tokens de um texto (aprox. 4 caracteres por token)."""
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def contar_paginas_pdf(pdf_bytes: bytes) -> int:
+    """Conta as páginas do PDF; se ele não puder ser lido, conta os objetos de página nos bytes."""
+    try:
+        return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+    except Exception as e:
+        logging.debug(f"[Tokens] PDF ilegível pelo pypdf ({e}); contando páginas pelos bytes.")
+        return max(1, len(_RE_PAGINA_PDF.findall(pdf_bytes)))
+
+
+def estimar_tokens_anexo(dados: bytes, mime_type: str) -> int:
+    """Estimativa de tokens de entrada de um anexo conforme o tipo do arquivo."""
+    if mime_type == 'application/pdf':
+        return contar_paginas_pdf(dados) * TOKENS_POR_PAGINA_PDF
+    if mime_type.startswith('text/') or mime_type in ('application/csv', 'application/json'):
+        return len(dados.decode('utf-8', errors='ignore')) // CARACTERES_POR_TOKEN + 1
+    return TOKENS_POR_IMAGEM
+
+
+def estimar_tokens(prompt: str, anexos: list = (), tokens_saida: int = 0) -> int:
+    """
+    Estima os tokens de uma chamada: prompt, anexos [(bytes, mime_type), ...] e,
+    opcionalmente, a saída esperada.
+    """
+    total = estimar_tokens_texto(prompt) + tokens_saida
+    for dados, mime_type in anexos:
+        total += estimar_tokens_anexo(dados, mime_type)
+    return total
@@ -0,0 +1,117 @@
+import collections
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from google.genai import types
+
+from .backends import UploadError
+from .tokens import estimar_tokens_anexo
+
+# A Files API mantém os arquivos por 48h; o registro renova antes disso
+TTL_PADRAO_SEGUNDOS = 47 * 3600
+# Margem antes da expiração informada pela API para considerar o arquivo vencido
+# (limitada a 10% do tempo restante)
+MARGEM_EXPIRACAO_SEGUNDOS = 300
+# Quantidade fixa de locks compartilhados entre os documentos (por faixa do hash)
+NUM_LOCKS_ENVIO = 64
+# Máximo de referências guardadas; as vencidas e depois as mais antigas saem primeiro
+MAX_UPLOADS_REGISTRADOS = 256
+
+
+class _Upload:
+    __slots__ = ('part', 'tokens', 'expira_em')
+
+    def __init__(self, part, tokens: int, expira_em: float):
+        self.part = part
+        self.tokens = tokens
+        self.expira_em = expira_em
+
+
+class UploadRegistry:
+    """
+    Registro de documentos enviados pela Files API, indexado pelo SHA-256 do conteúdo.
+
+    Cada documento é enviado uma única vez e a referência (`Part.from_uri`) é
+    reaproveitada nas perguntas seguintes até o fim do TTL; depois disso, ou
+    após `invalidate`, o próximo uso reenvia o arquivo de forma transparente.
+    Backends sem `supports_upload`, ou envios que falham com `UploadError`,
+    recebem o conteúdo inline, como antes.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = TTL_PADRAO_SEGUNDOS,
+                 max_uploads: int = MAX_UPLOADS_REGISTRADOS):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_uploads = max_uploads
+        self._uploads = collections.OrderedDict()
+        # Protege o dicionário e os contadores, compartilhados entre as faixas
+        self._lock = threading.Lock()
+        # Locks por faixa do hash evitam envios duplicados de perguntas simultâneas
+        # sem crescer com o número de documentos
+        self._locks_envio = [threading.Lock() for _ in range(NUM_LOCKS_ENVIO)]
+        self.uploads = 0
+        self.reuses = 0
+
+    def _lock_da_chave(self, chave: str) -> threading.Lock:
+        return self._locks_envio[int(chave[:8], 16) % NUM_LOCKS_ENVIO]
+
+    def _expiracao(self, handle) -> float:
+        expira_em = time.time() + self.ttl_seconds
+        expiration_time = getattr(handle, 'expiration_time', None)
+        if isinstance(expiration_time, datetime):
+            if expiration_time.tzinfo is None:
+                expiration_time = expiration_time.replace(tzinfo=timezone.utc)
+            restante = expiration_time.timestamp() - time.time()
+            expira_em = min(expira_em, time.time() + restante - min(MARGEM_EXPIRACAO_SEGUNDOS, restante * 0.1))
+        return expira_em
+
+    def get_part(self, data: bytes, mime_type: str, display_name: str | None = None, chave: str | None = None) -> tuple:
+        """
+        Retorna (chave, part, tokens_estimados) do documento, enviando-o se
+        ainda não houver uma referência válida. `chave` evita recalcular o
+        SHA-256 quando ele já é conhecido.
+        """
+        chave = chave or hashlib.sha256(data).hexdigest()
+        with self._lock_da_chave(chave):
+            with self._lock:
+                upload = self._uploads.get(chave)
+                if upload is not None and upload.expira_em > time.time():
+                    self._uploads.move_to_end(chave)
+                    self.reuses += 1
+                    return chave, upload.part, upload.tokens
+
+            tokens = estimar_tokens_anexo(data, mime_type)
+            if not self.backend.supports_upload:
+                return chave, types.Part.from_bytes(data=data, mime_type=mime_type), tokens
+            try:
+                handle = self.backend.upload_file(data, mime_type, display_name=display_name)
+            except UploadError as e:
+                logging.warning(f"[Uploads] Documento {chave[:12]} enviado inline: {e}")
+                return chave, types.Part.from_bytes(data=data, mime_type=mime_type), tokens
+
+            part = types.Part.from_uri(file_uri=handle.uri, mime_type=handle.mime_type or mime_type)
+            with self._lock:
+                self._uploads[chave] = _Upload(part, tokens, self._expiracao(handle))
+                self._uploads.move_to_end(chave)
+                self.uploads += 1
+                self._descartar_excedentes()
+            logging.info(f"[Uploads] Documento {chave[:12]} enviado ({len(data)} bytes) como {handle.uri}.")
+            return chave, part, tokens
+
+    def _descartar_excedentes(self):
+        """Remove as referências vencidas e, acima do limite, as mais antigas (chamado sob `_lock`)."""
+        agora = time.time()
+        for chave in [chave for chave, upload in self._uploads.items() if upload.expira_em <= agora]:
+            del self._uploads[chave]
+        while len(self._uploads) > self.max_uploads:
+            self._uploads.popitem(last=False)
+
+    def invalidate(self, chaves):
+        """Descarta as referências indicadas (ex: arquivo removido antes do TTL)."""
+        for chave in chaves:
+            # Mesmo lock de `get_part`: não corre com um envio em andamento do mesmo documento
+            with self._lock_da_chave(chave), self._lock:
+                self._uploads.pop(chave, None)
@@ -18,7 +18,7 @@ def main():
     # --- NAVEGAÇÃO ENTRE PÁGINAS ---
     st.sidebar.markdown("---")
     # Adicionando a nova página à lista de opções
-    page_options = ["Calculadora de Treinamento", "Administração", "Ajuda e Demonstração"]
+    page_options = ["Calculadora de Treinamento", "Histórico de Treinamentos", "Administração", "Ajuda e Demonstração"]
     page = st.sidebar.radio(
         "Navegação",
         page_options,
@@ -27,8 +27,6 @@ def main():
     
     # --- ROTEAMENTO DAS PÁGINAS ---
     if page == "Calculadora de Treinamento":
-        if 'colaboradores' not in st.session_state:
-            st.session_state.colaboradores = []
         if 'dados_processados' not in st.session_state:
             st.session_state.dados_processados = None
 
@@ -36,20 +34,26 @@ def main():
         training_title, total_oportunidades, total_check_ins = interface.configurar_barra_lateral()
         interface.desenhar_formulario_colaboradores(total_oportunidades, total_check_ins)
 
-        if st.session_state.colaboradores:
+        if not interface.obter_colaboradores().empty:
             if st.button("📊 Calcular Resultados Finais", type="primary"):
-                if interface.validar_dados_colaboradores():
-                    st.session_state.dados_processados = calculos.processar_dados_colaboradores(
-                        st.session_state.colaboradores, 
+                if interface.validar_dados_colaboradores(total_oportunidades, total_check_ins):
+                    st.session_state.dados_processados = calculos.calcular_notas_em_lote(
+                        interface.obter_colaboradores(),
                         total_oportunidades,
                         total_check_ins
                     )
+                    interface.registrar_no_historico(st.session_state.dados_processados, training_title, total_check_ins, total_oportunidades)
+                    interface.iniciar_geracao_relatorio(st.session_state.dados_processados, training_title)
                     st.success("Cálculo realizado com sucesso! Veja os resultados abaixo.")
 
         if st.session_state.dados_processados is not None:
             interface.exibir_tabela_resultados(st.session_state.dados_processados)
             interface.exibir_botao_pdf(st.session_state.dados_processados, training_title)
+            interface.exibir_botao_certificados(st.session_state.dados_processados, training_title)
     
+    elif page == "Histórico de Treinamentos":
+        interface.exibir_pagina_historico()
+
     elif page == "Administração":
         interface.exibir_pagina_admin()
 
@@ -1,6 +1,10 @@
 
+import os
 import streamlit as st
 import pandas as pd
+from . import user_directory
+
+COLUNAS_USUARIOS = ["Nome", "E-mail", "Função"]
 
 
 @st.cache_data(ttl=300) # Cache por 5 minutos
@@ -17,44 +21,93 @@ def get_authorized_users() -> list:
         st.error(f"Erro inesperado ao carregar segredos dos usuários: {e}")
         return []
 
+def get_user_directory_path() -> str | None:
+    """
+    Caminho do diretório de usuários em SQLite (USER_DB_PATH em `[general]` nos
+    secrets ou no ambiente). Sem ele, os usuários vêm do secrets.toml.
+    """
+    try:
+        caminho = st.secrets["general"]["USER_DB_PATH"]
+    except (KeyError, TypeError, AttributeError, FileNotFoundError):
+        caminho = os.getenv("USER_DB_PATH")
+    return caminho or None
+
+def _normalizar_email(email) -> str:
+    return str(email or "").strip().lower()
+
+@st.cache_resource(ttl=300) # Mesmo intervalo de atualização da lista de usuários
+def get_user_index() -> dict:
+    """
+    Índice dos usuários autorizados por e-mail normalizado, compartilhado entre as sessões.
+
+    Cada entrada traz a role e o nome de exibição já resolvidos. O dicionário
+    não deve ser alterado por quem o consulta.
+    """
+    indice = {}
+    for user in get_authorized_users():
+        email = _normalizar_email(user.get("email"))
+        if email and email not in indice: # Em e-mails repetidos, vale o primeiro
+            indice[email] = {**user, "role": user.get("role", "user"), "display_name": user.get("name") or None}
+    return indice
+
 def get_user_info(email: str) -> dict | None:
     """Busca informações de um usuário na lista de autorizados pelo e-mail."""
     if not email:
         return None
-    
-    authorized_users = get_authorized_users()
-    email_lower = email.lower()
+    caminho = get_user_directory_path()
+    if caminho:
+        return user_directory.buscar_usuario(caminho, email)
+    return get_user_index().get(_normalizar_email(email))
+
+@st.cache_data(ttl=5, show_spinner=False) # Uma consulta por intervalo atende todos os reruns e sessões
+def get_user_directory_version(caminho: str) -> int:
+    """Versão do diretório SQLite, consultada no banco no máximo uma vez a cada 5 segundos."""
+    return user_directory.versao(caminho)
+
+def _get_current_user_info() -> dict | None:
+    """
+    Retorna as informações do usuário logado, memorizadas na sessão.
 
-    for user in authorized_users:
-        if user.get("email", "").lower() == email_lower:
-            return user
-    return None
+    A busca só é refeita quando o e-mail logado muda ou a lista de usuários é
+    alterada (novo índice do secrets ou nova versão do diretório SQLite, que
+    pode levar alguns segundos para ser notada).
+    """
+    email = getattr(st.user, "email", None)
+    if not email:
+        return None
+
+    memo = st.session_state.get("_auth_usuario_atual")
+    caminho = get_user_directory_path()
+    if caminho:
+        versao = (caminho, get_user_directory_version(caminho))
+        valido = memo is not None and memo[1] == versao
+    else:
+        versao = get_user_index()
+        valido = memo is not None and memo[1] is versao
+
+    if not valido or memo[0] != email:
+        memo = (email, versao, get_user_info(email))
+        st.session_state["_auth_usuario_atual"] = memo
+    return memo[2]
 
 def is_user_authorized() -> bool:
     """Verifica se o usuário logado via st.user está na lista de autorizados."""
-    if not hasattr(st.user, "email"):
-        return False
-        
-    user_info = get_user_info(st.user.email)
-    return user_info is not None
+    return _get_current_user_info() is not None
 
 def get_user_role() -> str:
     """Retorna a role ('admin' ou 'user') do usuário logado."""
-    if not hasattr(st.user, "email"):
-        return "user" # Padrão seguro
-        
-    user_info = get_user_info(st.user.email)
-    return user_info.get("role", "user") if user_info else "user"
+    user_info = _get_current_user_info()
+    return user_info["role"] if user_info else "user" # Padrão seguro
 
 def get_user_display_name() -> str:
     """Retorna o nome de exibição do usuário logado."""
     if not hasattr(st.user, "email"):
         return "Visitante"
         
-    user_info = get_user_info(st.user.email)
+    user_info = _get_current_user_info()
     # Prioriza o nome do secrets, senão o nome do st.user, e por último o e-mail
-    if user_info and user_info.get("name"):
-        return user_info["name"]
+    if user_info and user_info["display_name"]:
+        return user_info["display_name"]
     
     return getattr(st.user, "name", st.user.email)
 
@@ -68,22 +121,30 @@ def check_admin_permission():
         st.error("Acesso Negado. Você não tem permissão de administrador para realizar esta ação.")
         st.stop()
 
-def get_users_for_display() -> pd.DataFrame:
+def search_users(busca: str = "", pagina: int = 1, por_pagina: int = 50) -> tuple[pd.DataFrame, int]:
     """
-    Prepara um DataFrame com os usuários autorizados para exibição na página de admin.
+    Retorna uma página de usuários cujo nome ou e-mail contém `busca`, e o total encontrado.
+
+    No diretório SQLite a busca e a paginação são feitas pelo banco; no
+    secrets.toml, sobre o índice em memória.
     """
-    authorized_users = get_authorized_users()
-    if not authorized_users:
-        return pd.DataFrame(columns=["Nome", "E-mail", "Função"])
-    
-    # Prepara os dados para o DataFrame
-    display_data = []
-    for user in authorized_users:
-        display_data.append({
-            "Nome": user.get("name", "N/A"),
-            "E-mail": user.get("email", "N/A"),
-            "Função": user.get("role", "user").capitalize() # ex: "Admin", "User"
-        })
-        
-    df = pd.DataFrame(display_data)
-    return df
+    deslocamento = (max(pagina, 1) - 1) * por_pagina
+    caminho = get_user_directory_path()
+    if caminho:
+        df, total = user_directory.pesquisar_usuarios(caminho, busca, por_pagina, deslocamento)
+        df = df.rename(columns=user_directory.COLUNAS_EXIBICAO)
+    else:
+        termo = busca.strip().lower()
+        encontrados = [
+            user for email, user in get_user_index().items()
+            if termo in email or termo in str(user.get("name") or "").lower()
+        ]
+        encontrados.sort(key=lambda user: (str(user.get("name") or "").lower(), user.get("email", "")))
+        total = len(encontrados)
+        df = pd.DataFrame(
+            [[user.get("name", "N/A"), user.get("email", "N/A"), user["role"]] for user in encontrados[deslocamento:deslocamento + por_pagina]],
+            columns=COLUNAS_USUARIOS
+        )
+    df["Função"] = df["Função"].fillna("user").str.capitalize()
+    df["Nome"] = df["Nome"].fillna("N/A")
+    return df, total
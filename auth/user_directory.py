@@ -0,0 +1,153 @@
+"""
+Diretório de usuários autorizados em SQLite (alternativa ao secrets.toml).
+
+O banco pode ser editado com a aplicação em execução (pela página de
+administração, por esta ferramenta ou por qualquer cliente SQLite): triggers
+incrementam um contador de versão a cada alteração, que as sessões consultam
+para descartar o que memorizaram.
+
+Importação de usuários a partir de um CSV (colunas email, name, role):
+    python -m auth.user_directory usuarios.db --importar usuarios.csv
+"""
+import argparse
+import contextlib
+import csv
+import sqlite3
+import threading
+
+import pandas as pd
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    email TEXT PRIMARY KEY COLLATE NOCASE,
+    name TEXT,
+    role TEXT NOT NULL DEFAULT 'user'
+);
+CREATE INDEX IF NOT EXISTS idx_usuarios_nome ON usuarios (name COLLATE NOCASE);
+-- Bancos criados antes do COLLATE NOCASE na chave: as buscas por e-mail também usam este índice
+CREATE INDEX IF NOT EXISTS idx_usuarios_email_nocase ON usuarios (email COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS versao (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versao (id, valor) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS usuarios_versao_insert AFTER INSERT ON usuarios
+BEGIN UPDATE versao SET valor = valor + 1 WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS usuarios_versao_update AFTER UPDATE ON usuarios
+BEGIN UPDATE versao SET valor = valor + 1 WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS usuarios_versao_delete AFTER DELETE ON usuarios
+BEGIN UPDATE versao SET valor = valor + 1 WHERE id = 1; END;
+"""
+
+COLUNAS_EXIBICAO = {"name": "Nome", "email": "E-mail", "role": "Função"}
+
+_inicializados = set()
+_lock = threading.Lock()
+
+
+def _normalizar_email(email) -> str:
+    return str(email or "").strip().lower()
+
+
+@contextlib.contextmanager
+def conectar(caminho: str):
+    """Abre uma conexão em transação (criando o esquema na primeira vez) e a fecha ao final."""
+    conexao = sqlite3.connect(caminho, timeout=10)
+    conexao.row_factory = sqlite3.Row
+    try:
+        with _lock:
+            if caminho not in _inicializados:
+                conexao.executescript(ESQUEMA)
+                _inicializados.add(caminho)
+        with conexao:
+            yield conexao
+    finally:
+        conexao.close()
+
+
+def versao(caminho: str) -> int:
+    """Contador de alterações do diretório (muda a cada inserção, edição ou remoção)."""
+    with conectar(caminho) as conexao:
+        return conexao.execute("SELECT valor FROM versao WHERE id = 1").fetchone()[0]
+
+
+def buscar_usuario(caminho: str, email: str) -> dict | None:
+    """Busca um usuário pelo e-mail, sem diferenciar maiúsculas (consulta indexada)."""
+    with conectar(caminho) as conexao:
+        linha = conexao.execute(
+            "SELECT email, name, role FROM usuarios WHERE email = ? COLLATE NOCASE", (_normalizar_email(email),)
+        ).fetchone()
+    if linha is None:
+        return None
+    return {**dict(linha), "display_name": linha["name"] or None}
+
+
+def pesquisar_usuarios(caminho: str, busca: str = "", limite: int = 50, deslocamento: int = 0) -> tuple[pd.DataFrame, int]:
+    """
+    Retorna uma página de usuários cujo nome ou e-mail contém `busca`, e o total encontrado.
+
+    Filtro, ordenação e paginação são feitos pelo SQLite.
+    """
+    padrao = "%" + busca.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    filtro = "WHERE email LIKE :padrao ESCAPE '\\' OR name LIKE :padrao ESCAPE '\\'"
+    parametros = {"padrao": padrao, "limite": limite, "deslocamento": deslocamento}
+    with conectar(caminho) as conexao:
+        total = conexao.execute(f"SELECT COUNT(*) FROM usuarios {filtro}", parametros).fetchone()[0]
+        linhas = conexao.execute(
+            f"SELECT name, email, role FROM usuarios {filtro} "
+            "ORDER BY name COLLATE NOCASE, email LIMIT :limite OFFSET :deslocamento",
+            parametros,
+        ).fetchall()
+    df = pd.DataFrame([dict(linha) for linha in linhas], columns=list(COLUNAS_EXIBICAO))
+    return df, total
+
+
+def salvar_usuario(caminho: str, email: str, name: str | None = None, role: str = "user"):
+    """Insere ou atualiza um usuário."""
+    with conectar(caminho) as conexao:
+        conexao.execute(
+            "INSERT INTO usuarios (email, name, role) VALUES (?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET name = excluded.name, role = excluded.role",
+            (_normalizar_email(email), name or None, role or "user"),
+        )
+
+
+def remover_usuario(caminho: str, email: str) -> bool:
+    """Remove um usuário; retorna se ele existia."""
+    with conectar(caminho) as conexao:
+        return conexao.execute("DELETE FROM usuarios WHERE email = ? COLLATE NOCASE", (_normalizar_email(email),)).rowcount > 0
+
+
+def importar_usuarios(caminho: str, usuarios) -> int:
+    """Insere ou atualiza vários usuários (dicionários com email, name e role) em uma transação."""
+    registros = [
+        (_normalizar_email(u.get("email")), u.get("name") or None, u.get("role") or "user")
+        for u in usuarios if _normalizar_email(u.get("email"))
+    ]
+    with conectar(caminho) as conexao:
+        conexao.executemany(
+            "INSERT INTO usuarios (email, name, role) VALUES (?, ?, ?) "
+            "ON CONFLICT (email) DO UPDATE SET name = excluded.name, role = excluded.role",
+            registros,
+        )
+    return len(registros)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diretório de usuários autorizados (SQLite).")
+    parser.add_argument("banco", help="Caminho do arquivo SQLite.")
+    parser.add_argument("--importar", metavar="CSV", help="CSV com as colunas email, name e role.")
+    args = parser.parse_args(argv)
+
+    if args.importar:
+        with open(args.importar, newline="", encoding="utf-8-sig") as f:
+            quantidade = importar_usuarios(args.banco, csv.DictReader(f))
+        print(f"{quantidade} usuários importados.")
+    _, total = pesquisar_usuarios(args.banco, limite=0)
+    print(f"{total} usuários no diretório (versão {versao(args.banco)}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Gerador de exportações sintéticas de presença do Microsoft Teams (CSV, XLSX e PDF)
+para medir os caminhos críticos da aplicação com volumes controlados.
+"""
+import io
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+PRIMEIROS_NOMES = ["João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Luíza", "Paulo", "Márcia",
+                   "Pedro", "Adriana", "Lucas", "Juliana", "Mateus", "Fernanda", "Gabriel", "Patrícia", "Rafael", "Aline"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Conceição", "Ribeiro", "Carvalho", "Araújo", "Melo", "Barbosa", "Simões", "Castro", "Assunção", "Mendonça"]
+
+
+def gerar_nomes(quantidade: int, rng: random.Random) -> list:
+    """Gera nomes completos distintos, com acentos, para os participantes."""
+    nomes = []
+    for i in range(quantidade):
+        nome = f"{rng.choice(PRIMEIROS_NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        nomes.append(f"{nome} {i + 1}" if quantidade > 200 else nome)
+    # Garante nomes únicos mesmo em turmas pequenas
+    vistos = {}
+    for i, nome in enumerate(nomes):
+        vistos[nome] = vistos.get(nome, 0) + 1
+        if vistos[nome] > 1:
+            nomes[i] = f"{nome} {vistos[nome]}"
+    return nomes
+
+
+def gerar_sessoes(participantes: int, dias: int = 1, rejoins: float = 1.0, inicio: datetime = datetime(2025, 10, 13, 9, 0),
+                  duracao_minutos: int = 240, seed: int = 42) -> pd.DataFrame:
+    """
+    Gera as sessões (entrada/saída) de cada participante em cada dia.
+
+    `rejoins` é a média de saídas e reentradas por participante e por dia
+    (quedas de conexão, troca de dispositivo etc.).
+    """
+    rng = random.Random(seed)
+    nomes = gerar_nomes(participantes, rng)
+    sessoes = []
+    for dia in range(dias):
+        inicio_dia = inicio + timedelta(days=dia)
+        fim_dia = inicio_dia + timedelta(minutes=duracao_minutos)
+        for nome in nomes:
+            if rng.random() < 0.05:
+                continue  # Ausente no dia
+            entrada = inicio_dia + timedelta(minutes=rng.gauss(0, 6) + (rng.random() < 0.1) * rng.uniform(10, 60))
+            saida_final = fim_dia + timedelta(minutes=rng.gauss(0, 5) - (rng.random() < 0.1) * rng.uniform(30, 150))
+            quedas = sorted(
+                entrada + (saida_final - entrada) * rng.random()
+                for _ in range(int(rng.expovariate(1 / rejoins)) if rejoins > 0 else 0)
+            )
+            atual = entrada
+            for queda in quedas:
+                if queda > atual:
+                    sessoes.append((nome, atual, queda))
+                    atual = queda + timedelta(minutes=rng.uniform(0.5, 8))
+            if saida_final > atual:
+                sessoes.append((nome, atual, saida_final))
+    return pd.DataFrame(sessoes, columns=["nome", "entrada", "saida"])
+
+
+def participantes_para_linhas(linhas: int, rejoins: float = 1.0, dias: int = 1) -> int:
+    """Estima quantos participantes produzem aproximadamente `linhas` linhas de atividade."""
+    return max(1, round(linhas / ((1 + rejoins) * dias)))
+
+
+def _linhas_exportacao(sessoes: pd.DataFrame, idioma: str) -> list:
+    """Monta as linhas da exportação no layout do Teams (resumo, participantes e atividades)."""
+    if idioma == "en":
+        formato = "%m/%d/%Y, %I:%M:%S %p"
+        titulos = ["1. Summary", "2. Participants", "3. In-Meeting Activities"]
+        rotulos_resumo = ["Meeting title", "Attended participants", "Start time"]
+        cabecalho_participantes = ["Name", "First Join", "Last Leave", "In-Meeting Duration", "Email", "Role"]
+        cabecalho_atividades = ["Full Name", "User Action", "Timestamp"]
+        eventos = pd.concat([
+            pd.DataFrame({"nome": sessoes["nome"], "acao": "Joined", "ts": sessoes["entrada"]}),
+            pd.DataFrame({"nome": sessoes["nome"], "acao": "Left", "ts": sessoes["saida"]}),
+        ]).sort_values("ts", kind="stable")
+        atividades = [[n, a, t.strftime(formato)] for n, a, t in zip(eventos["nome"], eventos["acao"], eventos["ts"])]
+    else:
+        formato = "%d/%m/%Y %H:%M:%S"
+        titulos = ["1. Resumo", "2. Participantes", "3. Atividades em Reunião"]
+        rotulos_resumo = ["Título da reunião", "Participantes presentes", "Horário de início"]
+        cabecalho_participantes = ["Nome", "Primeira entrada", "Última saída", "Duração na reunião", "Email", "Função"]
+        cabecalho_atividades = ["Nome", "Hora de entrada", "Hora de saída", "Duração", "Email", "Função"]
+        atividades = [
+            [n, e.strftime(formato), s.strftime(formato), f"{int((s - e).total_seconds() // 60)} min",
+             f"participante{i}@empresa.com.br", "Participante"]
+            for i, (n, e, s) in enumerate(zip(sessoes["nome"], sessoes["entrada"], sessoes["saida"]))
+        ]
+
+    # O resumo de participantes cobre da primeira entrada à última saída, como no Teams
+    resumo = sessoes.groupby("nome", sort=False).agg(entrada=("entrada", "min"), saida=("saida", "max"))
+    participantes = [
+        [n, e.strftime(formato), s.strftime(formato), f"{int((s - e).total_seconds() // 60)} min",
+         f"participante{i}@empresa.com.br", "Participante"]
+        for i, (n, e, s) in enumerate(zip(resumo.index, resumo["entrada"], resumo["saida"]))
+    ]
+
+    primeira = sessoes["entrada"].min() if not sessoes.empty else datetime.now()
+    return [
+        [titulos[0]],
+        [rotulos_resumo[0], "Treinamento NR-35 Trabalho em Altura"],
+        [rotulos_resumo[1], str(sessoes["nome"].nunique())],
+        [rotulos_resumo[2], primeira.strftime(formato)],
+        [],
+        [titulos[1]],
+        cabecalho_participantes,
+    ] + participantes + [
+        [],
+        [titulos[2]],
+        cabecalho_atividades,
+    ] + atividades
+
+
+def exportar_csv(sessoes: pd.DataFrame, idioma: str = "pt", encoding: str = "utf-16") -> bytes:
+    """Gera o CSV (separado por tabulação, como o Teams) na codificação pedida."""
+    texto = "\n".join("\t".join(linha) for linha in _linhas_exportacao(sessoes, idioma)) + "\n"
+    return texto.encode(encoding, errors="replace")
+
+
+def exportar_xlsx(sessoes: pd.DataFrame, idioma: str = "pt") -> bytes:
+    """Gera a planilha XLSX com o mesmo conteúdo do CSV."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet("Relatório de Presença")
+    for linha in _linhas_exportacao(sessoes, idioma):
+        planilha.append(linha)
+    saida = io.BytesIO()
+    workbook.save(saida)
+    return saida.getvalue()
+
+
+def exportar_pdf(sessoes: pd.DataFrame, idioma: str = "pt") -> bytes:
+    """Gera um PDF com camada de texto, semelhante à impressão do relatório do Teams."""
+    from html import escape
+
+    from weasyprint import HTML
+
+    linhas = _linhas_exportacao(sessoes, idioma)
+    corpo = "".join(
+        "<tr>" + "".join(f"<td>{escape(celula)}</td>" for celula in linha) + "</tr>" for linha in linhas
+    )
+    documento = f"<html><head><meta charset='UTF-8'></head><body><table>{corpo}</table></body></html>"
+    return HTML(string=documento).write_pdf()
@@ -0,0 +1,170 @@
+"""
+Suíte de benchmarks dos caminhos críticos da calculadora.
+
+Uso:
+    python -m benchmarks.run --tamanhos 10 1000 100000 --saida resultados.json
+    python -m benchmarks.run --comparar benchmarks/resultados/anterior.json
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, time as dt_time
+
+import pandas as pd
+
+from benchmarks import gerador
+from end import calculos
+from end.presenca import calcular_presenca
+from utils import teams_parser
+
+TAMANHOS_PADRAO = [10, 100, 1_000, 10_000, 100_000]
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Logo embutida (PNG 1x1) usada por padrão: o benchmark roda sem rede e com tempos repetíveis
+LOGO_OFFLINE = (
+    "data:image/png;base64,"
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+def medir(funcao, repeticoes: int) -> dict:
+    """Executa a função `repeticoes` vezes e retorna os tempos mínimo e mediano (segundos)."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {"min_s": min(tempos), "mediana_s": statistics.median(tempos), "repeticoes": repeticoes}
+
+
+def _colaboradores(quantidade: int) -> list:
+    """Gera a lista de colaboradores no formato de st.session_state.colaboradores."""
+    return [
+        {"nome": f"Colaborador {i}", "check_ins_pontuais": i % 3, "interacoes": i % 5, "acertos": i % 11, "frequencia": i % 7 != 0}
+        for i in range(quantidade)
+    ]
+
+
+def executar(tamanhos: list, repeticoes: int, rejoins: float, dias: int, max_linhas_pdf: int, logo_online: bool = False) -> list:
+    """
+    Executa todas as etapas para cada tamanho e retorna a lista de medições.
+
+    O relatório usa a logo embutida; com `logo_online`, a logo da aplicação é
+    baixada uma única vez, antes das medições.
+    """
+    try:
+        from utils.pdf_generator import LOGO_URL, _render_report_bytes, create_professional_html, get_logo_base64
+    except (ImportError, OSError) as e:
+        logging.warning(f"[Benchmark] Geração de PDF indisponível neste ambiente ({e}). Etapas de relatório ignoradas.")
+        create_professional_html = _render_report_bytes = None
+    else:
+        logo_base64 = (get_logo_base64(LOGO_URL) if logo_online else None) or LOGO_OFFLINE
+
+    resultados = []
+
+    def registrar(etapa: str, tamanho: int, funcao, **extras):
+        medicao = medir(funcao, repeticoes)
+        resultados.append({"etapa": etapa, "tamanho": tamanho, **extras, **medicao})
+        print(f"{etapa:<28} {tamanho:>8} linhas  min={medicao['min_s'] * 1000:10.2f} ms  mediana={medicao['mediana_s'] * 1000:10.2f} ms")
+
+    for tamanho in tamanhos:
+        participantes = gerador.participantes_para_linhas(tamanho, rejoins, dias)
+        sessoes = gerador.gerar_sessoes(participantes, dias=dias, rejoins=rejoins)
+
+        # --- Ingestão (etapa de leitura de processar_arquivo_com_ia) ---
+        entradas = {
+            "ingestao_csv_utf16": (gerador.exportar_csv(sessoes, "pt", "utf-16"), "text/csv"),
+            "ingestao_csv_latin1_en": (gerador.exportar_csv(sessoes, "en", "latin-1"), "text/csv"),
+            "ingestao_xlsx": (gerador.exportar_xlsx(sessoes, "pt"), TIPO_XLSX),
+        }
+        if _render_report_bytes is not None and tamanho <= max_linhas_pdf:
+            entradas["ingestao_pdf_en"] = (gerador.exportar_pdf(sessoes, "en"), teams_parser.TIPO_PDF)
+        eventos = None
+        for etapa, (conteudo, mime_type) in entradas.items():
+            registrar(etapa, tamanho, lambda: teams_parser.ler_exportacao(io.BytesIO(conteudo), mime_type), bytes=len(conteudo))
+            if eventos is None:
+                eventos, _ = teams_parser.ler_exportacao(io.BytesIO(conteudo), mime_type)
+
+        # --- Cálculo de presença ---
+        registrar("presenca", len(eventos), lambda: calcular_presenca(eventos, dt_time(9, 0), 240, 60, 2))
+
+        # --- Notas ---
+        colaboradores = _colaboradores(tamanho)
+        registrar("calculos_lista", tamanho, lambda: calculos.processar_dados_colaboradores(colaboradores, 4, 2))
+        df_colaboradores = pd.DataFrame(colaboradores)
+        registrar("calculos_lote", tamanho, lambda: calculos.calcular_notas_em_lote(df_colaboradores, 4, 2))
+
+        # --- Relatório ---
+        if create_professional_html is None:
+            continue
+        resultados_df = calculos.calcular_notas_em_lote(df_colaboradores, 4, 2)
+        registrar("create_professional_html", tamanho, lambda: create_professional_html(resultados_df, None, "Benchmark"))
+        if tamanho <= max_linhas_pdf:
+            _render_report_bytes(resultados_df.head(1), logo_base64, "Aquecimento")  # Estilos fora da medição
+            registrar("generate_pdf_report", tamanho, lambda: _render_report_bytes(resultados_df, logo_base64, "Benchmark"))
+
+    return resultados
+
+
+def _commit_atual() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(atual: list, anterior_path: str):
+    """Imprime a variação da mediana de cada etapa em relação a uma execução anterior."""
+    with open(anterior_path, "r", encoding="utf-8") as f:
+        anterior = {(r["etapa"], r["tamanho"]): r for r in json.load(f)["resultados"]}
+    print(f"\nComparação com {anterior_path}:")
+    for r in atual:
+        base = anterior.get((r["etapa"], r["tamanho"]))
+        if base and base["mediana_s"] > 0:
+            razao = r["mediana_s"] / base["mediana_s"]
+            alerta = "  <-- regressão" if razao > 1.2 else ""
+            print(f"{r['etapa']:<28} {r['tamanho']:>8}  {razao:6.2f}x{alerta}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da Calculadora de Notas de Treinamento.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Números de linhas a medir.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--rejoins", type=float, default=1.0, help="Média de reentradas por participante e por dia.")
+    parser.add_argument("--dias", type=int, default=1)
+    parser.add_argument("--max-linhas-pdf", type=int, default=2_000, help="Maior tamanho para o qual o PDF é renderizado.")
+    parser.add_argument("--logo-online", action="store_true", help="Baixa a logo da aplicação em vez de usar a embutida (requer rede).")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON de saída (padrão: benchmarks/resultados/<data>.json).")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior para comparar.")
+    args = parser.parse_args(argv)
+
+    resultados = executar(args.tamanhos, args.repeticoes, args.rejoins, args.dias, args.max_linhas_pdf, args.logo_online)
+
+    saida = args.saida or os.path.join("benchmarks", "resultados", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "commit": _commit_atual(),
+                "python": sys.version.split()[0],
+                "pandas": pd.__version__,
+                "plataforma": platform.platform(),
+                "parametros": vars(args),
+            },
+            "resultados": resultados,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em {saida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
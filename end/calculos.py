@@ -1,3 +1,6 @@
+import numpy as np
+import pandas as pd
+
 def calcular_nota_pontualidade(check_ins_pontuais: int, total_check_ins: int) -> float:
     """Calcula a nota de pontualidade com base no número de check-ins."""
     if total_check_ins == 0:
@@ -23,41 +26,77 @@ def determinar_status(nota_final: float, frequencia_ok: bool) -> str:
     else:
         return "Reprovado por Nota"
 
+# Colunas de entrada (mesmas chaves usadas em st.session_state.colaboradores)
+COLUNAS_ENTRADA = ['nome', 'check_ins_pontuais', 'interacoes', 'acertos', 'frequencia']
+
+def calcular_notas_em_lote(colaboradores: pd.DataFrame, total_oportunidades: int, total_check_ins: int) -> pd.DataFrame:
+    """
+    Calcula as notas e o status de todos os colaboradores de uma vez, por coluna.
+
+    Recebe um DataFrame com as colunas de COLUNAS_ENTRADA e retorna um DataFrame
+    apenas com valores numéricos/booleanos; os textos de exibição (ex: "3/4")
+    são gerados por `formatar_resultados` no momento da renderização.
+    """
+    dados = colaboradores.reindex(columns=COLUNAS_ENTRADA)
+    nomes = dados['nome'].fillna('').astype(str)
+    dados = dados[nomes.str.len() > 0]
+
+    check_ins_pontuais = pd.to_numeric(dados['check_ins_pontuais'], errors='coerce').fillna(0).to_numpy()
+    interacoes = pd.to_numeric(dados['interacoes'], errors='coerce').fillna(0).to_numpy()
+    acertos = pd.to_numeric(dados['acertos'], errors='coerce').fillna(0).to_numpy()
+    frequencia_ok = dados['frequencia'].fillna(False).astype(bool).to_numpy()
+
+    # As funções escalares também aceitam arrays, pois os totais são escalares
+    nota_p = np.broadcast_to(calcular_nota_pontualidade(check_ins_pontuais, total_check_ins), check_ins_pontuais.shape)
+    nota_i = np.broadcast_to(calcular_nota_interacao(interacoes, total_oportunidades), interacoes.shape)
+    nota_a = calcular_nota_avaliacao(acertos)
+    nota_final = nota_p + nota_i + nota_a
+
+    status = np.select(
+        [~frequencia_ok, nota_final >= 7.0],
+        ["Reprovado por Frequência", "Aprovado"],
+        default="Reprovado por Nota"
+    )
+
+    return pd.DataFrame({
+        "Colaborador": dados['nome'].to_numpy(),
+        "Check-ins Pontuais": check_ins_pontuais.astype(int),
+        "Total Check-ins": total_check_ins,
+        "Interações Válidas": interacoes.astype(int),
+        "Total Oportunidades": total_oportunidades,
+        "Acertos na Prova": acertos.astype(int),
+        "Nota Pontualidade": nota_p.astype(float),
+        "Nota Interação": nota_i.astype(float),
+        "Nota Avaliação": nota_a.astype(float),
+        "Nota Final": nota_final.astype(float),
+        "Frequência OK?": frequencia_ok,
+        "Status": status
+    })
+
+def formatar_resultados(resultados: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gera as colunas de exibição ("3/4", "Sim"/"Não") a partir dos resultados numéricos.
+
+    Resultados já formatados (sem as colunas de totais) são retornados sem alteração.
+    """
+    if "Total Check-ins" not in resultados.columns:
+        return resultados
+
+    formatado = resultados.drop(columns=["Total Check-ins", "Total Oportunidades"])
+    formatado["Check-ins Pontuais"] = resultados["Check-ins Pontuais"].astype(str) + "/" + resultados["Total Check-ins"].astype(str)
+    formatado["Interações Válidas"] = resultados["Interações Válidas"].astype(str) + "/" + resultados["Total Oportunidades"].astype(str)
+    formatado["Acertos na Prova"] = resultados["Acertos na Prova"].astype(str) + "/10"
+    formatado["Frequência OK?"] = np.where(resultados["Frequência OK?"], "Sim", "Não")
+    return formatado
+
 def processar_dados_colaboradores(colaboradores: list, total_oportunidades: int, total_check_ins: int) -> list:
     """
     Recebe a lista de dados brutos dos colaboradores e retorna uma lista
     de dicionários com todos os cálculos e dados para o relatório.
+
+    Mantida por compatibilidade: delega para `calcular_notas_em_lote`.
     """
-    resultados = []
-    for colab in colaboradores:
-        if not colab.get('nome'):
-            continue
-
-        # Dados brutos
-        check_ins_pontuais = colab.get('check_ins_pontuais', 0)
-        interacoes = colab.get('interacoes', 0)
-        acertos = colab.get('acertos', 0)
-        frequencia_ok = colab.get('frequencia', False)
-
-        # Cálculos das notas
-        nota_p = calcular_nota_pontualidade(check_ins_pontuais, total_check_ins)
-        nota_i = calcular_nota_interacao(interacoes, total_oportunidades)
-        nota_a = calcular_nota_avaliacao(acertos)
-        
-        nota_final = nota_p + nota_i + nota_a
-        status = determinar_status(nota_final, frequencia_ok)
-
-        resultados.append({
-            # Dados para o relatório
-            "Colaborador": colab.get('nome'),
-            "Check-ins Pontuais": f"{check_ins_pontuais}/{total_check_ins}",
-            "Interações Válidas": f"{interacoes}/{total_oportunidades}",
-            "Acertos na Prova": f"{acertos}/10",
-            "Nota Pontualidade": nota_p,
-            "Nota Interação": nota_i,
-            "Nota Avaliação": nota_a,
-            "Nota Final": nota_final,
-            "Frequência OK?": "Sim" if frequencia_ok else "Não",
-            "Status": status
-        })
-    return resultados
+    if not colaboradores:
+        return []
+    resultados = calcular_notas_em_lote(pd.DataFrame(colaboradores), total_oportunidades, total_check_ins)
+    return formatar_resultados(resultados).to_dict('records')
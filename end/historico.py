@@ -0,0 +1,260 @@
+"""
+Histórico persistente dos treinamentos finalizados, em SQLite.
+
+Cada treinamento registra seus metadados e os resultados numéricos de cada
+colaborador. A tabela `agregados` guarda os totais por título, mês e instrutor
+e é mantida por triggers a cada inclusão ou remoção de treinamento, para que
+os painéis consultem os totais prontos em vez de varrer os resultados.
+"""
+import contextlib
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+CAMINHO_PADRAO = os.getenv('CALC_HISTORY_DB', os.path.join(os.path.expanduser('~'), '.local', 'share', 'calc_train_ia', 'historico.db'))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS treinamentos (
+    id INTEGER PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    instrutor TEXT NOT NULL,
+    instrutor_nome TEXT,
+    data TEXT NOT NULL,
+    mes TEXT NOT NULL,
+    total_check_ins INTEGER NOT NULL,
+    total_oportunidades INTEGER NOT NULL,
+    participantes INTEGER NOT NULL,
+    aprovados INTEGER NOT NULL,
+    reprovados_nota INTEGER NOT NULL,
+    reprovados_frequencia INTEGER NOT NULL,
+    soma_notas REAL NOT NULL,
+    registrado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_treinamentos_data ON treinamentos (data);
+
+CREATE TABLE IF NOT EXISTS resultados (
+    treinamento_id INTEGER NOT NULL REFERENCES treinamentos (id) ON DELETE CASCADE,
+    colaborador TEXT NOT NULL,
+    check_ins_pontuais INTEGER NOT NULL,
+    interacoes INTEGER NOT NULL,
+    acertos INTEGER NOT NULL,
+    nota_pontualidade REAL NOT NULL,
+    nota_interacao REAL NOT NULL,
+    nota_avaliacao REAL NOT NULL,
+    nota_final REAL NOT NULL,
+    frequencia_ok INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resultados_treinamento ON resultados (treinamento_id);
+
+CREATE TABLE IF NOT EXISTS agregados (
+    titulo TEXT NOT NULL,
+    mes TEXT NOT NULL,
+    instrutor TEXT NOT NULL,
+    treinamentos INTEGER NOT NULL DEFAULT 0,
+    participantes INTEGER NOT NULL DEFAULT 0,
+    aprovados INTEGER NOT NULL DEFAULT 0,
+    reprovados_nota INTEGER NOT NULL DEFAULT 0,
+    reprovados_frequencia INTEGER NOT NULL DEFAULT 0,
+    soma_notas REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (titulo, mes, instrutor)
+);
+
+CREATE TRIGGER IF NOT EXISTS agregados_insert AFTER INSERT ON treinamentos
+BEGIN
+    INSERT INTO agregados (titulo, mes, instrutor, treinamentos, participantes, aprovados, reprovados_nota, reprovados_frequencia, soma_notas)
+    VALUES (NEW.titulo, NEW.mes, NEW.instrutor, 1, NEW.participantes, NEW.aprovados, NEW.reprovados_nota, NEW.reprovados_frequencia, NEW.soma_notas)
+    ON CONFLICT (titulo, mes, instrutor) DO UPDATE SET
+        treinamentos = treinamentos + 1,
+        participantes = participantes + excluded.participantes,
+        aprovados = aprovados + excluded.aprovados,
+        reprovados_nota = reprovados_nota + excluded.reprovados_nota,
+        reprovados_frequencia = reprovados_frequencia + excluded.reprovados_frequencia,
+        soma_notas = soma_notas + excluded.soma_notas;
+END;
+
+CREATE TRIGGER IF NOT EXISTS agregados_delete AFTER DELETE ON treinamentos
+BEGIN
+    UPDATE agregados SET
+        treinamentos = treinamentos - 1,
+        participantes = participantes - OLD.participantes,
+        aprovados = aprovados - OLD.aprovados,
+        reprovados_nota = reprovados_nota - OLD.reprovados_nota,
+        reprovados_frequencia = reprovados_frequencia - OLD.reprovados_frequencia,
+        soma_notas = soma_notas - OLD.soma_notas
+    WHERE titulo = OLD.titulo AND mes = OLD.mes AND instrutor = OLD.instrutor;
+    DELETE FROM agregados
+    WHERE titulo = OLD.titulo AND mes = OLD.mes AND instrutor = OLD.instrutor AND treinamentos <= 0;
+END;
+"""
+
+# Dimensões em que os agregados podem ser consultados (rótulo de exibição -> coluna)
+DIMENSOES = {"Título": "titulo", "Mês": "mes", "Instrutor": "instrutor"}
+
+_COLUNAS_RESULTADOS = {
+    "Colaborador": "colaborador",
+    "Check-ins Pontuais": "check_ins_pontuais",
+    "Interações Válidas": "interacoes",
+    "Acertos na Prova": "acertos",
+    "Nota Pontualidade": "nota_pontualidade",
+    "Nota Interação": "nota_interacao",
+    "Nota Avaliação": "nota_avaliacao",
+    "Nota Final": "nota_final",
+    "Frequência OK?": "frequencia_ok",
+    "Status": "status",
+}
+
+# Ordem das colunas de `calculos.calcular_notas_em_lote`
+COLUNAS_CALCULO = [
+    "Colaborador", "Check-ins Pontuais", "Total Check-ins", "Interações Válidas", "Total Oportunidades",
+    "Acertos na Prova", "Nota Pontualidade", "Nota Interação", "Nota Avaliação", "Nota Final",
+    "Frequência OK?", "Status",
+]
+
+_inicializados = set()
+_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def conectar(caminho: str = CAMINHO_PADRAO):
+    """Abre uma conexão em transação (criando a pasta e o esquema na primeira vez) e a fecha ao final."""
+    with _lock:
+        if caminho not in _inicializados:
+            os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    conexao = sqlite3.connect(caminho, timeout=10)
+    conexao.execute("PRAGMA foreign_keys = ON")
+    try:
+        with _lock:
+            if caminho not in _inicializados:
+                conexao.executescript(ESQUEMA)
+                _inicializados.add(caminho)
+        with conexao:
+            yield conexao
+    finally:
+        conexao.close()
+
+
+def registrar_treinamento(resultados: pd.DataFrame, titulo: str, instrutor: str, total_check_ins: int,
+                          total_oportunidades: int, instrutor_nome: str | None = None, data: date | None = None,
+                          substituir_id: int | None = None, caminho: str = CAMINHO_PADRAO) -> int:
+    """
+    Grava um treinamento finalizado e os resultados de `calculos.calcular_notas_em_lote`.
+
+    Os totais do treinamento são calculados aqui, uma única vez; os agregados
+    são atualizados pelos triggers na mesma transação. Com `substituir_id`, o
+    registro anterior (ex: um recálculo do mesmo treinamento) é removido antes.
+    Retorna o id do treinamento gravado.
+    """
+    data = data or date.today()
+    status = resultados["Status"].to_numpy()
+    notas = resultados["Nota Final"].to_numpy(dtype=float)
+    linhas = resultados.reindex(columns=list(_COLUNAS_RESULTADOS)).copy()
+    linhas["Frequência OK?"] = linhas["Frequência OK?"].astype(bool).astype(int)
+
+    with conectar(caminho) as conexao:
+        if substituir_id is not None:
+            conexao.execute("DELETE FROM treinamentos WHERE id = ?", (substituir_id,))
+        cursor = conexao.execute(
+            "INSERT INTO treinamentos (titulo, instrutor, instrutor_nome, data, mes, total_check_ins, total_oportunidades, "
+            "participantes, aprovados, reprovados_nota, reprovados_frequencia, soma_notas, registrado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                titulo, instrutor, instrutor_nome, data.isoformat(), data.strftime("%Y-%m"),
+                int(total_check_ins), int(total_oportunidades), len(resultados),
+                int(np.count_nonzero(status == "Aprovado")),
+                int(np.count_nonzero(status == "Reprovado por Nota")),
+                int(np.count_nonzero(status == "Reprovado por Frequência")),
+                float(notas.sum()), datetime.now().isoformat(timespec="seconds"),
+            ),
+        )
+        treinamento_id = cursor.lastrowid
+        conexao.executemany(
+            f"INSERT INTO resultados (treinamento_id, {', '.join(_COLUNAS_RESULTADOS.values())}) "
+            f"VALUES ({', '.join('?' * (len(_COLUNAS_RESULTADOS) + 1))})",
+            ((treinamento_id, *linha) for linha in linhas.itertuples(index=False, name=None)),
+        )
+    return treinamento_id
+
+
+def remover_treinamento(treinamento_id: int, caminho: str = CAMINHO_PADRAO) -> bool:
+    """Remove um treinamento e seus resultados; retorna se ele existia."""
+    with conectar(caminho) as conexao:
+        return conexao.execute("DELETE FROM treinamentos WHERE id = ?", (treinamento_id,)).rowcount > 0
+
+
+def _filtros(titulo=None, instrutor=None, mes_inicio=None, mes_fim=None) -> tuple[str, list]:
+    condicoes, parametros = [], []
+    for condicao, valor in (("titulo = ?", titulo), ("instrutor = ?", instrutor), ("mes >= ?", mes_inicio), ("mes <= ?", mes_fim)):
+        if valor:
+            condicoes.append(condicao)
+            parametros.append(valor)
+    return ("WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+
+def consultar_agregados(dimensao: str, titulo: str | None = None, instrutor: str | None = None,
+                        mes_inicio: str | None = None, mes_fim: str | None = None,
+                        caminho: str = CAMINHO_PADRAO) -> pd.DataFrame:
+    """
+    Totais por `dimensao` ('titulo', 'mes' ou 'instrutor') a partir dos agregados,
+    com taxa de aprovação, nota média e reprovações por nota e por frequência.
+    """
+    if dimensao not in DIMENSOES.values():
+        raise ValueError(f"Dimensão inválida: {dimensao}")
+    filtro, parametros = _filtros(titulo, instrutor, mes_inicio, mes_fim)
+    with conectar(caminho) as conexao:
+        df = pd.read_sql_query(
+            f"SELECT {dimensao}, SUM(treinamentos) AS treinamentos, SUM(participantes) AS participantes, "
+            "SUM(aprovados) AS aprovados, SUM(reprovados_nota) AS reprovados_nota, "
+            "SUM(reprovados_frequencia) AS reprovados_frequencia, SUM(soma_notas) AS soma_notas "
+            f"FROM agregados {filtro} GROUP BY {dimensao} ORDER BY {dimensao}",
+            conexao, params=parametros,
+        )
+    participantes = df["participantes"].replace(0, np.nan)
+    df["taxa_aprovacao"] = (df["aprovados"] / participantes).fillna(0.0)
+    df["nota_media"] = (df.pop("soma_notas") / participantes).fillna(0.0)
+    return df
+
+
+def listar_valores(dimensao: str, instrutor: str | None = None, caminho: str = CAMINHO_PADRAO) -> list:
+    """Valores distintos de uma dimensão, para os filtros do painel (só do `instrutor`, se informado)."""
+    if dimensao not in DIMENSOES.values():
+        raise ValueError(f"Dimensão inválida: {dimensao}")
+    filtro, parametros = _filtros(instrutor=instrutor)
+    with conectar(caminho) as conexao:
+        return [linha[0] for linha in conexao.execute(
+            f"SELECT DISTINCT {dimensao} FROM agregados {filtro} ORDER BY {dimensao}", parametros
+        )]
+
+
+def listar_treinamentos(titulo: str | None = None, instrutor: str | None = None, mes_inicio: str | None = None,
+                        mes_fim: str | None = None, limite: int = 50, caminho: str = CAMINHO_PADRAO) -> pd.DataFrame:
+    """Treinamentos mais recentes que atendem aos filtros (sem os resultados individuais)."""
+    filtro, parametros = _filtros(titulo, instrutor, mes_inicio, mes_fim)
+    with conectar(caminho) as conexao:
+        return pd.read_sql_query(
+            "SELECT id, data, titulo, instrutor, instrutor_nome, participantes, aprovados, "
+            f"reprovados_nota, reprovados_frequencia FROM treinamentos {filtro} "
+            "ORDER BY data DESC, id DESC LIMIT ?",
+            conexao, params=[*parametros, limite],
+        )
+
+
+def carregar_resultados(treinamento_id: int, caminho: str = CAMINHO_PADRAO) -> pd.DataFrame:
+    """Resultados individuais de um treinamento, com as colunas de `calcular_notas_em_lote`."""
+    with conectar(caminho) as conexao:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join('r.' + coluna for coluna in _COLUNAS_RESULTADOS.values())}, "
+            "t.total_check_ins, t.total_oportunidades "
+            "FROM resultados r JOIN treinamentos t ON t.id = r.treinamento_id WHERE r.treinamento_id = ?",
+            conexao, params=[treinamento_id],
+        )
+    df = df.rename(columns={
+        **{coluna: rotulo for rotulo, coluna in _COLUNAS_RESULTADOS.items()},
+        "total_check_ins": "Total Check-ins", "total_oportunidades": "Total Oportunidades",
+    })
+    df["Frequência OK?"] = df["Frequência OK?"].astype(bool)
+    return df[COLUNAS_CALCULO]
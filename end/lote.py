@@ -0,0 +1,299 @@
+"""
+Processamento em lote de pastas de treinamentos, sem a interface do Streamlit.
+
+Cada subpasta da entrada é um treinamento com:
+    treinamento.json   configurações (mesmos campos da barra lateral, ver CONFIG_PADRAO)
+    notas.csv|xlsx     notas do instrutor: nome, acertos e interacoes
+                       (check_ins_pontuais é opcional e substitui o calculado)
+    <exportação>       lista de presença do Teams (CSV, XLSX ou PDF)
+
+Para cada treinamento são gravados em `<saida>/<pasta>/` o resultados.csv, o
+relatorio.pdf e o hash das entradas; reexecuções pulam os treinamentos cujas
+entradas e opções de saída (--sem-pdf, --logo) não mudaram e cujas saídas
+ainda existem.
+
+Uso:
+    python -m end.lote treinamentos/ saida/ --processos 4
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from end import calculos
+from end.pipeline import processar_lista_presenca
+from utils import teams_parser
+
+ARQUIVO_CONFIG = "treinamento.json"
+ARQUIVOS_NOTAS = ("notas.csv", "notas.xlsx")
+ARQUIVO_HASH = "entradas.sha256"
+ARQUIVO_RESULTADOS = "resultados.csv"
+ARQUIVO_RELATORIO = "relatorio.pdf"
+
+# Incrementar quando a forma de calcular mudar, para invalidar os resultados já gravados
+VERSAO_PROCESSAMENTO = "1"
+
+CONFIG_PADRAO = {
+    "titulo": None,  # Padrão: nome da pasta
+    "inicio": "09:00",
+    "duracao_min": 240,
+    "presenca_minima": 60,
+    "total_check_ins": 2,
+    "total_oportunidades": 4,
+}
+
+TIPOS_POR_EXTENSAO = {
+    ".csv": teams_parser.TIPOS_CSV[0],
+    ".xlsx": teams_parser.TIPOS_EXCEL[0],
+    ".xls": teams_parser.TIPOS_EXCEL[1],
+    ".pdf": teams_parser.TIPO_PDF,
+}
+
+# Cabeçalhos aceitos na planilha de notas (minúsculos) -> campo do colaborador
+COLUNAS_NOTAS = {
+    "nome": "nome", "colaborador": "nome", "participante": "nome", "full name": "nome",
+    "acertos": "acertos", "acertos na prova": "acertos",
+    "interacoes": "interacoes", "interações": "interacoes", "interações válidas": "interacoes", "interacoes validas": "interacoes",
+    "check_ins_pontuais": "check_ins_pontuais", "check-ins pontuais": "check_ins_pontuais",
+}
+
+
+def _normalizar_nome(nome) -> str:
+    return " ".join(str(nome).split()).casefold()
+
+
+def localizar_entradas(pasta: str) -> dict:
+    """Identifica a configuração, a planilha de notas e a exportação de presença de uma pasta."""
+    arquivos = sorted(os.listdir(pasta))
+    notas = [a for a in arquivos if a.lower() in ARQUIVOS_NOTAS]
+    presenca = [
+        a for a in arquivos
+        if os.path.splitext(a)[1].lower() in TIPOS_POR_EXTENSAO and a.lower() not in ARQUIVOS_NOTAS
+    ]
+    if ARQUIVO_CONFIG not in arquivos:
+        raise ValueError(f"'{ARQUIVO_CONFIG}' não encontrado.")
+    if len(notas) != 1:
+        raise ValueError(f"Esperada uma planilha de notas ({' ou '.join(ARQUIVOS_NOTAS)}), encontradas {len(notas)}.")
+    if len(presenca) != 1:
+        raise ValueError(f"Esperada uma exportação de presença (CSV, XLSX ou PDF), encontradas {len(presenca)}: {presenca}")
+    return {
+        "config": os.path.join(pasta, ARQUIVO_CONFIG),
+        "notas": os.path.join(pasta, notas[0]),
+        "presenca": os.path.join(pasta, presenca[0]),
+    }
+
+
+def hash_entradas(entradas: dict, logo_url: str | None = None) -> str:
+    """
+    SHA-256 do conteúdo (e do papel) de cada arquivo de entrada, da versão do
+    processamento e das opções de saída (`logo_url`; None = sem PDF).
+    """
+    h = hashlib.sha256(VERSAO_PROCESSAMENTO.encode())
+    h.update(f"\x1frelatorio\x1f{logo_url or ''}\x1f".encode("utf-8"))
+    for papel in sorted(entradas):
+        h.update(f"\x1f{papel}\x1f{os.path.basename(entradas[papel])}\x1f".encode("utf-8"))
+        with open(entradas[papel], "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+    return h.hexdigest()
+
+
+def ler_config(caminho: str, nome_pasta: str) -> dict:
+    with open(caminho, encoding="utf-8") as f:
+        config = {**CONFIG_PADRAO, **json.load(f)}
+    config["titulo"] = config["titulo"] or nome_pasta
+    config["inicio"] = datetime.strptime(config["inicio"], "%H:%M").time()
+    return config
+
+
+def ler_notas(caminho: str) -> pd.DataFrame:
+    """Lê a planilha de notas, indexada pelo nome normalizado."""
+    if caminho.lower().endswith(".xlsx"):
+        df = pd.read_excel(caminho)
+    else:
+        df = pd.read_csv(caminho, sep=None, engine="python", encoding="utf-8-sig")
+    df = df.rename(columns=lambda c: COLUNAS_NOTAS.get(str(c).strip().lower(), c))
+    faltando = {"nome", "acertos", "interacoes"} - set(df.columns)
+    if faltando:
+        raise ValueError(f"Planilha de notas sem as colunas: {', '.join(sorted(faltando))}.")
+    df = df[df["nome"].notna()]
+    return df.set_index(df["nome"].map(_normalizar_nome))
+
+
+def combinar_notas(colaboradores: list, notas: pd.DataFrame) -> tuple[pd.DataFrame, list]:
+    """
+    Aplica as notas aos colaboradores da lista de presença.
+
+    Quem não está na planilha de notas fica com acertos e interações zerados;
+    quem está nas notas mas não na presença entra com frequência insuficiente.
+    Retorna o DataFrame de entrada de `calculos.calcular_notas_em_lote` e os avisos.
+    """
+    presenca = pd.DataFrame(colaboradores, columns=calculos.COLUNAS_ENTRADA)
+    presenca.index = presenca["nome"].map(_normalizar_nome)
+    avisos = []
+
+    sem_notas = presenca.index.difference(notas.index)
+    if len(sem_notas):
+        avisos.append(f"{len(sem_notas)} participante(s) sem notas (acertos e interações zerados): {', '.join(presenca.loc[sem_notas, 'nome'])}")
+    sem_presenca = notas.index.difference(presenca.index)
+    if len(sem_presenca):
+        avisos.append(f"{len(sem_presenca)} nome(s) das notas fora da lista de presença (frequência insuficiente): {', '.join(notas.loc[sem_presenca, 'nome'].astype(str))}")
+        ausentes = pd.DataFrame({
+            "nome": notas.loc[sem_presenca, "nome"].astype(str), "check_ins_pontuais": 0,
+            "interacoes": 0, "acertos": 0, "frequencia": False,
+        }, index=sem_presenca)
+        presenca = pd.concat([presenca, ausentes])
+
+    presenca = presenca[~presenca.index.duplicated()]
+    alinhadas = notas[~notas.index.duplicated()].reindex(presenca.index)
+    presenca["acertos"] = pd.to_numeric(alinhadas["acertos"], errors="coerce").fillna(0).astype(int)
+    presenca["interacoes"] = pd.to_numeric(alinhadas["interacoes"], errors="coerce").fillna(0).astype(int)
+    if "check_ins_pontuais" in alinhadas.columns:
+        informados = pd.to_numeric(alinhadas["check_ins_pontuais"], errors="coerce")
+        presenca["check_ins_pontuais"] = informados.fillna(presenca["check_ins_pontuais"]).astype(int)
+    return presenca.reset_index(drop=True), avisos
+
+
+def processar_treinamento(pasta: str, destino: str, entradas: dict, chave: str, logo_url: str | None) -> dict:
+    """Processa um treinamento completo (executado nos processos do pool)."""
+    inicio = time.perf_counter()
+    config = ler_config(entradas["config"], os.path.basename(pasta))
+    caminho_presenca = entradas["presenca"]
+    with open(caminho_presenca, "rb") as f:
+        conteudo = f.read()
+
+    lista = processar_lista_presenca(
+        os.path.basename(caminho_presenca), TIPOS_POR_EXTENSAO[os.path.splitext(caminho_presenca)[1].lower()], conteudo,
+        config["inicio"], config["duracao_min"], config["presenca_minima"],
+        config["total_check_ins"], config["total_oportunidades"]
+    )
+    colaboradores, avisos = combinar_notas(lista["colaboradores"], ler_notas(entradas["notas"]))
+    resultados = calculos.calcular_notas_em_lote(colaboradores, config["total_oportunidades"], config["total_check_ins"])
+
+    os.makedirs(destino, exist_ok=True)
+    # O hash é removido antes e gravado por último: uma execução interrompida é refeita
+    caminho_hash = os.path.join(destino, ARQUIVO_HASH)
+    if os.path.exists(caminho_hash):
+        os.remove(caminho_hash)
+    resultados.to_csv(os.path.join(destino, ARQUIVO_RESULTADOS), index=False, encoding="utf-8-sig")
+    caminho_relatorio = os.path.join(destino, ARQUIVO_RELATORIO)
+    if logo_url is not None:
+        from utils.pdf_generator import generate_pdf_report
+        with open(caminho_relatorio, "wb") as f:
+            f.write(generate_pdf_report(resultados, logo_url, config["titulo"]).getvalue())
+    elif os.path.exists(caminho_relatorio):
+        # Relatório de uma execução anterior com PDF, que não corresponde mais aos resultados
+        os.remove(caminho_relatorio)
+    with open(caminho_hash, "w", encoding="utf-8") as f:
+        f.write(chave)
+
+    return {
+        "titulo": config["titulo"],
+        "origem": lista["origem"],
+        "participantes": len(resultados),
+        "aprovados": int((resultados["Status"] == "Aprovado").sum()),
+        "avisos": avisos,
+        "duracao_s": time.perf_counter() - inicio,
+    }
+
+
+def saidas_esperadas(destino: str, logo_url: str | None) -> list:
+    """Arquivos que um processamento completo grava em `destino` com essas opções."""
+    arquivos = [ARQUIVO_RESULTADOS] + ([ARQUIVO_RELATORIO] if logo_url is not None else [])
+    return [os.path.join(destino, arquivo) for arquivo in arquivos]
+
+
+def _inicializar_processo(processos: int):
+    # Cada processo tem seu próprio RateLimiter: a cota da chave é dividida entre eles
+    for variavel, padrao in (("GEMINI_RPM_LIMIT", 15), ("GEMINI_TPM_LIMIT", 1_000_000)):
+        os.environ[variavel] = str(max(1, int(os.getenv(variavel, padrao)) // processos))
+
+
+def executar(entrada: str, saida: str, processos: int, logo_url: str | None, forcar: bool = False) -> dict:
+    """Processa todas as subpastas de `entrada`; retorna a contagem de concluídos, pulados e erros."""
+    pastas = sorted(
+        os.path.join(entrada, nome) for nome in os.listdir(entrada)
+        if os.path.isdir(os.path.join(entrada, nome))
+    )
+    contagem = {"concluidos": 0, "pulados": 0, "erros": 0}
+    pendentes = []
+    for pasta in pastas:
+        nome = os.path.basename(pasta)
+        destino = os.path.join(saida, nome)
+        try:
+            entradas = localizar_entradas(pasta)
+            chave = hash_entradas(entradas, logo_url)
+        except (OSError, ValueError) as e:
+            logging.error(f"[Lote] {nome}: {e}")
+            contagem["erros"] += 1
+            continue
+        caminho_hash = os.path.join(destino, ARQUIVO_HASH)
+        # Pula só se as entradas e as opções não mudaram e as saídas continuam no lugar
+        if not forcar and os.path.exists(caminho_hash) and all(map(os.path.exists, saidas_esperadas(destino, logo_url))):
+            with open(caminho_hash, encoding="utf-8") as f:
+                if f.read().strip() == chave:
+                    contagem["pulados"] += 1
+                    continue
+        pendentes.append((pasta, destino, entradas, chave))
+
+    logging.info(f"[Lote] {len(pastas)} treinamento(s): {len(pendentes)} a processar, {contagem['pulados']} sem alterações.")
+    if not pendentes:
+        return contagem
+
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo, initargs=(processos,)) as executor:
+        futuros = {executor.submit(processar_treinamento, *pendente, logo_url): pendente[0] for pendente in pendentes}
+        for feitos, futuro in enumerate(as_completed(futuros), start=1):
+            nome = os.path.basename(futuros[futuro])
+            try:
+                resumo = futuro.result()
+            except Exception as e:
+                contagem["erros"] += 1
+                logging.error(f"[Lote] {feitos}/{len(pendentes)} {nome}: falhou ({e})")
+                continue
+            contagem["concluidos"] += 1
+            logging.info(
+                f"[Lote] {feitos}/{len(pendentes)} {nome}: {resumo['aprovados']}/{resumo['participantes']} aprovados "
+                f"(presença: {resumo['origem']}) em {resumo['duracao_s']:.1f}s"
+            )
+            for aviso in resumo["avisos"]:
+                logging.warning(f"[Lote] {nome}: {aviso}")
+    return contagem
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula as notas de várias pastas de treinamentos em paralelo.")
+    parser.add_argument("entrada", help="Pasta com uma subpasta por treinamento.")
+    parser.add_argument("saida", help="Pasta onde os resultados e relatórios são gravados.")
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 1, help="Número de processos (padrão: núcleos da máquina).")
+    parser.add_argument("--logo", default=None, help="URL da logo do relatório (padrão: a da aplicação).")
+    parser.add_argument("--sem-pdf", action="store_true", help="Não gera os relatórios em PDF.")
+    parser.add_argument("--forcar", action="store_true", help="Reprocessa mesmo os treinamentos sem alterações.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    logo_url = None
+    if not args.sem_pdf:
+        try:
+            from utils.pdf_generator import LOGO_URL
+        except (ImportError, OSError) as e:
+            parser.error(f"Geração de PDF indisponível neste ambiente ({e}). Use --sem-pdf.")
+        logo_url = args.logo or LOGO_URL
+
+    inicio = time.perf_counter()
+    contagem = executar(args.entrada, args.saida, max(1, args.processos), logo_url, forcar=args.forcar)
+    logging.info(
+        f"[Lote] Fim em {time.perf_counter() - inicio:.1f}s: {contagem['concluidos']} concluído(s), "
+        f"{contagem['pulados']} pulado(s), {contagem['erros']} com erro."
+    )
+    return 1 if contagem["erros"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import io
+from datetime import time
+
+import pandas as pd
+
+from end.presenca import calcular_presenca
+from utils import teams_parser
+
+EXTRACTION_PROMPT = """
+        Your task is to act as an attendance sheet processor.
+        From the provided file (which can be a PDF, CSV, or Excel file), do the following:
+
+        1.  Extract the full name of each participant. Look for columns like:
+            - 'Full Name', 'Nome Completo', 'Nome', 'Name', 'Participante', 'Participant'
+
+        2.  Extract the timestamp of each action. Look for columns like:
+            - 'Timestamp', 'Data/Hora', 'Date/Time', 'Horário', 'Time'
+
+        3.  Extract the action itself. Look for columns like:
+            - 'User Action', 'Action', 'Ação', 'Ação do usuário'
+            - The values are typically: 'Joined', 'Left', 'Entrou', 'Saiu', 'Ingressou', 'Left Meeting', 'Joined Meeting'
+
+        4.  Return the data as a clean JSON array of objects. Each object must have three keys: "Full Name", "Timestamp", and "Action".
+
+        5.  For the 'Timestamp' field:
+            - If in format 'MM/DD/YYYY, HH:MM:SS AM/PM', keep as is
+            - If in format 'DD/MM/YYYY HH:MM:SS', convert to 'MM/DD/YYYY, HH:MM:SS AM/PM'
+            - If in any other format, try to parse and convert to 'MM/DD/YYYY, HH:MM:SS AM/PM'
+
+        6.  For the 'Action' field, normalize to either 'Joined' or 'Left':
+            - 'Joined', 'Entrou', 'Ingressou', 'Joined Meeting' → 'Joined'
+            - 'Left', 'Saiu', 'Left Meeting' → 'Left'
+
+        7.  If a participant joins and leaves multiple times, create a separate JSON object for each action.
+
+        8.  Ignore any header rows, summary information, or metadata that is not part of the main attendance data.
+
+        9.  Skip any rows where the participant name is empty or appears to be a header/label.
+
+        10. If no valid data is found, return an empty JSON array: []
+
+        Example of expected output:
+        [
+            {"Full Name": "João Silva", "Timestamp": "10/17/2025, 09:00:00 AM", "Action": "Joined"},
+            {"Full Name": "João Silva", "Timestamp": "10/17/2025, 12:00:00 PM", "Action": "Left"}
+        ]
+        """
+
+def criar_pdf_qa():
+    """Cria o PDFQA dos processamentos (backend e RateLimiter são os compartilhados do processo)."""
+    from IA.api_load import get_api_error
+    from IA.pdf_qa import PDFQA
+    pdf_qa = PDFQA()
+    if pdf_qa.backend is None:
+        # A mensagem chega à interface pelo erro do job, exibido na thread do script
+        raise ValueError(f"Cliente da IA não configurado ({get_api_error() or 'verifique a chave GOOGLE_API_KEY'}).")
+    return pdf_qa
+
+
+def registros_para_eventos(registros) -> pd.DataFrame:
+    """Converte os registros JSON retornados pela IA no DataFrame de eventos."""
+    df = pd.DataFrame(registros)
+    if not {'Full Name', 'Timestamp', 'Action'}.issubset(df.columns):
+        raise ValueError(f"A IA não retornou as colunas esperadas. Esperado: 'Full Name', 'Timestamp', 'Action'. Encontrado: {list(df.columns)}")
+
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], format=teams_parser.FORMATO_TIMESTAMP, errors='coerce')
+    df['Action'] = df['Action'].map(teams_parser.normalizar_acao)
+    return df.dropna(subset=['Timestamp', 'Action'])
+
+
+def processar_lista_presenca(nome_arquivo: str, mime_type: str, conteudo: bytes, start_time: time,
+                             training_duration: int, min_presence: float, total_check_ins: int,
+                             total_oportunidades: int, pdf_qa=None, progresso=None) -> dict:
+    """
+    Processa uma lista de presença completa sem usar a interface do Streamlit.
+
+    Tenta a leitura local (CSV/XLSX do Teams ou a camada de texto do PDF) e
+    recorre à IA apenas para PDFs digitalizados ou layouts não reconhecidos.
+    `progresso(fracao, mensagem)` é chamado a cada etapa. Retorna um dicionário
+    com os colaboradores pré-preenchidos, a origem dos dados ('local', 'ia' ou
+    'cache'), o número de registros e uma amostra.
+    """
+    def informar(fracao: float, mensagem: str):
+        if progresso:
+            progresso(fracao, mensagem)
+
+    eventos, texto_para_ia = None, None
+    origem = 'local'
+
+    if mime_type in teams_parser.TIPOS_EXCEL + teams_parser.TIPOS_CSV + (teams_parser.TIPO_PDF,):
+        informar(0.1, f"Lendo '{nome_arquivo}' localmente...")
+        eventos, texto_para_ia = teams_parser.ler_exportacao(io.BytesIO(conteudo), mime_type)
+    else:
+        raise ValueError(f"Tipo de arquivo não suportado: {mime_type}. Use apenas CSV, XLSX ou PDF.")
+
+    if texto_para_ia is not None and not texto_para_ia.strip(" \t\r\n,;"):
+        # Marcador encontrado, mas sem nenhuma linha depois dele: não há o que enviar à IA
+        raise ValueError(f"A seção de atividades do arquivo '{nome_arquivo}' está vazia. Verifique se a exportação do Teams está completa.")
+
+    if eventos is None:
+        pdf_qa = pdf_qa or criar_pdf_qa()
+        informar(0.3, "Layout não reconhecido localmente. Extraindo os dados com a IA...")
+        if texto_para_ia is not None:
+            dados, mime_ia = texto_para_ia.encode('utf-8'), 'text/csv'
+        else:
+            dados, mime_ia = conteudo, mime_type
+
+        registros, do_cache = pdf_qa.extract_data(
+            dados, mime_ia, EXTRACTION_PROMPT,
+            progress_callback=lambda feitas, total: informar(0.3 + 0.6 * feitas / total, f"Extraindo com a IA... parte {feitas}/{total}")
+        )
+        origem = 'cache' if do_cache else 'ia'
+        if not registros:
+            raise ValueError(f"A IA não encontrou dados válidos no arquivo '{nome_arquivo}'. Verifique se o arquivo contém os dados esperados (Nome, Timestamp, Ação).")
+        eventos = registros_para_eventos(registros)
+
+    if eventos.empty:
+        raise ValueError("Nenhum dado válido de colaborador encontrado no arquivo após a filtragem.")
+
+    informar(0.95, "Calculando presença...")
+    presenca = calcular_presenca(eventos, start_time, training_duration, min_presence, total_check_ins)
+    colaboradores = [
+        {
+            'nome': name,
+            'frequencia': bool(row.frequencia_ok),
+            'check_ins_pontuais': int(row.check_ins_pontuais),
+            'interacoes': total_oportunidades,
+            'acertos': 7
+        }
+        for name, row in zip(presenca.index, presenca.itertuples(index=False))
+    ]
+    return {
+        'colaboradores': colaboradores,
+        'origem': origem,
+        'registros': len(eventos),
+        'amostra': teams_parser.eventos_para_registros(eventos.head(3)),
+    }
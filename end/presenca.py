@@ -0,0 +1,122 @@
+from datetime import time
+
+import numpy as np
+import pandas as pd
+
+
+def _parear_sessoes(eventos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta as sessões de cada participante a partir dos eventos ordenados.
+
+    Conta as conexões abertas de cada participante (+1 a cada 'Joined', -1 a
+    cada 'Left', nunca abaixo de zero): uma sessão começa quando a contagem
+    sai de zero e termina quando volta a zero. Assim entradas duplicadas
+    (vários dispositivos) não encerram a sessão antes da hora, e um 'Left'
+    sem conexão aberta é ignorado em vez de esticar uma sessão já encerrada.
+    Sessões sem saída registrada terminam no último timestamp do arquivo,
+    como no cálculo original.
+    """
+    eventos = eventos.sort_values(['Full Name', 'Timestamp'], kind='stable', ignore_index=True)
+    fim_arquivo = eventos['Timestamp'].max()
+    por_nome = eventos['Full Name']
+
+    passo = np.where(eventos['Action'] == 'Joined', 1, np.where(eventos['Action'] == 'Left', -1, 0))
+    acumulado = pd.Series(passo).groupby(por_nome, sort=False).cumsum()
+    # Soma acumulada com piso em zero: saídas sem conexão aberta não ficam "devendo"
+    abertas = acumulado - acumulado.groupby(por_nome, sort=False).cummin().clip(upper=0)
+    antes = abertas.groupby(por_nome, sort=False).shift(fill_value=0)
+
+    inicios = eventos[(antes == 0) & (abertas > 0)]
+    fins = eventos[(antes > 0) & (abertas == 0)]
+    # Inícios e fins se alternam por participante: o n-ésimo fim fecha o n-ésimo início
+    inicios = inicios.assign(ordem=inicios.groupby('Full Name', sort=False).cumcount())
+    fins = fins.assign(ordem=fins.groupby('Full Name', sort=False).cumcount())
+    sessoes = inicios[['Full Name', 'ordem', 'Timestamp']].merge(
+        fins[['Full Name', 'ordem', 'Timestamp']], on=['Full Name', 'ordem'], how='left', suffixes=('_inicio', '_fim')
+    )
+    return pd.DataFrame({
+        'Full Name': sessoes['Full Name'].to_numpy(),
+        'inicio': sessoes['Timestamp_inicio'].to_numpy(),
+        'fim': sessoes['Timestamp_fim'].fillna(fim_arquivo).to_numpy(),
+    })
+
+
+def _recortar_janelas(sessoes: pd.DataFrame, start_time: time, training_duration: int) -> pd.DataFrame:
+    """Recorta cada sessão à janela do treinamento no dia em que ela começou."""
+    inicio_janela = sessoes['inicio'].dt.normalize() + pd.Timedelta(hours=start_time.hour, minutes=start_time.minute, seconds=start_time.second)
+    fim_janela = inicio_janela + pd.Timedelta(minutes=training_duration)
+
+    recortadas = sessoes.assign(
+        inicio=sessoes['inicio'].where(sessoes['inicio'] > inicio_janela, inicio_janela),
+        fim=sessoes['fim'].where(sessoes['fim'] < fim_janela, fim_janela),
+        inicio_janela=inicio_janela,
+    )
+    return recortadas[recortadas['fim'] > recortadas['inicio']]
+
+
+def _mesclar_intervalos(sessoes: pd.DataFrame) -> pd.DataFrame:
+    """Funde intervalos sobrepostos ou duplicados de um mesmo participante."""
+    sessoes = sessoes.sort_values(['Full Name', 'inicio'], kind='stable', ignore_index=True)
+    fim_acumulado = sessoes.groupby('Full Name', sort=False)['fim'].cummax()
+    mesmo_participante = sessoes['Full Name'].eq(sessoes['Full Name'].shift())
+    # Um novo bloco começa quando o intervalo não toca o maior fim visto até então
+    novo_bloco = ~mesmo_participante | (sessoes['inicio'] > fim_acumulado.shift())
+    bloco = novo_bloco.cumsum()
+
+    return sessoes.groupby(bloco, sort=False).agg(
+        **{'Full Name': ('Full Name', 'first'), 'inicio': ('inicio', 'min'), 'fim': ('fim', 'max'),
+           'inicio_janela': ('inicio_janela', 'first')}
+    ).reset_index(drop=True)
+
+
+def calcular_presenca(eventos: pd.DataFrame, start_time: time, training_duration: int,
+                      min_presence: float, total_check_ins: int, tolerancia_minutos: int = 10) -> pd.DataFrame:
+    """
+    Calcula presença, atraso e check-ins pontuais a partir dos eventos de entrada/saída.
+
+    `eventos` deve ter as colunas 'Full Name', 'Timestamp' (datetime) e 'Action'
+    ('Joined'/'Left'). A janela do treinamento (`start_time` + `training_duration`)
+    é aplicada em cada dia em que alguma sessão cai dentro dela; eventos fora
+    das janelas (ex: uma saída depois da meia-noite) não contam como dia de
+    treinamento. Os check-ins são distribuídos igualmente ao longo da janela e
+    contam como pontuais quando o participante está na reunião até
+    `tolerancia_minutos` após cada um deles.
+
+    Retorna um DataFrame indexado pelo nome com as colunas 'presenca_pct',
+    'atraso_minutos', 'check_ins_pontuais' e 'frequencia_ok'.
+    """
+    colunas = ['presenca_pct', 'atraso_minutos', 'check_ins_pontuais', 'frequencia_ok']
+    if eventos.empty:
+        return pd.DataFrame(columns=colunas)
+
+    nomes = pd.Index(eventos['Full Name'].unique(), name='Full Name').sort_values()
+    duracao = pd.Timedelta(minutes=training_duration)
+
+    sessoes = _recortar_janelas(_parear_sessoes(eventos), start_time, training_duration)
+    total_dias = max(sessoes['inicio_janela'].nunique(), 1)
+    intervalos = _mesclar_intervalos(sessoes)
+
+    # Presença: tempo coberto dentro das janelas sobre o tempo total de treinamento
+    coberto = (intervalos['fim'] - intervalos['inicio']).groupby(intervalos['Full Name']).sum()
+    presenca = coberto.dt.total_seconds() / (total_dias * duracao.total_seconds()) * 100
+
+    # Atraso: primeira chegada em relação ao início da janela do mesmo dia
+    primeiro = intervalos.groupby('Full Name')['inicio'].idxmin()
+    chegada = intervalos.loc[primeiro].set_index('Full Name')
+    atraso = (chegada['inicio'] - chegada['inicio_janela']).dt.total_seconds() / 60
+
+    # Check-ins: matriz (intervalos x momentos de verificação) avaliada de uma vez
+    passos = pd.timedelta_range(start=0, periods=max(total_check_ins, 1), freq=duracao / max(total_check_ins, 1))
+    momentos = (intervalos['inicio_janela'].to_numpy()[:, None]
+                + passos.to_numpy()[None, :]
+                + np.timedelta64(tolerancia_minutos, 'm'))
+    cobre = ((intervalos['inicio'].to_numpy()[:, None] <= momentos)
+             & (intervalos['fim'].to_numpy()[:, None] > momentos)).sum(axis=1)
+    check_ins = pd.Series(cobre, index=intervalos.index).groupby(intervalos['Full Name']).sum() // total_dias
+
+    resultado = pd.DataFrame(index=nomes)
+    resultado['presenca_pct'] = presenca.reindex(nomes).fillna(0.0)
+    resultado['atraso_minutos'] = atraso.reindex(nomes)
+    resultado['check_ins_pontuais'] = check_ins.reindex(nomes).fillna(0).astype(int).clip(upper=total_check_ins)
+    resultado['frequencia_ok'] = resultado['presenca_pct'] >= min_presence
+    return resultado[colunas]
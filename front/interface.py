@@ -1,12 +1,20 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, time, timedelta
-import time as py_time 
+from datetime import datetime, time
+import os
+import sqlite3
 
 # Importações dos pacotes do projeto
-from IA.pdf_qa import PDFQA
-from utils.pdf_generator import generate_pdf_report
-from auth import auth_utils
+from IA.cache import get_answer_cache, get_extraction_cache
+from utils.pdf_generator import LOGO_URL, get_logo_base64, get_pdf_report_bytes, get_report_key, request_pdf_report
+from utils.certificados import generate_certificates_zip
+from utils import teams_parser
+from utils.jobs import CONCLUIDO, ERRO, EXECUTANDO, NA_FILA, get_job_queue
+from end import historico
+from end.calculos import COLUNAS_ENTRADA, formatar_resultados
+from end.pipeline import processar_lista_presenca
+from auth import auth_utils, user_directory
+
 
 # --- Funções de Interface do Streamlit ---
 
@@ -35,290 +43,266 @@ def configurar_barra_lateral():
 
     uploaded_file = st.sidebar.file_uploader("1. Selecione o arquivo (CSV, XLSX ou PDF)", type=['csv', 'xlsx', 'xls', 'pdf'])
     
-    if 'last_ia_call_time' not in st.session_state:
-        st.session_state.last_ia_call_time = 0
+    if st.sidebar.button("2. Processar Arquivo com IA", disabled=uploaded_file is None):
+        # O processamento roda em segundo plano; a cota da IA é controlada pelo RateLimiter compartilhado
+        processar_arquivo_com_ia(uploaded_file, start_time, training_duration, min_presence, total_check_ins, total_oportunidades)
 
-    cooldown_seconds = 60
-    time_since_last_call = py_time.time() - st.session_state.last_ia_call_time
-    
-    if time_since_last_call < cooldown_seconds:
-        remaining_time = int(cooldown_seconds - time_since_last_call)
-        st.sidebar.warning(f"Aguarde {remaining_time} segundos para usar a IA novamente.")
-        st.sidebar.button("2. Processar Arquivo com IA", disabled=True)
-    elif uploaded_file is not None:
-        if st.sidebar.button("2. Processar Arquivo com IA"):
-            # Passando os valores padrão para a função de processamento
-            processar_arquivo_com_ia(uploaded_file, start_time, training_duration, min_presence, total_check_ins, total_oportunidades)
-            st.session_state.dados_processados = None
-    else:
-        st.sidebar.button("2. Processar Arquivo com IA", disabled=True)
+    with st.sidebar:
+        exibir_status_processamentos()
 
     st.sidebar.markdown("---")
     if st.sidebar.button("➕ Adicionar Colaborador Manualmente"):
-        if 'colaboradores' not in st.session_state:
-            st.session_state.colaboradores = []
-        
-        # Cria o dicionário já com os valores padrão
-        novo_colaborador = {
-            'check_ins_pontuais': total_check_ins,
-            'interacoes': total_oportunidades,
-            'acertos': 7
-        }
-        st.session_state.colaboradores.append(novo_colaborador)
-        st.session_state.dados_processados = None
+        # A nova linha já vem com os valores padrão
+        novo_colaborador = criar_tabela_colaboradores([{}], total_check_ins, total_oportunidades)
+        definir_colaboradores(pd.concat([obter_colaboradores(), novo_colaborador], ignore_index=True))
     
     return training_title, total_oportunidades, total_check_ins
 
-def processar_arquivo_com_ia(uploaded_file, start_time, training_duration, min_presence, total_check_ins, total_oportunidades):
-    """Processa um arquivo (PDF, CSV ou Excel) e preenche os colaboradores com valores padrão."""
+ORIGENS_PROCESSAMENTO = {
+    'local': "layout do Teams reconhecido localmente, sem uso da IA",
+    'ia': "dados extraídos pela IA",
+    'cache': "dados recuperados do cache da IA",
+}
 
-    # Adicionar validação de arquivo no início
+def processar_arquivo_com_ia(uploaded_file, start_time, training_duration, min_presence, total_check_ins, total_oportunidades):
+    """
+    Envia um arquivo (PDF, CSV ou Excel) para processamento em segundo plano.
+
+    Retorna imediatamente: o job entra na fila do processo e o andamento é
+    exibido por `exibir_status_processamentos`. Exportações do Teams em CSV/XLSX
+    e PDFs com camada de texto são interpretados localmente; a IA só é usada
+    para PDFs digitalizados ou quando o layout das colunas não é reconhecido.
+    """
     if uploaded_file is None:
         st.sidebar.error("Nenhum arquivo foi enviado.")
         return
 
-    # Adicionar log de tipo de arquivo
-    st.sidebar.info(f"Processando arquivo: {uploaded_file.name} (Tipo: {uploaded_file.type})")
-
-    try:
-        if 'pdf_qa_instance' not in st.session_state:
-            st.session_state.pdf_qa_instance = PDFQA()
-        pdf_qa = st.session_state.pdf_qa_instance
-
-        csv_data_for_ia = None
-
-        # Processar arquivos Excel (XLSX/XLS)
-        if uploaded_file.type in ["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                   "application/vnd.ms-excel"]:
-            uploaded_file.seek(0)
-
-            try:
-                # Ler o arquivo Excel
-                df_excel = pd.read_excel(uploaded_file, engine='openpyxl')
-                st.sidebar.success(f"Arquivo Excel lido com sucesso. {len(df_excel)} linhas encontradas.")
-
-                # Procurar pela seção de atividades
-                start_index = -1
-                for i, row in df_excel.iterrows():
-                    if any("Atividades em Reunião" in str(cell) for cell in row.values):
-                        start_index = i + 1
-                        break
-
-                if start_index != -1:
-                    df_filtered = df_excel.iloc[start_index:]
-                    st.sidebar.success(f"Seção de atividades encontrada. {len(df_filtered)} linhas para processar.")
-                else:
-                    st.sidebar.warning("Seção 'Atividades em Reunião' não encontrada. Processando planilha completa.")
-                    df_filtered = df_excel
-
-                # Converter para CSV em memória para enviar à IA
-                csv_data_for_ia = df_filtered.to_csv(index=False)
-
-            except Exception as excel_error:
-                st.sidebar.error(f"Erro ao processar arquivo Excel: {str(excel_error)}")
-                return
-
-        # Processar arquivos CSV
-        elif uploaded_file.type in ["text/csv", "application/csv"]:
-            uploaded_file.seek(0)
-            content_bytes = uploaded_file.read()
-
-            # Tentar múltiplas codificações
-            content = None
-            for encoding in ["utf-8-sig", "utf-8", "utf-16", "latin-1", "iso-8859-1"]:
-                try:
-                    content = content_bytes.decode(encoding)
-                    st.sidebar.success(f"Arquivo decodificado com sucesso usando {encoding}")
-                    break
-                except UnicodeDecodeError:
-                    continue
-
-            if content is None:
-                st.sidebar.error("Não foi possível decodificar o arquivo CSV. Tente salvar o arquivo com codificação UTF-8.")
-                return
-
-            lines = content.splitlines()
-
-            start_index = -1
-            for i, line in enumerate(lines):
-                if "3. Atividades em Reunião" in line or "Atividades em Reunião" in line:
-                    start_index = i + 1
-                    break
-
-            if start_index != -1:
-                csv_data_for_ia = "\n".join(lines[start_index:])
-                st.sidebar.success(f"Seção de atividades encontrada. {len(lines) - start_index} linhas para processar.")
-            else:
-                st.sidebar.warning("Seção 'Atividades em Reunião' não encontrada. Processando arquivo completo.")
-                csv_data_for_ia = content
-
-        # Processar arquivos PDF
-        elif uploaded_file.type == "application/pdf":
-            st.sidebar.info("Arquivo PDF detectado. A IA irá extrair os dados diretamente.")
-            pass
-
-        else:
-            st.sidebar.error(f"Tipo de arquivo não suportado: {uploaded_file.type}. Use apenas CSV, XLSX ou PDF.")
-            return
-
-        extraction_prompt = """
-        Your task is to act as an attendance sheet processor.
-        From the provided file (which can be a PDF, CSV, or Excel file), do the following:
-
-        1.  Extract the full name of each participant. Look for columns like:
-            - 'Full Name', 'Nome Completo', 'Nome', 'Name', 'Participante', 'Participant'
-
-        2.  Extract the timestamp of each action. Look for columns like:
-            - 'Timestamp', 'Data/Hora', 'Date/Time', 'Horário', 'Time'
-
-        3.  Extract the action itself. Look for columns like:
-            - 'User Action', 'Action', 'Ação', 'Ação do usuário'
-            - The values are typically: 'Joined', 'Left', 'Entrou', 'Saiu', 'Ingressou', 'Left Meeting', 'Joined Meeting'
-
-        4.  Return the data as a clean JSON array of objects. Each object must have three keys: "Full Name", "Timestamp", and "Action".
-
-        5.  For the 'Timestamp' field:
-            - If in format 'MM/DD/YYYY, HH:MM:SS AM/PM', keep as is
-            - If in format 'DD/MM/YYYY HH:MM:SS', convert to 'MM/DD/YYYY, HH:MM:SS AM/PM'
-            - If in any other format, try to parse and convert to 'MM/DD/YYYY, HH:MM:SS AM/PM'
-
-        6.  For the 'Action' field, normalize to either 'Joined' or 'Left':
-            - 'Joined', 'Entrou', 'Ingressou', 'Joined Meeting' → 'Joined'
-            - 'Left', 'Saiu', 'Left Meeting' → 'Left'
-
-        7.  If a participant joins and leaves multiple times, create a separate JSON object for each action.
-
-        8.  Ignore any header rows, summary information, or metadata that is not part of the main attendance data.
-
-        9.  Skip any rows where the participant name is empty or appears to be a header/label.
-
-        10. If no valid data is found, return an empty JSON array: []
-
-        Example of expected output:
-        [
-            {"Full Name": "João Silva", "Timestamp": "10/17/2025, 09:00:00 AM", "Action": "Joined"},
-            {"Full Name": "João Silva", "Timestamp": "10/17/2025, 12:00:00 PM", "Action": "Left"}
-        ]
-        """
-        with st.spinner("A IA está analisando o arquivo..."):
-            try:
-                extracted_data = pdf_qa.extract_structured_data(uploaded_file, extraction_prompt, csv_data=csv_data_for_ia)
-
-                # Log do que foi extraído
-                if extracted_data:
-                    st.sidebar.success(f"IA extraiu {len(extracted_data)} registros.")
-                    # Mostrar uma amostra dos dados
-                    with st.sidebar.expander("Ver amostra dos dados extraídos"):
-                        st.json(extracted_data[:3] if len(extracted_data) > 3 else extracted_data)
-
-            except Exception as extraction_error:
-                st.sidebar.error(f"Erro durante a extração de dados: {str(extraction_error)}")
-                import traceback
-                st.sidebar.text(traceback.format_exc())
-                return
-
-        st.session_state.last_ia_call_time = py_time.time()
+    if uploaded_file.type not in teams_parser.TIPOS_EXCEL + teams_parser.TIPOS_CSV + (teams_parser.TIPO_PDF,):
+        st.sidebar.error(f"Tipo de arquivo não suportado: {uploaded_file.type}. Use apenas CSV, XLSX ou PDF.")
+        return
 
-        if not extracted_data:
-            st.sidebar.warning(f"A IA não encontrou dados válidos no arquivo '{uploaded_file.name}'.")
-            st.sidebar.info("Verifique se o arquivo contém os dados esperados (Nome, Timestamp, Ação).")
-            return
+    # Os bytes são copiados: o UploadedFile pertence à sessão e não deve ser lido pelas threads da fila
+    job = get_job_queue().submit(
+        processar_lista_presenca,
+        uploaded_file.name, uploaded_file.type, uploaded_file.getvalue(),
+        start_time, training_duration, min_presence, total_check_ins, total_oportunidades,
+        descricao=uploaded_file.name
+    )
+    st.session_state.setdefault('jobs_presenca', []).append(job.id)
+
+def _aplicar_resultado_processamento(job):
+    """Carrega os colaboradores de um job concluído no formulário."""
+    definir_colaboradores(criar_tabela_colaboradores(job.resultado['colaboradores']))
+    st.session_state.job_presenca_carregado = job.id
+    # Uma nova lista de presença é um novo treinamento no histórico
+    st.session_state.pop('historico_registro', None)
+
+def exibir_status_processamentos():
+    """
+    Exibe o estado dos arquivos enviados para processamento nesta sessão.
+
+    Quando um job termina, seus colaboradores são carregados automaticamente se
+    ele for mais recente que a lista já carregada; os demais podem ser
+    carregados pelo botão correspondente.
+    """
+    fila = get_job_queue()
+    jobs = [job for job in map(fila.get, st.session_state.get('jobs_presenca', [])) if job is not None]
+    if not jobs:
+        return
 
-        df = pd.DataFrame(extracted_data)
-
-        if 'Full Name' in df.columns and 'Timestamp' in df.columns and 'Action' in df.columns:
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='%m/%d/%Y, %I:%M:%S %p', errors='coerce')
-            df.dropna(subset=['Timestamp'], inplace=True)
-            df = df.sort_values(by=['Full Name', 'Timestamp'])
-
-            st.session_state.colaboradores = []
-            if not df.empty:
-                for name, group in df.groupby('Full Name'):
-                    total_duration = timedelta(0)
-                    last_join_time = None
-                    for _, row in group.iterrows():
-                        if row['Action'] == 'Joined':
-                            last_join_time = row['Timestamp']
-                        elif row['Action'] == 'Left' and last_join_time is not None:
-                            total_duration += row['Timestamp'] - last_join_time
-                            last_join_time = None
-                    if last_join_time is not None:
-                        total_duration += df['Timestamp'].max() - last_join_time
-                    presence_percentage = (total_duration.total_seconds() / (training_duration * 60)) * 100
-                    frequencia_ok = presence_percentage >= min_presence
-
-                    st.session_state.colaboradores.append({
-                        'nome': name,
-                        'frequencia': frequencia_ok,
-                        'check_ins_pontuais': total_check_ins,
-                        'interacoes': total_oportunidades,
-                        'acertos': 7
-                    })
-                st.sidebar.success(f"{len(st.session_state.colaboradores)} colaboradores processados via IA!")
+    vistos = st.session_state.setdefault('jobs_presenca_vistos', set())
+    ordem = {job.id: indice for indice, job in enumerate(jobs)}
+    for job in jobs:
+        if job.status == CONCLUIDO and job.id not in vistos:
+            vistos.add(job.id)
+            carregado = st.session_state.get('job_presenca_carregado')
+            if ordem[job.id] > ordem.get(carregado, -1):
+                _aplicar_resultado_processamento(job)
+
+    st.markdown("**Processamentos**")
+    for job in reversed(jobs):
+        if job.status == CONCLUIDO:
+            resultado = job.resultado
+            st.success(f"{job.descricao}: {len(resultado['colaboradores'])} colaboradores "
+                       f"({resultado['registros']} registros; {ORIGENS_PROCESSAMENTO[resultado['origem']]}).")
+            with st.expander("Ver amostra dos dados extraídos"):
+                st.json(resultado['amostra'])
+            if st.session_state.get('job_presenca_carregado') == job.id:
+                st.caption("✅ Lista carregada no formulário.")
+            elif st.button("Carregar esta lista", key=f"carregar_job_{job.id}"):
+                _aplicar_resultado_processamento(job)
                 st.rerun()
-            else:
-                st.sidebar.warning("Nenhum dado válido de colaborador encontrado no arquivo após a filtragem pela IA.")
-        else:
-            st.sidebar.error(f"A IA não retornou as colunas esperadas. Esperado: 'Full Name', 'Timestamp', 'Action'. Encontrado: {list(df.columns)}")
-    except Exception as e:
-        st.sidebar.error(f"Erro ao processar com a IA: {e}")
+        elif job.status == ERRO:
+            st.error(f"{job.descricao}: {job.erro}")
+
+    if any(not job.finalizado for job in jobs):
+        _acompanhar_processamentos_pendentes([job.id for job in jobs if not job.finalizado])
+    elif st.button("Limpar processamentos"):
+        st.session_state.jobs_presenca = []
+        st.rerun()
+
+@st.fragment(run_every=1.0)
+def _acompanhar_processamentos_pendentes(job_ids: list):
+    """Atualiza o progresso dos jobs pendentes sem recarregar a página inteira."""
+    fila = get_job_queue()
+    jobs = [job for job in map(fila.get, job_ids) if job is not None]
+    if all(job.finalizado for job in jobs):
+        # Recarrega a aplicação para exibir os resultados e carregar os colaboradores
+        st.rerun()
+
+    for job in jobs:
+        if job.status == NA_FILA:
+            st.info(f"{job.descricao}: na fila (posição {fila.posicao_na_fila(job.id) + 1}).")
+        elif job.status == EXECUTANDO:
+            st.progress(job.progresso, text=f"{job.descricao}: {job.mensagem}")
+
+# Acertos sugeridos para colaboradores novos (a prova tem 10 questões)
+ACERTOS_PADRAO = 7
+MAX_ACERTOS = 10
+LINHAS_POR_PAGINA = 50
+
+def criar_tabela_colaboradores(registros=(), total_check_ins: int | None = None, total_oportunidades: int | None = None) -> pd.DataFrame:
+    """
+    Monta a tabela de colaboradores (colunas de `calculos.COLUNAS_ENTRADA`) a partir de uma lista de dicionários.
+
+    Campos ausentes ficam vazios, ou recebem os valores padrão quando os totais
+    do treinamento são informados (como no cadastro manual).
+    """
+    df = pd.DataFrame(list(registros), columns=COLUNAS_ENTRADA)
+    if total_check_ins is not None:
+        df['check_ins_pontuais'] = df['check_ins_pontuais'].fillna(total_check_ins)
+        df['interacoes'] = df['interacoes'].fillna(total_oportunidades)
+        df['acertos'] = df['acertos'].fillna(ACERTOS_PADRAO)
+    return df.astype({
+        'nome': 'string',
+        'check_ins_pontuais': 'Int64',
+        'interacoes': 'Int64',
+        'acertos': 'Int64',
+        'frequencia': 'boolean',
+    }).fillna({'nome': '', 'frequencia': False})
+
+def obter_colaboradores() -> pd.DataFrame:
+    """Retorna a tabela de colaboradores da sessão (vazia se ainda não houver)."""
+    if st.session_state.get('colaboradores') is None:
+        st.session_state.colaboradores = criar_tabela_colaboradores()
+    return st.session_state.colaboradores
+
+def definir_colaboradores(df: pd.DataFrame):
+    """
+    Substitui a tabela de colaboradores, descartando os resultados calculados.
+
+    A versão entra na chave da grade de edição: ela é recriada a partir da nova
+    tabela, sem reaplicar edições que já foram incorporadas.
+    """
+    st.session_state.colaboradores = df.reset_index(drop=True)
+    st.session_state.dados_processados = None
+    st.session_state.versao_colaboradores = st.session_state.get('versao_colaboradores', 0) + 1
+
+def _aplicar_edicoes_grade(chave: str, inicio: int, total_check_ins: int, total_oportunidades: int):
+    """Incorpora à tabela as alterações feitas na página da grade que começa na linha `inicio`."""
+    edicoes = st.session_state[chave]
+    df = obter_colaboradores().copy()
+    for posicao, valores in edicoes['edited_rows'].items():
+        for coluna, valor in valores.items():
+            df.iat[inicio + int(posicao), df.columns.get_loc(coluna)] = valor
+    df = df.drop(index=df.index[[inicio + posicao for posicao in edicoes['deleted_rows']]])
+    if edicoes['added_rows']:
+        novos = criar_tabela_colaboradores(edicoes['added_rows'], total_check_ins, total_oportunidades)
+        df = pd.concat([df, novos], ignore_index=True)
+    definir_colaboradores(df)
+
+def _preencher_coluna(coluna: str, valor):
+    """Ação em lote: aplica o mesmo valor a uma coluna de todos os colaboradores."""
+    df = obter_colaboradores().copy()
+    df[coluna] = valor
+    definir_colaboradores(df)
 
 def desenhar_formulario_colaboradores(total_oportunidades: int, total_check_ins: int):
-    """Desenha a área principal com o formulário para cada colaborador."""
+    """
+    Desenha a grade editável de colaboradores, paginada, com ações em lote.
+
+    A grade é um único widget por página (em vez de um conjunto de campos por
+    colaborador), o que mantém o rerun rápido mesmo em turmas grandes.
+    """
     st.header("👤 Dados dos Colaboradores")
-    if not st.session_state.get('colaboradores'):
+    colaboradores = obter_colaboradores()
+    if colaboradores.empty:
         st.info("Adicione colaboradores manualmente ou carregue uma lista de presença na barra lateral.")
         return
 
     st.warning("Confira os dados. A maioria dos campos já está preenchida com valores padrão. Altere apenas o necessário.")
 
-    def on_change_callback():
-        """Callback para limpar os resultados calculados sempre que um dado do formulário for alterado."""
-        st.session_state.dados_processados = None
-
-    for i, colab in enumerate(st.session_state.colaboradores):
-        st.markdown(f"---")
-        with st.container():
-            cols = st.columns([3, 1, 1, 1, 1, 1])
-            colab_key_prefix = f"{colab.get('nome', '')}_{i}"
-            
-            st.session_state.colaboradores[i]['nome'] = cols[0].text_input(f"Nome do Colaborador {i+1}", value=colab.get('nome', ''), key=f"nome_{colab_key_prefix}", on_change=on_change_callback, placeholder="Nome completo do colaborador")
-            st.session_state.colaboradores[i]['check_ins_pontuais'] = cols[1].number_input("Check-ins Pontuais", min_value=0, max_value=total_check_ins, step=1, key=f"check_ins_{colab_key_prefix}", value=colab.get('check_ins_pontuais'), on_change=on_change_callback)
-            st.session_state.colaboradores[i]['interacoes'] = cols[2].number_input("Interações Válidas", min_value=0, max_value=total_oportunidades, step=1, key=f"interacoes_{colab_key_prefix}", value=colab.get('interacoes'), on_change=on_change_callback)
-            st.session_state.colaboradores[i]['acertos'] = cols[3].number_input("Acertos na Prova", min_value=0, max_value=10, step=1, key=f"acertos_{colab_key_prefix}", value=colab.get('acertos'), on_change=on_change_callback)
-            st.session_state.colaboradores[i]['frequencia'] = cols[4].checkbox("Frequência OK?", value=colab.get('frequencia', False), key=f"frequencia_{colab_key_prefix}", on_change=on_change_callback)
-
-            if cols[5].button("🗑️ Remover", key=f"remover_{colab_key_prefix}"):
-                st.session_state.colaboradores.pop(i)
-                st.rerun()
-
-def validar_dados_colaboradores() -> bool:
-    """Verifica se todos os campos obrigatórios para cada colaborador foram preenchidos."""
-    if not st.session_state.get('colaboradores'):
+    with st.expander("⚡ Ações em lote"):
+        cols = st.columns(3)
+        acertos = cols[0].number_input("Acertos na Prova", min_value=0, max_value=MAX_ACERTOS, value=ACERTOS_PADRAO, step=1, key="lote_acertos")
+        cols[0].button("Definir acertos de todos", on_click=_preencher_coluna, args=('acertos', acertos), use_container_width=True)
+        cols[1].button("Interações máximas para todos", on_click=_preencher_coluna, args=('interacoes', total_oportunidades), use_container_width=True)
+        cols[1].button("Check-ins pontuais para todos", on_click=_preencher_coluna, args=('check_ins_pontuais', total_check_ins), use_container_width=True)
+        cols[2].button("Marcar frequência OK para todos", on_click=_preencher_coluna, args=('frequencia', True), use_container_width=True)
+        cols[2].button("Desmarcar frequência de todos", on_click=_preencher_coluna, args=('frequencia', False), use_container_width=True)
+
+    total_paginas = max(1, -(-len(colaboradores) // LINHAS_POR_PAGINA))
+    pagina = 1
+    if total_paginas > 1:
+        col_pagina, col_info = st.columns([1, 3])
+        pagina = col_pagina.number_input("Página", min_value=1, max_value=total_paginas, step=1, key="pagina_colaboradores")
+        col_info.caption(f"{len(colaboradores)} colaboradores · {LINHAS_POR_PAGINA} por página · página {pagina} de {total_paginas}")
+    inicio = (pagina - 1) * LINHAS_POR_PAGINA
+
+    chave = f"grade_colaboradores_{st.session_state.get('versao_colaboradores', 0)}_{pagina}"
+    st.data_editor(
+        colaboradores.iloc[inicio:inicio + LINHAS_POR_PAGINA],
+        key=chave,
+        on_change=_aplicar_edicoes_grade,
+        args=(chave, inicio, total_check_ins, total_oportunidades),
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'nome': st.column_config.TextColumn("Nome do Colaborador", required=True, width="large"),
+            'check_ins_pontuais': st.column_config.NumberColumn("Check-ins Pontuais", min_value=0, max_value=total_check_ins, step=1, required=True),
+            'interacoes': st.column_config.NumberColumn("Interações Válidas", min_value=0, max_value=total_oportunidades, step=1, required=True),
+            'acertos': st.column_config.NumberColumn("Acertos na Prova", min_value=0, max_value=MAX_ACERTOS, step=1, required=True),
+            'frequencia': st.column_config.CheckboxColumn("Frequência OK?"),
+        },
+    )
+
+MAX_PENDENCIAS_EXIBIDAS = 20
+
+def validar_dados_colaboradores(total_oportunidades: int | None = None, total_check_ins: int | None = None) -> bool:
+    """
+    Verifica, coluna a coluna, se os campos obrigatórios de todos os colaboradores
+    estão preenchidos e, quando os totais são informados, dentro dos limites.
+    """
+    df = obter_colaboradores()
+    if df.empty:
         st.error("Não há colaboradores na lista para validar.")
         return False
 
-    dados_incompletos = []
-    for i, colab in enumerate(st.session_state.colaboradores):
-        nome = colab.get('nome', '').strip()
-        check_ins = colab.get('check_ins_pontuais')
-        interacoes = colab.get('interacoes')
-        acertos = colab.get('acertos')
-
-        if not nome or check_ins is None or interacoes is None or acertos is None:
-            dados_incompletos.append(f"Colaborador {i+1} (Nome: {nome or 'Vazio'})")
-    
-    if dados_incompletos:
+    nomes = df['nome'].fillna('').str.strip()
+    invalido = (nomes == '') | df[['check_ins_pontuais', 'interacoes', 'acertos']].isna().any(axis=1)
+    limites = {'acertos': MAX_ACERTOS, 'check_ins_pontuais': total_check_ins, 'interacoes': total_oportunidades}
+    for coluna, maximo in limites.items():
+        valores = df[coluna]
+        fora = valores < 0
+        if maximo is not None:
+            fora |= valores > maximo
+        invalido |= fora.fillna(False)
+
+    if invalido.any():
         st.error("**Dados Incompletos!** Por favor, preencha todos os campos para os seguintes colaboradores antes de calcular:")
-        for item in dados_incompletos:
-            st.warning(f"- {item}")
+        posicoes = invalido.to_numpy().nonzero()[0]
+        for i in posicoes[:MAX_PENDENCIAS_EXIBIDAS]:
+            st.warning(f"- Colaborador {i+1} (Nome: {nomes.iat[i] or 'Vazio'})")
+        if len(posicoes) > MAX_PENDENCIAS_EXIBIDAS:
+            st.warning(f"- ... e mais {len(posicoes) - MAX_PENDENCIAS_EXIBIDAS} colaboradores.")
         return False
-        
+
     return True
 
-def exibir_tabela_resultados(dados_processados: list):
+def exibir_tabela_resultados(dados_processados: pd.DataFrame):
     """Mostra o DataFrame com os resultados na tela."""
-    if not dados_processados:
+    if dados_processados is None or len(dados_processados) == 0:
         st.error("Nenhum dado para exibir.")
         return
         
@@ -333,18 +317,81 @@ def exibir_tabela_resultados(dados_processados: list):
     display_df = df_resultados[["Colaborador", "Nota Pontualidade", "Nota Interação", "Nota Avaliação", "Nota Final", "Status"]]
     st.dataframe(display_df.style.apply(highlight_status, axis=1).format({ "Nota Pontualidade": "{:.2f}", "Nota Interação": "{:.2f}", "Nota Avaliação": "{:.2f}", "Nota Final": "{:.2f}", }), use_container_width=True)
 
-def exibir_botao_pdf(dados_processados: list, training_title: str):
+def registrar_no_historico(dados_processados: pd.DataFrame, training_title: str, total_check_ins: int, total_oportunidades: int):
+    """
+    Grava o treinamento calculado no histórico. Recalcular o mesmo treinamento
+    na sessão (mesmo título, mesma lista) substitui o registro anterior.
+    """
+    if dados_processados is None or len(dados_processados) == 0:
+        return
+    anterior = st.session_state.get('historico_registro')
+    substituir_id = anterior[0] if anterior and anterior[1] == training_title else None
+    try:
+        treinamento_id = historico.registrar_treinamento(
+            dados_processados, training_title,
+            getattr(st.user, "email", None) or "desconhecido",
+            total_check_ins, total_oportunidades,
+            instrutor_nome=auth_utils.get_user_display_name(),
+            substituir_id=substituir_id
+        )
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"Não foi possível gravar o treinamento no histórico: {e}")
+        return
+    st.session_state.historico_registro = (treinamento_id, training_title)
+
+def iniciar_geracao_relatorio(dados_processados: pd.DataFrame, training_title: str):
+    """Inicia a renderização do relatório em segundo plano assim que os resultados são calculados."""
+    request_pdf_report(pd.DataFrame(dados_processados), LOGO_URL, training_title)
+
+def exibir_botao_pdf(dados_processados: pd.DataFrame, training_title: str):
     """Mostra o botão para gerar e baixar o relatório em PDF."""
     st.markdown("---")
     
     df_resultados = pd.DataFrame(dados_processados)
-    logo_url = "https://drive.google.com/uc?export=download&id=1AABdw4iGBJ7tsQ7fR1WGTP5cML3Jlfx_"
     
+    # O relatório é memorizado: reruns com os mesmos dados reutilizam os bytes já gerados
     with st.spinner("Preparando dados do relatório..."):
-        pdf_data = generate_pdf_report(df_resultados, logo_url, training_title)
+        pdf_data = get_pdf_report_bytes(df_resultados, LOGO_URL, training_title)
     
     st.download_button(label="📄 Baixar Relatório Detalhado em PDF", data=pdf_data, file_name=f"relatorio_{training_title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf", mime="application/pdf")
 
+def exibir_botao_certificados(dados_processados: pd.DataFrame, training_title: str):
+    """Gera os certificados individuais dos aprovados em lote e oferece o ZIP para download."""
+    total_aprovados = int((dados_processados['Status'] == 'Aprovado').sum())
+    if total_aprovados == 0:
+        st.info("Nenhum colaborador aprovado para emissão de certificados.")
+        return
+
+    # O ZIP vale apenas para o conteúdo atual (resultados, título e logo), não para o objeto
+    logo_base64 = get_logo_base64(LOGO_URL)
+    chave = get_report_key(dados_processados, logo_base64, training_title)
+    gerado = st.session_state.get('certificados_zip')
+    if gerado and gerado[0] != chave:
+        _remover_arquivo(gerado[1])
+        gerado = st.session_state.certificados_zip = None
+
+    if st.button(f"🎓 Gerar Certificados dos Aprovados ({total_aprovados})"):
+        if gerado:
+            _remover_arquivo(gerado[1])
+        progresso = st.progress(0.0, text="Gerando certificados...")
+        caminho_zip = generate_certificates_zip(
+            dados_processados, training_title, logo_base64,
+            progress_callback=lambda feitos, total: progresso.progress(feitos / total, text=f"Gerando certificados... {feitos}/{total}")
+        )
+        progresso.empty()
+        gerado = st.session_state.certificados_zip = (chave, caminho_zip)
+
+    if gerado and os.path.exists(gerado[1]):
+        with open(gerado[1], "rb") as arquivo_zip:
+            st.download_button(label="🗂️ Baixar Certificados (ZIP)", data=arquivo_zip, file_name=f"certificados_{training_title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.zip", mime="application/zip")
+
+def _remover_arquivo(caminho: str):
+    """Remove um arquivo temporário, ignorando se ele já não existir."""
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
 def exibir_pagina_admin():
     """Desenha a interface da página de administração."""
     auth_utils.check_admin_permission()
@@ -356,10 +403,52 @@ def exibir_pagina_admin():
     
     with tab1:
         st.subheader("Usuários Autorizados")
-        st.markdown("A lista abaixo é carregada diretamente do arquivo de segredos (`secrets.toml`) da aplicação. Para adicionar, remover ou alterar permissões, você deve editar este arquivo e reiniciar a aplicação.")
+        caminho_diretorio = auth_utils.get_user_directory_path()
+        if caminho_diretorio:
+            st.markdown("A lista abaixo é carregada do diretório de usuários em SQLite. Alterações feitas aqui ou diretamente no banco valem na próxima interação de cada usuário, sem reiniciar a aplicação.")
+        else:
+            st.markdown("A lista abaixo é carregada diretamente do arquivo de segredos (`secrets.toml`) da aplicação. Para adicionar, remover ou alterar permissões, você deve editar este arquivo e reiniciar a aplicação.")
+
+        if caminho_diretorio:
+            with st.form("form_usuario", clear_on_submit=True):
+                st.markdown("**Adicionar, alterar ou remover usuário**")
+                col_email, col_nome, col_funcao = st.columns([2, 2, 1])
+                email = col_email.text_input("E-mail")
+                nome = col_nome.text_input("Nome")
+                funcao = col_funcao.selectbox("Função", ["user", "admin"])
+                col_salvar, col_remover = st.columns(2)
+                salvar = col_salvar.form_submit_button("Salvar Usuário", use_container_width=True)
+                remover = col_remover.form_submit_button("Remover Usuário", use_container_width=True)
+            if (salvar or remover) and not email.strip():
+                st.warning("Informe o e-mail do usuário.")
+            elif salvar:
+                user_directory.salvar_usuario(caminho_diretorio, email, nome, funcao)
+                auth_utils.get_user_directory_version.clear()
+                st.success(f"Usuário {email.strip()} salvo.")
+            elif remover:
+                if user_directory.remover_usuario(caminho_diretorio, email):
+                    auth_utils.get_user_directory_version.clear()
+                    st.success(f"Usuário {email.strip()} removido.")
+                else:
+                    st.warning(f"Nenhum usuário com o e-mail {email.strip()}.")
+
+        def _voltar_primeira_pagina():
+            st.session_state.admin_pagina_usuarios = 1
+
+        col_busca, col_tamanho = st.columns([3, 1])
+        busca = col_busca.text_input("Buscar por nome ou e-mail", key="admin_busca_usuarios", on_change=_voltar_primeira_pagina)
+        por_pagina = col_tamanho.selectbox("Por página", [25, 50, 100], index=1, key="admin_por_pagina_usuarios", on_change=_voltar_primeira_pagina)
+        pagina = st.session_state.get("admin_pagina_usuarios", 1)
         try:
-            users_df = auth_utils.get_users_for_display()
-            st.dataframe(users_df, use_container_width=True)
+            users_df, total = auth_utils.search_users(busca, pagina, por_pagina)
+            total_paginas = max(1, -(-total // por_pagina))
+            if pagina > total_paginas:
+                pagina = st.session_state.admin_pagina_usuarios = total_paginas
+                users_df, total = auth_utils.search_users(busca, pagina, por_pagina)
+            st.dataframe(users_df, use_container_width=True, hide_index=True)
+            col_pagina, col_total = st.columns([1, 3])
+            col_pagina.number_input("Página", min_value=1, max_value=total_paginas, step=1, key="admin_pagina_usuarios")
+            col_total.caption(f"{total} usuário(s) encontrado(s) · página {pagina} de {total_paginas}")
         except Exception as e:
             st.error(f"Não foi possível carregar a lista de usuários: {e}")
 
@@ -368,9 +457,111 @@ def exibir_pagina_admin():
         st.write("Esta área pode ser usada para outras configurações do sistema.")
         if st.button("Limpar Cache de Dados"):
             st.cache_data.clear()
+            auth_utils.get_user_index.clear()
             st.success("O cache de dados foi limpo com sucesso!")
 
+        st.subheader("Cache de Extrações da IA")
+        extraction_cache = get_extraction_cache()
+        stats = extraction_cache.stats()
+        cols = st.columns(4)
+        cols[0].metric("Acertos (memória)", stats['hits_memoria'])
+        cols[1].metric("Acertos (disco)", stats['hits_disco'])
+        cols[2].metric("Falhas", stats['misses'])
+        cols[3].metric("Taxa de Acerto", f"{stats['taxa_acerto']:.0%}")
+        if st.button("Limpar Cache de Extrações"):
+            extraction_cache.clear()
+            st.success("O cache de extrações foi limpo com sucesso!")
+
+        st.subheader("Cache de Respostas da IA")
+        answer_cache = get_answer_cache()
+        stats = answer_cache.stats()
+        cols = st.columns(4)
+        cols[0].metric("Acertos (idênticas)", stats['hits_exatos'])
+        cols[1].metric("Acertos (similares)", stats['hits_similares'])
+        cols[2].metric("Falhas", stats['misses'])
+        cols[3].metric("Taxa de Acerto", f"{stats['taxa_acerto']:.0%}")
+        if st.button("Limpar Cache de Respostas"):
+            answer_cache.clear()
+            st.success("O cache de respostas foi limpo com sucesso!")
+
+def exibir_pagina_historico():
+    """Desenha o painel do histórico de treinamentos, a partir dos agregados pré-calculados."""
+    st.header("📈 Histórico de Treinamentos")
+    admin = auth_utils.is_admin()
+    # Fora do perfil admin, tudo (inclusive as opções dos filtros) fica restrito ao próprio instrutor
+    proprio = None if admin else getattr(st.user, "email", None)
+    if not admin:
+        if not proprio:
+            st.warning("Não foi possível identificar o usuário logado.")
+            return
+        st.info("Você está vendo apenas os treinamentos registrados por você.")
+
+    try:
+        titulos = historico.listar_valores("titulo", instrutor=proprio)
+        meses = historico.listar_valores("mes", instrutor=proprio)
+        instrutores = historico.listar_valores("instrutor") if admin else []
+    except (sqlite3.Error, OSError) as e:
+        st.error(f"Não foi possível abrir o histórico: {e}")
+        return
+    if not meses:
+        st.info("Nenhum treinamento registrado ainda. Os treinamentos são gravados ao calcular os resultados finais.")
+        return
+
+    cols = st.columns(4)
+    titulo = cols[0].selectbox("Título", ["Todos"] + titulos)
+    instrutor = cols[1].selectbox("Instrutor", ["Todos"] + instrutores) if admin else proprio
+    mes_inicio = cols[2].selectbox("De", meses, index=0)
+    mes_fim = cols[3].selectbox("Até", meses, index=len(meses) - 1)
+    filtros = {
+        "titulo": None if titulo == "Todos" else titulo,
+        "instrutor": None if instrutor == "Todos" else instrutor,
+        "mes_inicio": mes_inicio,
+        "mes_fim": mes_fim,
+    }
+
+    dimensao_rotulo = st.radio("Agrupar por", list(historico.DIMENSOES), horizontal=True)
+    dimensao = historico.DIMENSOES[dimensao_rotulo]
+    agregados = historico.consultar_agregados(dimensao, **filtros)
+    if agregados.empty:
+        st.info("Nenhum treinamento encontrado para os filtros selecionados.")
+        return
 
+    participantes = int(agregados["participantes"].sum())
+    cols = st.columns(4)
+    cols[0].metric("Treinamentos", int(agregados["treinamentos"].sum()))
+    cols[1].metric("Participantes", participantes)
+    cols[2].metric("Taxa de Aprovação", f"{agregados['aprovados'].sum() / participantes:.0%}" if participantes else "-")
+    cols[3].metric("Nota Média", f"{(agregados['nota_media'] * agregados['participantes']).sum() / participantes:.2f}" if participantes else "-")
+
+    tabela = agregados.rename(columns={
+        dimensao: dimensao_rotulo, "treinamentos": "Treinamentos", "participantes": "Participantes",
+        "aprovados": "Aprovados", "reprovados_nota": "Reprovados por Nota",
+        "reprovados_frequencia": "Reprovados por Frequência", "taxa_aprovacao": "Taxa de Aprovação",
+        "nota_media": "Nota Média",
+    })
+    st.bar_chart(tabela.set_index(dimensao_rotulo)[["Aprovados", "Reprovados por Nota", "Reprovados por Frequência"]])
+    st.dataframe(
+        tabela.style.format({"Taxa de Aprovação": "{:.0%}", "Nota Média": "{:.2f}"}),
+        use_container_width=True, hide_index=True
+    )
+
+    st.subheader("Treinamentos Recentes")
+    recentes = historico.listar_treinamentos(**filtros)
+    st.dataframe(
+        recentes.drop(columns=["id", "instrutor"]).rename(columns={
+            "data": "Data", "titulo": "Título", "instrutor_nome": "Instrutor", "participantes": "Participantes",
+            "aprovados": "Aprovados", "reprovados_nota": "Reprovados por Nota", "reprovados_frequencia": "Reprovados por Frequência",
+        }),
+        use_container_width=True, hide_index=True
+    )
+    opcoes = {f"{t.data} · {t.titulo} · {t.instrutor_nome or t.instrutor}": t.id for t in recentes.itertuples()}
+    selecionado = st.selectbox("Ver resultados individuais", [None] + list(opcoes), format_func=lambda o: o or "Selecione um treinamento")
+    if selecionado:
+        treinamento_id = opcoes[selecionado]
+        st.dataframe(formatar_resultados(historico.carregar_resultados(treinamento_id)), use_container_width=True, hide_index=True)
+        if admin and st.button("🗑️ Remover do Histórico"):
+            historico.remover_treinamento(treinamento_id)
+            st.rerun()
 
 def exibir_pagina_ajuda():
     """Desenha a interface da página de Ajuda e Demonstração."""
@@ -402,12 +593,12 @@ def exibir_pagina_ajuda():
     with st.expander("Passo 2: Carregar a Lista de Colaboradores"):
         st.markdown("""
         - **Opção A (Recomendada):** Clique em "Procurar arquivos" para selecionar o relatório de presença (CSV, XLSX ou PDF). Em seguida, clique em "Processar Arquivo com IA". A lista de colaboradores aparecerá na tela principal.
-        - **Opção B (Manual):** Clique em "Adicionar Colaborador Manualmente" para adicionar linhas de formulário vazias, uma por uma.
+        - **Opção B (Manual):** Clique em "Adicionar Colaborador Manualmente" (ou use a última linha da grade) para incluir colaboradores, um por um.
         """)
 
     with st.expander("Passo 3: Preenchimento dos Dados e Cálculo"):
         st.markdown("""
-        1.  **Preenchimento:** Para cada colaborador na lista, preencha os campos obrigatórios: "Check-ins Pontuais", "Interações Válidas" e "Acertos na Prova". O sistema não permitirá o cálculo com campos vazios.
+        1.  **Preenchimento:** Na grade de colaboradores, preencha as colunas obrigatórias: "Check-ins Pontuais", "Interações Válidas" e "Acertos na Prova". Use "Ações em lote" para aplicar o mesmo valor a todos (ex: acertos ou frequência OK). O sistema não permitirá o cálculo com campos vazios ou fora dos limites.
         2.  **Calcular:** Após preencher tudo, clique no botão "Calcular Resultados Finais". Uma tabela com as notas e o status de cada um será exibida na tela.
         """)
 
@@ -0,0 +1,87 @@
+import pytest
+
+from IA import cache as cache_module
+from IA.cache import AnswerCache, normalizar_pergunta
+
+DOCS = "d" * 64
+
+
+def test_pergunta_normalizada_igual_e_acerto_exato():
+    cache = AnswerCache()
+    cache.set(DOCS, "Qual é a carga horária mínima?", "8 horas")
+
+    assert cache.get(DOCS, "  qual É a CARGA horaria minima ") == ("8 horas", 1.0)
+    assert normalizar_pergunta("Qual é a carga horária mínima?") == "qual e a carga horaria minima"
+
+
+def test_pergunta_parecida_reaproveita_a_resposta():
+    cache = AnswerCache(limiar=0.75)
+    cache.set(DOCS, "Qual a carga horária mínima?", "8 horas")
+
+    resposta, similaridade = cache.get(DOCS, "Qual seria a carga horária mínima?")
+
+    assert resposta == "8 horas"
+    assert 0.75 <= similaridade < 1.0
+    assert cache.get(DOCS, "Qual a carga horária mínima exigida?") is None
+    assert (cache.stats()["hits_similares"], cache.stats()["misses"]) == (1, 1)
+
+
+def test_numeros_diferentes_nunca_sao_equivalentes():
+    cache = AnswerCache(limiar=0.5)
+    cache.set(DOCS, "Quem faltou no dia 12?", "Ana")
+
+    assert cache.get(DOCS, "Quem faltou no dia 13?") is None
+    assert cache.get(DOCS, "Quem faltou no dia 12 ?") == ("Ana", 1.0)
+    assert cache.stats()["misses"] == 1
+
+
+def test_respostas_sao_separadas_por_documento():
+    cache = AnswerCache()
+    cache.set(DOCS, "Qual o instrutor?", "Carlos")
+
+    assert cache.get("e" * 64, "Qual o instrutor?") is None
+
+
+def test_itens_expiram_apos_o_ttl(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: agora[0])
+    cache = AnswerCache(ttl_segundos=60, limiar=0.5)
+    cache.set(DOCS, "Qual o instrutor do curso?", "Carlos")
+
+    agora[0] += 59
+    assert cache.get(DOCS, "Qual o instrutor do curso?") == ("Carlos", 1.0)
+
+    agora[0] += 2
+    assert cache.get(DOCS, "Qual o instrutor do curso?") is None
+    assert cache.get(DOCS, "Qual é o instrutor do curso") is None
+    assert cache.stats()["itens"] == 0
+    assert cache._indices == {}
+
+
+def test_menos_usado_e_removido_alem_do_limite():
+    cache = AnswerCache(max_itens=2)
+    cache.set(DOCS, "Pergunta um", "1")
+    cache.set(DOCS, "Pergunta dois", "2")
+    cache.get(DOCS, "Pergunta um")
+    cache.set(DOCS, "Pergunta tres", "3")
+
+    assert cache.get(DOCS, "Pergunta dois") is None
+    assert cache.get(DOCS, "Pergunta um") == ("1", 1.0)
+    assert cache.stats()["itens"] == 2
+
+
+def test_regravar_a_pergunta_substitui_a_resposta():
+    cache = AnswerCache()
+    cache.set(DOCS, "Qual o local?", "Sala 1")
+    cache.set(DOCS, "qual o local", "Sala 2")
+
+    assert cache.get(DOCS, "Qual o local?") == ("Sala 2", 1.0)
+    assert cache._indices[DOCS].perguntas == ["qual o local"]
+
+
+@pytest.mark.parametrize("pergunta", ["", "?!"])
+def test_pergunta_sem_texto_nao_quebra_o_indice(pergunta):
+    cache = AnswerCache()
+    cache.set(DOCS, "Qual o local?", "Sala 1")
+
+    assert cache.get(DOCS, pergunta) is None
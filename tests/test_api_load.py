@@ -0,0 +1,33 @@
+import logging
+
+import pytest
+
+from IA import api_load
+
+
+@pytest.fixture
+def sem_chave(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(api_load, "_client", None)
+    monkeypatch.setattr(api_load, "_api_error", None)
+
+
+def test_falha_sem_chave_e_memorizada(sem_chave, monkeypatch, caplog):
+    chamadas = []
+    original = api_load.load_api
+    monkeypatch.setattr(api_load, "load_api", lambda: chamadas.append(1) or original())
+
+    with caplog.at_level(logging.ERROR):
+        assert api_load.get_client() is None
+        assert api_load.get_client() is None
+
+    assert len(chamadas) == 1
+    assert "GOOGLE_API_KEY" in api_load.get_api_error()
+    assert sum("API key not found" in r.getMessage() for r in caplog.records) == 1
+
+
+def test_load_api_nao_usa_streamlit_fora_do_script(sem_chave, monkeypatch):
+    monkeypatch.setattr(api_load.st, "error", lambda *args, **kwargs: pytest.fail("st.error chamado"))
+
+    with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+        api_load.load_api()
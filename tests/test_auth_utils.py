@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from auth import auth_utils, user_directory
+
+
+@pytest.fixture
+def sessao(monkeypatch):
+    """Substitui st.user e st.session_state por objetos simples, fora do runtime do Streamlit."""
+    st_falso = SimpleNamespace(user=SimpleNamespace(email="ana@empresa.com", name="Ana"), session_state={})
+    monkeypatch.setattr(auth_utils, "st", st_falso)
+    return st_falso
+
+
+@pytest.fixture
+def buscas(monkeypatch):
+    """Conta as buscas feitas no diretório de usuários."""
+    chamadas = []
+    original = auth_utils.get_user_info
+    monkeypatch.setattr(auth_utils, "get_user_info", lambda email: chamadas.append(email) or original(email))
+    return chamadas
+
+
+def _usar_secrets(monkeypatch, usuarios):
+    indice = {u["email"]: {**u, "role": u.get("role", "user"), "display_name": u.get("name")} for u in usuarios}
+    monkeypatch.setattr(auth_utils, "get_user_directory_path", lambda: None)
+    monkeypatch.setattr(auth_utils, "get_user_index", lambda: indice)
+
+
+def test_busca_feita_uma_vez_por_sessao(sessao, buscas, monkeypatch):
+    _usar_secrets(monkeypatch, [{"email": "ana@empresa.com", "name": "Ana Lima", "role": "admin"}])
+
+    assert auth_utils.is_user_authorized()
+    assert auth_utils.is_admin()
+    assert auth_utils.get_user_display_name() == "Ana Lima"
+    assert buscas == ["ana@empresa.com"]
+
+
+def test_troca_de_email_ou_de_indice_refaz_a_busca(sessao, buscas, monkeypatch):
+    _usar_secrets(monkeypatch, [{"email": "ana@empresa.com", "role": "admin"}])
+    assert auth_utils.is_admin()
+
+    sessao.user = SimpleNamespace(email="bruno@empresa.com", name="Bruno")
+    assert not auth_utils.is_user_authorized()
+
+    # Índice recarregado do secrets (novo objeto): a busca é refeita
+    _usar_secrets(monkeypatch, [{"email": "bruno@empresa.com"}])
+    assert auth_utils.is_user_authorized()
+    assert auth_utils.get_user_role() == "user"
+    assert buscas == ["ana@empresa.com", "bruno@empresa.com", "bruno@empresa.com"]
+
+
+def test_nova_versao_do_diretorio_sqlite_refaz_a_busca(sessao, buscas, monkeypatch, tmp_path):
+    caminho = str(tmp_path / "usuarios.db")
+    user_directory.salvar_usuario(caminho, "ana@empresa.com", "Ana", "user")
+    monkeypatch.setattr(auth_utils, "get_user_directory_path", lambda: caminho)
+    # Sem o cache de 5 segundos, para a mudança de versão ser vista de imediato
+    monkeypatch.setattr(auth_utils, "get_user_directory_version", user_directory.versao)
+
+    assert not auth_utils.is_admin()
+    assert not auth_utils.is_admin()
+    assert len(buscas) == 1
+
+    user_directory.salvar_usuario(caminho, "ana@empresa.com", "Ana", "admin")
+    assert auth_utils.is_admin()
+    assert len(buscas) == 2
+
+
+def test_visitante_sem_email_nao_consulta_o_diretorio(sessao, buscas):
+    sessao.user = SimpleNamespace()
+
+    assert not auth_utils.is_user_authorized()
+    assert auth_utils.get_user_display_name() == "Visitante"
+    assert buscas == []
+    assert sessao.session_state == {}
@@ -0,0 +1,89 @@
+from IA import chunking
+from IA.AI_operations import RateLimiter
+from IA.backends import LocalBackend
+from IA.cache import ExtractionCache
+from IA.pdf_qa import PDFQA
+
+
+def _pdf_qa(tmp_path):
+    pdf_qa = PDFQA(backend=LocalBackend(), limiter=RateLimiter(rpm_limit=1000, tpm_limit=10_000_000))
+    pdf_qa.cache = ExtractionCache(str(tmp_path))
+    return pdf_qa
+
+
+def test_arquivo_em_partes_consulta_o_cache_uma_vez(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunking, "dividir_arquivo", lambda dados, mime: [b"parte 1", b"parte 2", b"parte 3"])
+    pdf_qa = _pdf_qa(tmp_path)
+
+    dados, do_cache = pdf_qa.extract_data(b"arquivo grande", "text/csv", "prompt")
+    assert (dados, do_cache) == ([], False)
+    assert pdf_qa.cache.stats()["misses"] == 1
+    assert len(list(pdf_qa.cache.diretorio.glob("*.json"))) == 1
+
+    _, do_cache = pdf_qa.extract_data(b"arquivo grande", "text/csv", "prompt")
+    stats = pdf_qa.cache.stats()
+    assert do_cache
+    assert (stats["hits_memoria"], stats["misses"]) == (1, 1)
+
+
+def test_gravacao_nao_percorre_o_diretorio_abaixo_do_limite(tmp_path, monkeypatch):
+    cache = ExtractionCache(str(tmp_path))
+    varreduras = []
+    original = cache._arquivos_disco
+    monkeypatch.setattr(cache, "_arquivos_disco", lambda: varreduras.append(1) or original())
+
+    for i in range(20):
+        cache.set(f"{i:064x}", {"registro": i})
+    cache.set(f"{0:064x}", {"registro": "substituído"})
+
+    assert varreduras == []
+    assert cache._bytes_disco == sum(p.stat().st_size for p in cache.diretorio.glob("*.json"))
+
+
+def test_excedente_remove_os_arquivos_menos_usados(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_bytes_disco=100)
+    for i in range(6):
+        cache.set(f"{i:064x}", {"dados": "x" * 20})
+
+    restantes = sorted(p.stem for p in cache.diretorio.glob("*.json"))
+    assert cache._bytes_disco <= 100
+    assert cache._bytes_disco == sum(p.stat().st_size for p in cache.diretorio.glob("*.json"))
+    assert f"{5:064x}" in restantes and f"{0:064x}" not in restantes
+
+
+def test_tamanho_em_disco_e_lido_na_abertura(tmp_path):
+    ExtractionCache(str(tmp_path)).set("a" * 64, {"dados": [1, 2, 3]})
+
+    reaberto = ExtractionCache(str(tmp_path))
+
+    assert reaberto._bytes_disco == (reaberto.diretorio / f"{'a' * 64}.json").stat().st_size
+    reaberto.clear()
+    assert reaberto._bytes_disco == 0
+
+
+def test_memoria_descarta_o_item_menos_usado(tmp_path):
+    cache = ExtractionCache(str(tmp_path), max_itens_memoria=2)
+    cache.set("a" * 64, {"item": "a"})
+    cache.set("b" * 64, {"item": "b"})
+    cache.get("a" * 64)
+    cache.set("c" * 64, {"item": "c"})
+
+    assert list(cache._memoria) == ["a" * 64, "c" * 64]
+    # O item descartado da memória continua disponível no disco
+    assert cache.get("b" * 64) == {"item": "b"}
+    stats = cache.stats()
+    assert (stats["hits_memoria"], stats["hits_disco"], stats["misses"]) == (1, 1, 0)
+    assert list(cache._memoria) == ["c" * 64, "b" * 64]
+
+
+def test_sem_disco_o_cache_fica_em_memoria(tmp_path):
+    arquivo = tmp_path / "arquivo"
+    arquivo.write_text("não é um diretório")
+    cache = ExtractionCache(str(arquivo))
+
+    cache.set("a" * 64, [1])
+
+    assert cache.diretorio is None
+    assert cache.get("a" * 64) == [1]
+    assert cache.get("b" * 64) is None
+    assert cache.stats()["misses"] == 1
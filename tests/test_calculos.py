@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from end.calculos import calcular_notas_em_lote, determinar_status, processar_dados_colaboradores
+
+
+def _colaboradores(**dtypes):
+    df = pd.DataFrame({
+        "nome": ["Ana", "Bruno", "Carla", ""],
+        "check_ins_pontuais": [2, 1, None, 2],
+        "interacoes": [4, 2, 3, 4],
+        "acertos": [10, 5, 2, 10],
+        "frequencia": [True, True, None, True],
+    })
+    return df.astype(dtypes)
+
+
+def test_tipos_anulaveis_sao_aceitos():
+    resultado = calcular_notas_em_lote(
+        _colaboradores(check_ins_pontuais="Int64", interacoes="Int64", acertos="Int64", frequencia="boolean"), 4, 2
+    )
+
+    assert resultado["Colaborador"].tolist() == ["Ana", "Bruno", "Carla"]
+    assert resultado["Check-ins Pontuais"].tolist() == [2, 1, 0]
+    assert resultado["Nota Final"].tolist() == pytest.approx([10.0, 5.0, 2.7])
+    assert resultado["Frequência OK?"].tolist() == [True, True, False]
+    assert resultado["Status"].tolist() == ["Aprovado", "Reprovado por Nota", "Reprovado por Frequência"]
+
+
+def test_resultado_igual_ao_calculo_por_colaborador():
+    anulaveis = calcular_notas_em_lote(
+        _colaboradores(check_ins_pontuais="Int64", interacoes="Int64", acertos="Int64", frequencia="boolean"), 4, 2
+    )
+    objeto = calcular_notas_em_lote(_colaboradores(), 4, 2)
+
+    pd.testing.assert_frame_equal(anulaveis, objeto)
+    for _, linha in anulaveis.iterrows():
+        assert linha["Status"] == determinar_status(linha["Nota Final"], linha["Frequência OK?"])
+
+
+def test_totais_zerados_dao_nota_maxima():
+    resultado = processar_dados_colaboradores(
+        [{"nome": "Ana", "check_ins_pontuais": 0, "interacoes": 0, "acertos": 5, "frequencia": True}], 0, 0
+    )
+
+    assert resultado[0]["Nota Final"] == pytest.approx(7.0)
+    assert resultado[0]["Check-ins Pontuais"] == "0/0"
+    assert resultado[0]["Status"] == "Aprovado"
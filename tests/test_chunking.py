@@ -0,0 +1,57 @@
+from IA import chunking
+
+
+def _registro(nome, horario, acao="Joined"):
+    return {"Full Name": nome, "Timestamp": f"10/13/2025, {horario}", "Action": acao}
+
+
+def test_mesclar_remove_repeticao_na_quebra_entre_partes():
+    primeira = [_registro("Ana", "9:00:00 AM"), _registro("Bruno", "9:01:00 AM")]
+    segunda = [_registro("Bruno", "9:01:00 AM"), _registro("Carla", "9:02:00 AM")]
+
+    mesclados = chunking.mesclar_registros([primeira, segunda])
+
+    assert [r["Full Name"] for r in mesclados] == ["Ana", "Bruno", "Carla"]
+
+
+def test_mesclar_mantem_linhas_identicas_fora_da_quebra():
+    repetido = _registro("Ana", "9:00:00 AM")
+    outros = [_registro(f"Pessoa {i}", f"9:{i:02d}:00 AM") for i in range(1, 12)]
+    # A mesma linha aparece legitimamente no início e no fim do arquivo, longe da quebra
+    primeira = [repetido] + outros
+    segunda = [_registro(f"Outro {i}", "10:05:00 AM") for i in range(7)] + [repetido]
+
+    mesclados = chunking.mesclar_registros([primeira, segunda])
+
+    assert mesclados.count(repetido) == 2
+    assert len(mesclados) == len(primeira) + len(segunda)
+
+
+def test_mesclar_mantem_duplicatas_dentro_da_mesma_parte():
+    registro = _registro("Ana", "9:00:00 AM", "Left")
+
+    assert chunking.mesclar_registros([[registro, registro]]) == [registro, registro]
+
+
+def test_mesclar_ignora_itens_que_nao_sao_registros():
+    registro = _registro("Ana", "9:00:00 AM")
+
+    assert chunking.mesclar_registros([[registro, "lixo", None], None, []]) == [registro]
+
+
+def test_dividir_arquivo_aceita_csv_latin1():
+    texto = "Full Name\tUser Action\tTimestamp\nConceição Simões\tJoined\t10/13/2025, 9:00:00 AM\n"
+
+    partes = chunking.dividir_arquivo(texto.encode("cp1252"), "text/csv")
+
+    assert b"".join(partes).decode("utf-8").count("Conceição Simões") == 1
+
+
+def test_dividir_csv_repete_cabecalho_em_cada_parte():
+    linhas = ["Full Name\tUser Action\tTimestamp"] + [f"Pessoa {i}\tJoined\t10/13/2025, 9:00:00 AM" for i in range(200)]
+
+    partes = chunking.dividir_csv("\n".join(linhas), max_tokens=500)
+
+    assert len(partes) > 1
+    assert all(parte.startswith(linhas[0]) for parte in partes)
+    assert sum(len(parte.splitlines()) - 1 for parte in partes) == 200
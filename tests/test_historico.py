@@ -0,0 +1,100 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from end import historico
+from end.calculos import calcular_notas_em_lote
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "historico.db")
+
+
+def _resultados(*colaboradores):
+    """Resultados de `calcular_notas_em_lote` para tuplas (nome, check-ins, interações, acertos, frequência)."""
+    entrada = pd.DataFrame(colaboradores, columns=["nome", "check_ins_pontuais", "interacoes", "acertos", "frequencia"])
+    return calcular_notas_em_lote(entrada, total_oportunidades=4, total_check_ins=4)
+
+
+def _registrar(caminho, resultados, titulo="NR-35", instrutor="ana@empresa.com", data=date(2025, 10, 13), **kwargs):
+    return historico.registrar_treinamento(resultados, titulo, instrutor, 4, 4, data=data, caminho=caminho, **kwargs)
+
+
+def _recontagem(caminho) -> pd.DataFrame:
+    """Totais por título recalculados direto da tabela de treinamentos, para comparar com os agregados."""
+    with historico.conectar(caminho) as conexao:
+        return pd.read_sql_query(
+            "SELECT titulo, COUNT(*) AS treinamentos, SUM(participantes) AS participantes, SUM(aprovados) AS aprovados, "
+            "SUM(reprovados_nota) AS reprovados_nota, SUM(reprovados_frequencia) AS reprovados_frequencia "
+            "FROM treinamentos GROUP BY titulo ORDER BY titulo",
+            conexao,
+        )
+
+
+TURMA = _resultados(
+    ("Ana", 4, 4, 10, True),    # Aprovado
+    ("Bruno", 0, 0, 2, True),   # Reprovado por nota
+    ("Carla", 4, 4, 10, False), # Reprovado por frequência
+)
+
+
+def test_agregados_acompanham_inclusoes(caminho):
+    _registrar(caminho, TURMA)
+    _registrar(caminho, TURMA.iloc[:1])
+    _registrar(caminho, TURMA, titulo="NR-10", data=date(2025, 11, 3))
+
+    agregados = historico.consultar_agregados("titulo", caminho=caminho)
+
+    pd.testing.assert_frame_equal(agregados[_recontagem(caminho).columns], _recontagem(caminho), check_dtype=False)
+    nr35 = agregados.set_index("titulo").loc["NR-35"]
+    assert (nr35["treinamentos"], nr35["participantes"], nr35["aprovados"]) == (2, 4, 2)
+    assert nr35["taxa_aprovacao"] == pytest.approx(0.5)
+    assert nr35["nota_media"] == pytest.approx((TURMA["Nota Final"].sum() + TURMA["Nota Final"].iloc[0]) / 4)
+
+
+def test_substituir_e_remover_atualizam_agregados(caminho):
+    primeiro = _registrar(caminho, TURMA)
+    outro = _registrar(caminho, TURMA, titulo="NR-10")
+    substituto = _registrar(caminho, TURMA.iloc[:1], substituir_id=primeiro)
+
+    nr35 = historico.consultar_agregados("titulo", caminho=caminho).set_index("titulo").loc["NR-35"]
+    assert (nr35["treinamentos"], nr35["participantes"], nr35["aprovados"]) == (1, 1, 1)
+
+    assert historico.remover_treinamento(substituto, caminho=caminho)
+    assert not historico.remover_treinamento(substituto, caminho=caminho)
+    assert historico.listar_valores("titulo", caminho=caminho) == ["NR-10"]
+    # Os resultados individuais saem junto com o treinamento
+    assert historico.carregar_resultados(substituto, caminho=caminho).empty
+
+    historico.remover_treinamento(outro, caminho=caminho)
+    assert historico.consultar_agregados("titulo", caminho=caminho).empty
+
+
+def test_filtros_por_instrutor_e_periodo(caminho):
+    _registrar(caminho, TURMA, titulo="NR-35", instrutor="ana@empresa.com", data=date(2025, 10, 13))
+    _registrar(caminho, TURMA, titulo="NR-10", instrutor="ana@empresa.com", data=date(2025, 12, 1))
+    _registrar(caminho, TURMA, titulo="NR-33", instrutor="bia@empresa.com", data=date(2025, 11, 3))
+
+    assert historico.listar_valores("titulo", instrutor="ana@empresa.com", caminho=caminho) == ["NR-10", "NR-35"]
+    assert historico.listar_valores("mes", instrutor="ana@empresa.com", caminho=caminho) == ["2025-10", "2025-12"]
+    assert historico.listar_valores("mes", caminho=caminho) == ["2025-10", "2025-11", "2025-12"]
+
+    por_mes = historico.consultar_agregados("mes", mes_inicio="2025-11", mes_fim="2025-12", caminho=caminho)
+    assert por_mes["mes"].tolist() == ["2025-11", "2025-12"]
+    recentes = historico.listar_treinamentos(instrutor="bia@empresa.com", caminho=caminho)
+    assert recentes["titulo"].tolist() == ["NR-33"]
+
+
+def test_carregar_resultados_devolve_colunas_do_calculo(caminho):
+    treinamento_id = _registrar(caminho, TURMA)
+
+    carregados = historico.carregar_resultados(treinamento_id, caminho=caminho)
+
+    pd.testing.assert_frame_equal(carregados, TURMA, check_dtype=False)
+
+
+def test_dimensao_invalida(caminho):
+    with pytest.raises(ValueError):
+        historico.listar_valores("titulo; DROP TABLE agregados", caminho=caminho)
@@ -0,0 +1,43 @@
+import time
+
+from utils import jobs
+
+
+def _esperar(fila, job, limite=5.0):
+    fim = time.time() + limite
+    while not job.finalizado and time.time() < fim:
+        time.sleep(0.01)
+    return fila.get(job.id)
+
+
+def test_job_concluido_publica_resultado_e_horario():
+    fila = jobs.JobQueue(num_workers=1)
+    job = _esperar(fila, fila.submit(lambda x, progresso: x * 2, 21))
+    assert job.status == jobs.CONCLUIDO
+    assert job.resultado == 42
+    assert job.progresso == 1.0
+    assert job.finalizado_em is not None
+
+
+def test_job_com_erro_guarda_mensagem():
+    def falhar(progresso):
+        raise ValueError("arquivo inválido")
+
+    fila = jobs.JobQueue(num_workers=1)
+    job = _esperar(fila, fila.submit(falhar))
+    assert job.status == jobs.ERRO
+    assert job.erro == "arquivo inválido"
+    assert job.finalizado_em is not None
+
+
+def test_descarte_ignora_job_sem_horario_de_finalizacao():
+    fila = jobs.JobQueue(num_workers=1)
+    antigo = jobs.Job("antigo")
+    antigo.status, antigo.finalizado_em = jobs.CONCLUIDO, time.time() - jobs.RETENCAO_SEGUNDOS - 1
+    inconsistente = jobs.Job("inconsistente")
+    inconsistente.status = jobs.CONCLUIDO
+    fila._jobs = {antigo.id: antigo, inconsistente.id: inconsistente}
+
+    fila._descartar_antigos()
+
+    assert list(fila._jobs) == [inconsistente.id]
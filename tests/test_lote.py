@@ -0,0 +1,109 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.gerador import exportar_csv, gerar_sessoes
+from end import lote
+
+
+def _colaborador(nome, check_ins=2, frequencia=True):
+    return {"nome": nome, "check_ins_pontuais": check_ins, "interacoes": 0, "acertos": 0, "frequencia": frequencia}
+
+
+def _notas(*linhas, colunas=("nome", "acertos", "interacoes")):
+    df = pd.DataFrame(linhas, columns=list(colunas))
+    return df.set_index(df["nome"].map(lote._normalizar_nome))
+
+
+def test_combinar_notas_casa_nomes_normalizados():
+    colaboradores = [_colaborador("João  da Silva"), _colaborador("Maria Souza", check_ins=1)]
+    notas = _notas(("joão da silva", 8, 3), ("MARIA SOUZA", 6, 4))
+
+    combinado, avisos = lote.combinar_notas(colaboradores, notas)
+
+    assert avisos == []
+    assert combinado["nome"].tolist() == ["João  da Silva", "Maria Souza"]
+    assert combinado["acertos"].tolist() == [8, 6]
+    assert combinado["interacoes"].tolist() == [3, 4]
+    assert combinado["check_ins_pontuais"].tolist() == [2, 1]
+
+
+def test_combinar_notas_sem_notas_e_sem_presenca():
+    colaboradores = [_colaborador("Ana Lima"), _colaborador("Bruno Alves")]
+    notas = _notas(("Ana Lima", 9, 4), ("Carla Gomes", 10, 4))
+
+    combinado, avisos = lote.combinar_notas(colaboradores, notas)
+
+    por_nome = combinado.set_index("nome")
+    assert por_nome.loc["Bruno Alves", ["acertos", "interacoes"]].tolist() == [0, 0]
+    assert por_nome.loc["Carla Gomes", ["acertos", "check_ins_pontuais"]].tolist() == [10, 0]
+    assert not por_nome.loc["Carla Gomes", "frequencia"]
+    assert len(avisos) == 2
+    assert "Bruno Alves" in avisos[0] and "Carla Gomes" in avisos[1]
+
+
+def test_combinar_notas_check_ins_informados_substituem_os_calculados():
+    colaboradores = [_colaborador("Ana Lima", check_ins=1), _colaborador("Bruno Alves", check_ins=2)]
+    notas = _notas(("Ana Lima", 9, 4, 2), ("Bruno Alves", 7, 2, None),
+                   colunas=("nome", "acertos", "interacoes", "check_ins_pontuais"))
+
+    combinado, _ = lote.combinar_notas(colaboradores, notas)
+
+    # Célula vazia mantém o valor calculado pela lista de presença
+    assert combinado["check_ins_pontuais"].tolist() == [2, 2]
+
+
+def test_combinar_notas_ignora_nomes_repetidos():
+    colaboradores = [_colaborador("Ana Lima"), _colaborador("ana lima")]
+    notas = _notas(("Ana Lima", 9, 4), ("ANA LIMA", 1, 1))
+
+    combinado, _ = lote.combinar_notas(colaboradores, notas)
+
+    assert combinado[["nome", "acertos"]].values.tolist() == [["Ana Lima", 9]]
+
+
+@pytest.fixture
+def pasta_treinamentos(tmp_path):
+    entrada = tmp_path / "entrada"
+    pasta = entrada / "turma-a"
+    pasta.mkdir(parents=True)
+    sessoes = gerar_sessoes(5, seed=3)
+    (pasta / "presenca.csv").write_bytes(exportar_csv(sessoes, "en"))
+    (pasta / lote.ARQUIVO_CONFIG).write_text(json.dumps({"inicio": "09:00", "duracao_min": 240}), encoding="utf-8")
+    pd.DataFrame({"nome": sessoes["nome"].unique(), "acertos": 8, "interacoes": 4}).to_csv(pasta / "notas.csv", index=False)
+    return str(entrada), str(tmp_path / "saida")
+
+
+def test_hash_considera_as_opcoes_de_saida(pasta_treinamentos):
+    entradas = lote.localizar_entradas(os.path.join(pasta_treinamentos[0], "turma-a"))
+
+    sem_pdf = lote.hash_entradas(entradas)
+    assert lote.hash_entradas(entradas, None) == sem_pdf
+    assert lote.hash_entradas(entradas, "https://exemplo.com/logo.png") != sem_pdf
+    assert lote.hash_entradas(entradas, "https://exemplo.com/outra.png") != lote.hash_entradas(entradas, "https://exemplo.com/logo.png")
+
+
+def test_reexecucao_pula_apenas_com_saidas_presentes(pasta_treinamentos):
+    entrada, saida = pasta_treinamentos
+
+    assert lote.executar(entrada, saida, processos=1, logo_url=None)["concluidos"] == 1
+    assert lote.executar(entrada, saida, processos=1, logo_url=None)["pulados"] == 1
+
+    os.remove(os.path.join(saida, "turma-a", lote.ARQUIVO_RESULTADOS))
+    assert lote.executar(entrada, saida, processos=1, logo_url=None)["concluidos"] == 1
+    assert os.path.exists(os.path.join(saida, "turma-a", lote.ARQUIVO_RESULTADOS))
+
+
+def test_execucao_com_pdf_nao_reaproveita_execucao_sem_pdf(pasta_treinamentos):
+    entrada, saida = pasta_treinamentos
+    lote.executar(entrada, saida, processos=1, logo_url=None)
+
+    destino = os.path.join(saida, "turma-a")
+    assert lote.saidas_esperadas(destino, "https://exemplo.com/logo.png")[-1].endswith(lote.ARQUIVO_RELATORIO)
+    with open(os.path.join(destino, lote.ARQUIVO_HASH), encoding="utf-8") as f:
+        chave_sem_pdf = f.read()
+    entradas = lote.localizar_entradas(os.path.join(entrada, "turma-a"))
+    assert chave_sem_pdf == lote.hash_entradas(entradas, None)
+    assert chave_sem_pdf != lote.hash_entradas(entradas, "https://exemplo.com/logo.png")
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from end.calculos import calcular_notas_em_lote
+
+try:
+    from utils.pdf_generator import create_professional_html
+except (ImportError, OSError) as e:  # WeasyPrint precisa das bibliotecas nativas (Pango)
+    pytest.skip(f"WeasyPrint indisponível: {e}", allow_module_level=True)
+
+
+def _resultados(*nomes):
+    colaboradores = pd.DataFrame({
+        "nome": list(nomes),
+        "check_ins_pontuais": [2] * len(nomes),
+        "interacoes": [4] * len(nomes),
+        "acertos": [10] * len(nomes),
+        "frequencia": [True] * len(nomes),
+    })
+    return calcular_notas_em_lote(colaboradores, 4, 2)
+
+
+def test_nomes_e_titulo_sao_escapados():
+    conteudo = create_professional_html(
+        _resultados("<script>alert(1)</script>", 'Ana "Tom" & Cia', "{0} $aprovados"),
+        None,
+        "NR-35 <b>Altura</b> & Resgate",
+    )
+
+    assert "<script>" not in conteudo and "<b>" not in conteudo
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in conteudo
+    assert "Ana &quot;Tom&quot; &amp; Cia" in conteudo
+    assert "{0} $aprovados" in conteudo
+    assert "NR-35 &lt;b&gt;Altura&lt;/b&gt; &amp; Resgate" in conteudo
+
+
+def test_resumo_e_linhas_da_tabela():
+    conteudo = create_professional_html(_resultados("Ana", "Bruno"), "data:image/png;base64,AAAA", "Treinamento")
+
+    assert conteudo.count('<td class="col-colaborador">') == 2
+    assert '<p class="total-value">2</p>' in conteudo
+    assert '<p class="rate-value">100.0%</p>' in conteudo
+    assert '<img src="data:image/png;base64,AAAA" alt="Logo">' in conteudo
@@ -0,0 +1,38 @@
+from datetime import time
+
+import pytest
+
+from end import pipeline
+
+
+class _PDFQAProibido:
+    def extract_data(self, *args, **kwargs):
+        pytest.fail("A IA não deveria ser chamada")
+
+
+def _processar(conteudo: bytes, pdf_qa=None):
+    return pipeline.processar_lista_presenca(
+        "presenca.csv", "text/csv", conteudo, time(9, 0), 240, 60, 2, 4, pdf_qa=pdf_qa or _PDFQAProibido()
+    )
+
+
+def test_secao_de_atividades_vazia_nao_vai_para_a_ia():
+    conteudo = "1. Summary\nMeeting title\tNR-35\n\n3. In-Meeting Activities\n\n".encode("utf-8")
+
+    with pytest.raises(ValueError, match="está vazia"):
+        _processar(conteudo)
+
+
+def test_exportacao_reconhecida_e_processada_localmente():
+    conteudo = "\n".join([
+        "3. In-Meeting Activities",
+        "Full Name\tUser Action\tTimestamp",
+        "Ana Lima\tJoined\t10/13/2025, 9:00:00 AM",
+        "Ana Lima\tLeft\t10/13/2025, 1:00:00 PM",
+    ]).encode("utf-8")
+
+    resultado = _processar(conteudo)
+
+    assert resultado["origem"] == "local"
+    assert [c["nome"] for c in resultado["colaboradores"]] == ["Ana Lima"]
+    assert resultado["colaboradores"][0]["frequencia"]
@@ -0,0 +1,123 @@
+from datetime import time
+
+import pandas as pd
+import pytest
+
+from end.presenca import calcular_presenca
+
+
+def _eventos(*linhas):
+    return pd.DataFrame(
+        [(nome, pd.Timestamp(timestamp), acao) for nome, timestamp, acao in linhas],
+        columns=['Full Name', 'Timestamp', 'Action'],
+    )
+
+
+def _calcular(eventos, min_presence=60, total_check_ins=2):
+    return calcular_presenca(eventos, time(9, 0), 240, min_presence, total_check_ins)
+
+
+def test_presenca_integral_em_um_dia():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 08:55", "Joined"),
+        ("Ana", "2025-10-13 13:10", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(100.0)
+    assert resultado.loc["Ana", "atraso_minutos"] == pytest.approx(0.0)
+    assert resultado.loc["Ana", "check_ins_pontuais"] == 2
+    assert bool(resultado.loc["Ana", "frequencia_ok"])
+
+
+def test_sessao_que_atravessa_a_meia_noite_conta_um_dia():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-14 00:05", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(100.0)
+    assert resultado.loc["Ana", "check_ins_pontuais"] == 2
+    assert bool(resultado.loc["Ana", "frequencia_ok"])
+
+
+def test_evento_fora_da_janela_em_outro_dia_nao_divide_a_presenca():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-13 13:00", "Left"),
+        ("Bruno", "2025-10-13 09:00", "Joined"),
+        ("Bruno", "2025-10-13 13:00", "Left"),
+        # Entrada avulsa na madrugada seguinte, fora da janela do treinamento
+        ("Bruno", "2025-10-14 02:00", "Joined"),
+        ("Bruno", "2025-10-14 02:10", "Left"),
+    ))
+    assert resultado["presenca_pct"].tolist() == pytest.approx([100.0, 100.0])
+    assert resultado["check_ins_pontuais"].tolist() == [2, 2]
+
+
+def test_treinamento_de_varios_dias():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-13 13:00", "Left"),
+        ("Ana", "2025-10-14 09:00", "Joined"),
+        ("Ana", "2025-10-14 13:00", "Left"),
+        ("Bruno", "2025-10-13 09:30", "Joined"),
+        ("Bruno", "2025-10-13 13:00", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(100.0)
+    assert resultado.loc["Ana", "check_ins_pontuais"] == 2
+    # Meio período a menos no primeiro dia e ausente no segundo: 3,5h de 8h
+    assert resultado.loc["Bruno", "presenca_pct"] == pytest.approx(3.5 / 8 * 100)
+    assert resultado.loc["Bruno", "atraso_minutos"] == pytest.approx(30.0)
+    assert not bool(resultado.loc["Bruno", "frequencia_ok"])
+
+
+def test_entradas_duplicadas_nao_contam_o_tempo_duas_vezes():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-13 09:05", "Joined"),
+        ("Ana", "2025-10-13 11:00", "Left"),
+        ("Ana", "2025-10-13 11:00", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(50.0)
+    assert resultado.loc["Ana", "check_ins_pontuais"] == 1
+
+
+def test_participante_sem_sessao_na_janela_fica_com_presenca_zero():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-13 13:00", "Left"),
+        ("Carlos", "2025-10-13 18:00", "Joined"),
+        ("Carlos", "2025-10-13 18:30", "Left"),
+    ))
+    assert resultado.loc["Carlos", "presenca_pct"] == 0.0
+    assert resultado.loc["Carlos", "check_ins_pontuais"] == 0
+    assert not bool(resultado.loc["Carlos", "frequencia_ok"])
+
+
+def test_saida_avulsa_nao_estica_sessao_encerrada():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-13 10:00", "Left"),
+        ("Ana", "2025-10-13 12:00", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(25.0)
+
+
+def test_dispositivos_sobrepostos_mantem_a_presenca_continua():
+    # Celular entra e sai no meio da sessão do computador, que só sai às 13h
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 09:00", "Joined"),
+        ("Ana", "2025-10-13 09:30", "Joined"),
+        ("Ana", "2025-10-13 10:00", "Left"),
+        ("Ana", "2025-10-13 11:00", "Joined"),
+        ("Ana", "2025-10-13 12:00", "Left"),
+        ("Ana", "2025-10-13 13:00", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(100.0)
+
+
+def test_saida_antes_de_qualquer_entrada_e_ignorada():
+    resultado = _calcular(_eventos(
+        ("Ana", "2025-10-13 08:00", "Left"),
+        ("Ana", "2025-10-13 11:00", "Joined"),
+        ("Ana", "2025-10-13 13:00", "Left"),
+    ))
+    assert resultado.loc["Ana", "presenca_pct"] == pytest.approx(50.0)
@@ -0,0 +1,170 @@
+import asyncio
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from IA.AI_operations import RateLimiter, usage_tokens
+
+
+def test_reconcile_substitui_a_estimativa_pelo_consumo_real():
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=10_000)
+    reserva = limiter.acquire(1_000)
+    limiter.reconcile(reserva, 400)
+    assert limiter.tokens_in_window == 400
+
+
+def test_reconcile_de_reserva_que_saiu_da_janela_nao_altera_o_total():
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=10_000)
+    with mock.patch("IA.AI_operations.time.time", return_value=1_000.0):
+        reserva = limiter.acquire(1_000)
+    # No limite exato da janela: a limpeza remove a reserva e a verificação também a considera vencida
+    with mock.patch("IA.AI_operations.time.time", side_effect=[1_060.0, 1_060.0001]):
+        limiter.reconcile(reserva, 5_000)
+    assert limiter.tokens_in_window == 0
+    assert not limiter.token_usage
+
+
+class _Relogio:
+    """Relógio falso: `sleep` apenas avança o tempo."""
+    def __init__(self, inicio=1_000.0):
+        self.agora = inicio
+        self._lock = threading.Lock()
+
+    def time(self):
+        with self._lock:
+            return self.agora
+
+    def sleep(self, segundos):
+        with self._lock:
+            self.agora += segundos
+
+    async def sleep_async(self, segundos):
+        self.sleep(segundos)
+
+
+def _maximo_por_janela(instantes):
+    instantes = sorted(instantes)
+    return max(bisect.bisect_left(instantes, t + 60) - i for i, t in enumerate(instantes))
+
+
+def test_reservas_concorrentes_nao_perdem_atualizacoes():
+    limiter = RateLimiter(rpm_limit=10_000, tpm_limit=10_000_000)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: limiter.acquire(10), range(800)))
+
+    assert len(limiter.request_timestamps) == 800
+    assert limiter.tokens_in_window == 8_000 == sum(r.tokens for r in limiter.token_usage)
+
+
+def test_threads_respeitam_o_rpm_na_janela():
+    relogio = _Relogio()
+    limiter = RateLimiter(rpm_limit=5, tpm_limit=10_000_000)
+
+    with mock.patch("IA.AI_operations.time.time", relogio.time), \
+            mock.patch("IA.AI_operations.time.sleep", relogio.sleep):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            reservas = list(executor.map(lambda _: limiter.acquire(10), range(20)))
+
+    assert _maximo_por_janela([r.timestamp for r in reservas]) <= 5
+    assert relogio.agora >= 1_000.0 + 3 * 60
+
+
+def test_tpm_bloqueia_ate_liberar_tokens_suficientes():
+    relogio = _Relogio()
+    limiter = RateLimiter(rpm_limit=100, tpm_limit=1_000)
+
+    with mock.patch("IA.AI_operations.time.time", relogio.time), \
+            mock.patch("IA.AI_operations.time.sleep", relogio.sleep):
+        limiter.acquire(600)
+        relogio.sleep(10)
+        limiter.acquire(300)
+        terceira = limiter.acquire(500)
+
+    # Só a saída da primeira reserva (t=1000) libera espaço para os 500 tokens
+    assert terceira.timestamp >= 1_060.0
+    assert limiter.tokens_in_window == 800
+
+
+def test_requisicao_maior_que_o_tpm_e_recusada():
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=1_000)
+
+    with pytest.raises(ValueError, match="excede o limite total de TPM"):
+        limiter.acquire(1_001)
+    assert limiter.tokens_in_window == 0
+
+
+def test_acquire_async_espera_sem_bloquear_a_thread():
+    relogio = _Relogio()
+    limiter = RateLimiter(rpm_limit=1, tpm_limit=10_000)
+
+    async def cenario():
+        primeira = await limiter.acquire_async(10)
+        segunda = await limiter.acquire_async(10)
+        return primeira, segunda
+
+    # A espera deve usar asyncio.sleep; time.sleep bloquearia o event loop
+    with mock.patch("IA.AI_operations.time.time", relogio.time), \
+            mock.patch("IA.AI_operations.asyncio.sleep", relogio.sleep_async), \
+            mock.patch("IA.AI_operations.time.sleep", side_effect=AssertionError("bloqueou o event loop")):
+        primeira, segunda = asyncio.run(cenario())
+
+    assert segunda.timestamp - primeira.timestamp >= 60
+    assert len(limiter.request_timestamps) == 1
+
+
+def _resposta(**usage):
+    return SimpleNamespace(text="ok", usage_metadata=SimpleNamespace(**usage) if usage else None)
+
+
+def test_usage_tokens_soma_entrada_e_saida_sem_total():
+    assert usage_tokens(_resposta(total_token_count=900)) == 900
+    assert usage_tokens(_resposta(total_token_count=None, prompt_token_count=700, candidates_token_count=50)) == 750
+    assert usage_tokens(_resposta(total_token_count=0, prompt_token_count=None, candidates_token_count=None)) is None
+    assert usage_tokens(_resposta()) is None
+
+
+def test_call_api_corrige_a_reserva_com_o_usage_metadata():
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=100_000)
+
+    resposta = limiter.call_api(lambda: _resposta(total_token_count=2_500), prompt_tokens=1_000)
+
+    assert resposta.text == "ok"
+    assert limiter.tokens_in_window == 2_500
+    assert [r.tokens for r in limiter.token_usage] == [2_500]
+
+
+def test_call_api_sem_usage_mantem_a_estimativa():
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=100_000)
+
+    limiter.call_api(_resposta, prompt_tokens=1_000)
+
+    assert limiter.tokens_in_window == 1_000
+
+
+def test_call_api_async_corrige_a_reserva():
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=100_000)
+
+    async def chamada():
+        return _resposta(prompt_token_count=300, candidates_token_count=20)
+
+    asyncio.run(limiter.call_api_async(chamada, prompt_tokens=1_000))
+    asyncio.run(limiter.call_api_async(lambda: _resposta(total_token_count=80), prompt_tokens=1_000))
+
+    assert limiter.tokens_in_window == 400
+
+
+def test_consumo_real_menor_libera_espaco_para_a_proxima_chamada():
+    relogio = _Relogio()
+    limiter = RateLimiter(rpm_limit=10, tpm_limit=1_000)
+
+    with mock.patch("IA.AI_operations.time.time", relogio.time), \
+            mock.patch("IA.AI_operations.time.sleep", side_effect=AssertionError("não deveria esperar")):
+        limiter.call_api(lambda: _resposta(total_token_count=200), prompt_tokens=900)
+        limiter.acquire(800)
+
+    assert limiter.tokens_in_window == 1_000
@@ -0,0 +1,167 @@
+import codecs
+import io
+from datetime import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from benchmarks.gerador import exportar_csv, exportar_xlsx, gerar_sessoes
+from end.presenca import calcular_presenca
+from utils import teams_parser
+
+TIPO_CSV = teams_parser.TIPOS_CSV[0]
+TIPO_XLSX = teams_parser.TIPOS_EXCEL[0]
+
+
+@pytest.fixture(scope="module")
+def sessoes():
+    return gerar_sessoes(15, dias=2, seed=7)
+
+
+def _esperado(sessoes: pd.DataFrame) -> pd.DataFrame:
+    """Eventos que a exportação das sessões deve produzir, em ordem canônica."""
+    eventos = pd.concat([
+        pd.DataFrame({'Full Name': sessoes['nome'], 'Timestamp': sessoes['entrada'], 'Action': 'Joined'}),
+        pd.DataFrame({'Full Name': sessoes['nome'], 'Timestamp': sessoes['saida'], 'Action': 'Left'}),
+    ])
+    # As exportações têm resolução de segundos
+    eventos['Timestamp'] = eventos['Timestamp'].dt.floor('s')
+    return _ordenar(eventos)
+
+
+def _ordenar(eventos: pd.DataFrame) -> pd.DataFrame:
+    return eventos.sort_values(['Full Name', 'Timestamp', 'Action'], ignore_index=True)[['Full Name', 'Timestamp', 'Action']]
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-8", "utf-8-sig", "latin-1"])
+@pytest.mark.parametrize("idioma", ["en", "pt"])
+def test_csv_em_cada_codificacao(sessoes, encoding, idioma):
+    eventos, texto_para_ia = teams_parser.ler_exportacao(io.BytesIO(exportar_csv(sessoes, idioma, encoding)), TIPO_CSV)
+
+    assert texto_para_ia is None
+    pd.testing.assert_frame_equal(_ordenar(eventos), _esperado(sessoes), check_dtype=False)
+
+
+@pytest.mark.parametrize("idioma", ["en", "pt"])
+def test_xlsx(sessoes, idioma):
+    eventos, texto_para_ia = teams_parser.ler_exportacao(io.BytesIO(exportar_xlsx(sessoes, idioma)), TIPO_XLSX)
+
+    assert texto_para_ia is None
+    pd.testing.assert_frame_equal(_ordenar(eventos), _esperado(sessoes), check_dtype=False)
+
+
+def test_csv_latin1_com_acento_apos_o_prefixo_relido():
+    # O primeiro bloco é ASCII puro (UTF-8 válido); o acento só aparece depois dele
+    linhas = ["3. Atividades em Reunião", "Full Name\tUser Action\tTimestamp"]
+    linhas += [f"Participante {i}\tJoined\t10/13/2025, 9:00:00 AM" for i in range(3000)]
+    linhas += ["Conceição Simões\tJoined\t10/13/2025, 9:05:00 AM"]
+    conteudo = ("\n".join(linhas) + "\n").encode("latin-1")
+    assert len(conteudo) > teams_parser.TAMANHO_BLOCO_CSV
+
+    eventos, _ = teams_parser.ler_exportacao(io.BytesIO(conteudo), TIPO_CSV)
+
+    assert len(eventos) == 3001
+    assert eventos['Full Name'].iloc[-1] == "Conceição Simões"
+
+
+def test_layout_nao_reconhecido_devolve_texto_para_ia():
+    conteudo = "3. Atividades em Reunião\nColuna A\tColuna B\nx\ty\n".encode("utf-8")
+
+    eventos, texto_para_ia = teams_parser.ler_exportacao(io.BytesIO(conteudo), TIPO_CSV)
+
+    assert eventos is None
+    assert "Coluna A" in texto_para_ia
+
+
+@pytest.mark.parametrize("prefixo, esperado", [
+    (codecs.BOM_UTF16_LE + "Nome".encode("utf-16-le"), "utf-16"),
+    (codecs.BOM_UTF8 + "Nome".encode("utf-8"), "utf-8-sig"),
+    ("Conceição".encode("utf-8"), "utf-8"),
+    ("Conceição".encode("latin-1"), teams_parser.CODIFICACAO_ALTERNATIVA),
+    # Caractere multibyte cortado no fim do prefixo continua sendo UTF-8
+    ("Simões".encode("utf-8")[:4], "utf-8"),
+])
+def test_detectar_codificacao(prefixo, esperado):
+    assert teams_parser.detectar_codificacao(prefixo) == esperado
+
+
+def test_tipo_nao_suportado():
+    with pytest.raises(ValueError):
+        teams_parser.ler_exportacao(io.BytesIO(b""), "image/png")
+
+
+# Exportação real em inglês: o resumo de participantes (primeira entrada/última saída)
+# vem antes da seção de atividades, que tem as sessões individuais
+EXPORTACAO_INGLES = "\n".join([
+    "1. Summary",
+    "Meeting title\tNR-35 Training",
+    "Start time\t10/13/25, 9:00:00 AM",
+    "",
+    "2. Participants",
+    "Name\tFirst Join\tLast Leave\tIn-Meeting Duration\tEmail\tRole",
+    "Ana Lima\t10/13/25, 9:00:00 AM\t10/13/25, 1:00:00 PM\t2h\tana@empresa.com\tAttendee",
+    "",
+    "3. In-Meeting Activities",
+    "Name\tJoin Time\tLeave Time\tDuration\tEmail\tRole",
+    "Ana Lima\t10/13/25, 9:00:00 AM\t10/13/25, 10:00:00 AM\t1h\tana@empresa.com\tAttendee",
+    "Ana Lima\t10/13/25, 12:00:00 PM\t10/13/25, 1:00:00 PM\t1h\tana@empresa.com\tAttendee",
+]) + "\n"
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "utf-8"])
+def test_exportacao_em_ingles_usa_a_secao_de_atividades(encoding):
+    eventos, _ = teams_parser.ler_exportacao(io.BytesIO(EXPORTACAO_INGLES.encode(encoding)), TIPO_CSV)
+
+    assert len(eventos) == 4
+    presenca = calcular_presenca(eventos, time(9, 0), 240, 60, total_check_ins=2)
+    assert presenca.loc["Ana Lima", "presenca_pct"] == pytest.approx(50.0)
+
+
+def test_resumo_de_participantes_nao_e_lido_como_sessoes():
+    sem_atividades = EXPORTACAO_INGLES.split("3. In-Meeting Activities")[0]
+
+    eventos, texto_para_ia = teams_parser.ler_exportacao(io.BytesIO(sem_atividades.encode("utf-8")), TIPO_CSV)
+
+    assert eventos is None
+    assert "First Join" in texto_para_ia
+
+
+class _Pagina:
+    def __init__(self, texto, leituras):
+        self.texto, self.leituras = texto, leituras
+
+    def extract_text(self, extraction_mode=None):
+        self.leituras.append(self.texto)
+        return self.texto
+
+
+def _leitor(*textos):
+    leituras = []
+    return SimpleNamespace(pages=[_Pagina(texto, leituras) for texto in textos]), leituras
+
+
+def test_pdf_usa_apenas_as_linhas_depois_do_marcador():
+    leitor, _ = _leitor("Relatório\nName  First Join", "3. In-Meeting Activities\nName  Join Time\nAna  9:00")
+
+    assert list(teams_parser._linhas_pdf(leitor)) == [["Name", "Join Time"], ["Ana", "9:00"]]
+
+
+def test_pdf_sem_marcador_e_relido_desde_o_inicio():
+    leitor, leituras = _leitor("Name  Join Time", "Ana  9:00")
+
+    assert list(teams_parser._linhas_pdf(leitor)) == [["Name", "Join Time"], ["Ana", "9:00"]]
+    assert len(leituras) == 4
+
+
+def test_pdf_digitalizado_com_capa_desiste_sem_ler_o_resto():
+    leitor, leituras = _leitor("Capa do relatório", "", "", "", "", "", "Ana  9:00")
+
+    assert list(teams_parser._linhas_pdf(leitor)) == []
+    assert len(leituras) == 4
+
+
+def test_pdf_com_paginas_em_branco_esparsas_e_lido_por_completo():
+    leitor, _ = _leitor("Name  Join Time", "", "Ana  9:00", "", "Bia  9:05", "", "Caio  9:10")
+
+    assert len(list(teams_parser._linhas_pdf(leitor))) == 4
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from IA import backends, uploads
+from IA.backends import LocalBackend, UploadError
+from IA.uploads import UploadRegistry
+
+PDF = b"%PDF-1.4 documento de teste"
+
+
+class _BackendSemUpload(LocalBackend):
+    supports_upload = False
+
+
+class _BackendProcessando(LocalBackend):
+    def upload_file(self, data, mime_type, display_name=None):
+        raise UploadError("ainda em processamento")
+
+
+def test_documento_enviado_uma_vez_e_reaproveitado():
+    backend = LocalBackend()
+    registro = UploadRegistry(backend)
+
+    chave, part, _ = registro.get_part(PDF, "application/pdf")
+    _, de_novo, _ = registro.get_part(PDF, "application/pdf", chave=chave)
+
+    assert part.file_data.file_uri.startswith("local://")
+    assert de_novo is part
+    assert (backend.uploads, registro.uploads, registro.reuses) == (1, 1, 1)
+
+
+def test_backend_sem_upload_recebe_conteudo_inline():
+    registro = UploadRegistry(_BackendSemUpload())
+
+    _, part, _ = registro.get_part(PDF, "application/pdf")
+
+    assert part.inline_data.data == PDF
+    assert registro.uploads == 0
+
+
+def test_falha_no_envio_cai_para_conteudo_inline_sem_registrar():
+    registro = UploadRegistry(_BackendProcessando())
+
+    _, part, _ = registro.get_part(PDF, "application/pdf")
+
+    assert part.inline_data.data == PDF
+    assert registro.uploads == 0 and not registro._uploads
+
+
+def test_gemini_levanta_erro_se_arquivo_continua_em_processamento(monkeypatch):
+    arquivo = SimpleNamespace(name="files/abc", state=types.FileState.PROCESSING)
+    cliente = SimpleNamespace(files=SimpleNamespace(upload=lambda **kwargs: arquivo, get=lambda name: arquivo))
+    monkeypatch.setattr(backends, "TIMEOUT_PROCESSAMENTO_ARQUIVO", 0)
+
+    with pytest.raises(UploadError):
+        backends.GeminiBackend(cliente).upload_file(PDF, "application/pdf")
+
+
+def test_registro_limita_referencias_guardadas():
+    registro = UploadRegistry(LocalBackend(), max_uploads=3)
+    chaves = [registro.get_part(f"documento {i}".encode(), "application/pdf")[0] for i in range(5)]
+
+    assert list(registro._uploads) == chaves[-3:]
+
+
+def test_registro_descarta_referencias_vencidas(monkeypatch):
+    registro = UploadRegistry(LocalBackend(), ttl_seconds=10)
+    antigo = registro.get_part(b"antigo", "application/pdf")[0]
+
+    agora = time.time()
+    monkeypatch.setattr(uploads.time, "time", lambda: agora + 60)
+    novo = registro.get_part(b"novo", "application/pdf")[0]
+
+    assert list(registro._uploads) == [novo]
+    assert antigo not in registro._uploads
+
+
+def test_invalidate_forca_novo_envio():
+    backend = LocalBackend()
+    registro = UploadRegistry(backend)
+    chave = registro.get_part(PDF, "application/pdf")[0]
+
+    registro.invalidate([chave])
+    registro.get_part(PDF, "application/pdf", chave=chave)
+
+    assert backend.uploads == 2 and registro.uploads == 2
+
+
+def test_contadores_sob_concorrencia():
+    registro = UploadRegistry(LocalBackend())
+    documentos = [f"documento {i % 8}".encode() for i in range(400)]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda data: registro.get_part(data, "application/pdf"), documentos))
+
+    assert registro.uploads == 8
+    assert registro.uploads + registro.reuses == len(documentos)
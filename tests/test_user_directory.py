@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from auth import user_directory
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "usuarios.db")
+
+
+def test_busca_encontra_email_editado_com_maiusculas_no_banco(caminho):
+    user_directory.salvar_usuario(caminho, "ana@empresa.com", "Ana", "admin")
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute("UPDATE usuarios SET email = 'Ana.Lima@Empresa.com'")
+
+    usuario = user_directory.buscar_usuario(caminho, " ana.lima@empresa.COM ")
+
+    assert usuario["role"] == "admin"
+    assert user_directory.remover_usuario(caminho, "ANA.LIMA@empresa.com")
+    assert user_directory.buscar_usuario(caminho, "ana.lima@empresa.com") is None
+
+
+def test_salvar_nao_duplica_email_com_outra_caixa(caminho):
+    user_directory.salvar_usuario(caminho, "ana@empresa.com", "Ana")
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute("UPDATE usuarios SET email = 'Ana@Empresa.com'")
+
+    user_directory.salvar_usuario(caminho, "ana@empresa.com", "Ana Lima", "admin")
+
+    df, total = user_directory.pesquisar_usuarios(caminho, "", 10, 0)
+    assert total == 1
+    assert df.loc[0, "name"] == "Ana Lima"
+
+
+def test_banco_antigo_sem_collate_tambem_ignora_maiusculas(tmp_path):
+    caminho = str(tmp_path / "antigo.db")
+    with sqlite3.connect(caminho) as conexao:
+        conexao.execute("CREATE TABLE usuarios (email TEXT PRIMARY KEY, name TEXT, role TEXT NOT NULL DEFAULT 'user')")
+        conexao.execute("INSERT INTO usuarios VALUES ('Bia@Empresa.com', 'Bia', 'user')")
+
+    assert user_directory.buscar_usuario(caminho, "bia@empresa.com")["name"] == "Bia"
+
+
+def test_versao_muda_a_cada_alteracao(caminho):
+    inicial = user_directory.versao(caminho)
+    user_directory.salvar_usuario(caminho, "ana@empresa.com")
+    user_directory.importar_usuarios(caminho, [{"email": "bia@empresa.com"}, {"email": "caio@empresa.com"}])
+
+    assert user_directory.versao(caminho) > inicial + 1
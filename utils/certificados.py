@@ -0,0 +1,109 @@
+import html
+import multiprocessing
+import os
+import re
+import tempfile
+import unicodedata
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import pandas as pd
+from weasyprint import HTML
+
+from utils.pdf_generator import get_stylesheet
+
+
+def create_certificate_html(colaborador: str, nota_final: float, training_title: str,
+                            logo_base64: str | None, data_emissao: str) -> str:
+    """Cria a string HTML do certificado individual de um colaborador aprovado."""
+    logo_element = f'<img src="{logo_base64}" alt="Logo">' if logo_base64 else ''
+    return f"""
+    <html>
+        <head>
+            <meta charset="UTF-8">
+        </head>
+        <body>
+            <div class="certificado">
+                <div class="logo-container">{logo_element}</div>
+                <h1>Certificado de Conclusão</h1>
+                <p class="texto">Certificamos que</p>
+                <p class="nome">{html.escape(str(colaborador))}</p>
+                <p class="texto">concluiu com aproveitamento o treinamento<br><strong>{html.escape(training_title)}</strong></p>
+                <p class="nota">Nota Final: {nota_final:.1f}</p>
+            </div>
+            <footer>
+                Emitido em: {data_emissao} | Documento de Referência: 040.010.060.0999.IT
+            </footer>
+        </body>
+    </html>
+    """
+
+
+def _nome_arquivo(colaborador: str, indice: int) -> str:
+    """Gera um nome de arquivo seguro (sem acentos ou caracteres especiais) para o PDF."""
+    nome = unicodedata.normalize("NFKD", str(colaborador)).encode("ascii", "ignore").decode("ascii")
+    nome = re.sub(r"[^A-Za-z0-9]+", "_", nome).strip("_") or "colaborador"
+    return f"{indice:04d}_{nome}.pdf"
+
+
+def _iniciar_worker():
+    """Compila a folha de estilos compartilhada uma vez em cada processo de trabalho."""
+    get_stylesheet()
+
+
+def _render_pdf(nome_arquivo: str, html_content: str) -> tuple[str, bytes]:
+    """Renderiza um certificado no processo de trabalho e retorna os bytes do PDF."""
+    return nome_arquivo, HTML(string=html_content).write_pdf(stylesheets=[get_stylesheet()])
+
+
+def generate_certificates_zip(df: pd.DataFrame, training_title: str, logo_base64: str | None,
+                              max_workers: int | None = None, progress_callback=None) -> str:
+    """
+    Renderiza o certificado de cada colaborador aprovado em um pool de processos
+    e grava os PDFs em um arquivo ZIP à medida que ficam prontos.
+
+    Apenas alguns PDFs ficam em memória por vez. Retorna o caminho do ZIP
+    temporário gerado; cabe a quem chama removê-lo depois do uso.
+    """
+    aprovados = df[df['Status'] == 'Aprovado']
+    data_emissao = datetime.now().strftime('%d/%m/%Y')
+    tarefas = (
+        (_nome_arquivo(nome, i + 1), create_certificate_html(nome, nota, training_title, logo_base64, data_emissao))
+        for i, (nome, nota) in enumerate(zip(aprovados['Colaborador'], aprovados['Nota Final']))
+    )
+
+    max_workers = max_workers or min(os.cpu_count() or 1, 8)
+    fd, caminho_zip = tempfile.mkstemp(suffix=".zip", prefix="certificados_")
+    os.close(fd)
+
+    total = len(aprovados)
+    concluidos = 0
+    try:
+        # "spawn" evita herdar as threads do servidor do Streamlit no fork
+        contexto = multiprocessing.get_context("spawn")
+        with zipfile.ZipFile(caminho_zip, "w", compression=zipfile.ZIP_DEFLATED) as arquivo_zip, \
+                ProcessPoolExecutor(max_workers=max_workers, mp_context=contexto, initializer=_iniciar_worker) as executor:
+            em_andamento = set()
+            for nome_arquivo, html_content in tarefas:
+                em_andamento.add(executor.submit(_render_pdf, nome_arquivo, html_content))
+                # Limita o número de certificados pendentes para manter a memória estável
+                if len(em_andamento) >= max_workers * 2:
+                    prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        arquivo_zip.writestr(*futuro.result())
+                        concluidos += 1
+                        if progress_callback:
+                            progress_callback(concluidos, total)
+
+            for futuro in wait(em_andamento).done:
+                arquivo_zip.writestr(*futuro.result())
+                concluidos += 1
+                if progress_callback:
+                    progress_callback(concluidos, total)
+    except BaseException:
+        # Um certificado que falha não deixa um ZIP incompleto no disco
+        os.remove(caminho_zip)
+        raise
+
+    return caminho_zip
@@ -0,0 +1,125 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+
+# Estados possíveis de um job
+NA_FILA = "na_fila"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+NUM_WORKERS_PADRAO = 2
+# Jobs finalizados são descartados da memória após este intervalo
+RETENCAO_SEGUNDOS = 3600
+
+
+class Job:
+    """Estado de um processamento em segundo plano, consultado pela interface."""
+
+    def __init__(self, descricao: str):
+        self.id = uuid.uuid4().hex
+        self.descricao = descricao
+        self.status = NA_FILA
+        self.progresso = 0.0
+        self.mensagem = "Aguardando na fila..."
+        self.resultado = None
+        self.erro = None
+        self.criado_em = time.time()
+        self.finalizado_em = None
+
+    @property
+    def finalizado(self) -> bool:
+        return self.status in (CONCLUIDO, ERRO)
+
+    def atualizar_progresso(self, fracao: float, mensagem: str | None = None):
+        self.progresso = min(max(fracao, 0.0), 1.0)
+        if mensagem:
+            self.mensagem = mensagem
+
+
+class JobQueue:
+    """
+    Fila de jobs do processo, atendida por threads trabalhadoras.
+
+    A função de cada job é chamada com o argumento nomeado `progresso`, um
+    callable `(fracao, mensagem)` que atualiza o estado lido pela interface.
+    As funções não devem usar `st.*`: elas rodam fora do contexto do script.
+    """
+
+    def __init__(self, num_workers: int = NUM_WORKERS_PADRAO):
+        self._fila = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._executar, name=f"job-worker-{i}", daemon=True)
+            for i in range(num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, funcao, *args, descricao: str = "", **kwargs) -> Job:
+        """Enfileira `funcao(*args, progresso=..., **kwargs)` e retorna o Job imediatamente."""
+        job = Job(descricao)
+        with self._lock:
+            self._descartar_antigos()
+            self._jobs[job.id] = job
+        self._fila.put((job, funcao, args, kwargs))
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def posicao_na_fila(self, job_id: str) -> int:
+        """Quantos jobs ainda na fila foram enviados antes deste (0 = é o próximo)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != NA_FILA:
+                return 0
+            return sum(1 for outro in self._jobs.values() if outro.status == NA_FILA and outro.criado_em < job.criado_em)
+
+    def _descartar_antigos(self):
+        limite = time.time() - RETENCAO_SEGUNDOS
+        # finalizado_em é gravado antes do status, mas a checagem protege contra None mesmo assim
+        descartar = [j.id for j in self._jobs.values()
+                     if j.finalizado and j.finalizado_em is not None and j.finalizado_em < limite]
+        for job_id in descartar:
+            del self._jobs[job_id]
+
+    def _executar(self):
+        while True:
+            job, funcao, args, kwargs = self._fila.get()
+            job.status = EXECUTANDO
+            job.mensagem = "Processando..."
+            try:
+                resultado = funcao(*args, progresso=job.atualizar_progresso, **kwargs)
+                self._finalizar(job, CONCLUIDO, resultado=resultado)
+            except Exception as e:
+                logging.exception(f"[Jobs] Falha no job '{job.descricao}'")
+                self._finalizar(job, ERRO, erro=str(e))
+            finally:
+                self._fila.task_done()
+
+    def _finalizar(self, job: Job, status: str, resultado=None, erro: str | None = None):
+        """Publica o estado final sob o lock, com `finalizado_em` gravado antes do status."""
+        with self._lock:
+            job.resultado = resultado
+            job.erro = erro
+            if status == CONCLUIDO:
+                job.progresso = 1.0
+            job.finalizado_em = time.time()
+            job.status = status
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Retorna a fila de jobs do processo, compartilhada por todas as sessões."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
@@ -4,10 +4,22 @@ import streamlit as st
 import base64
 import requests
 import io
+import html
+import string
+import collections
+import functools
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from weasyprint import HTML, CSS
 from datetime import datetime
 import pandas as pd
 
+from end.calculos import formatar_resultados
+
+# Logo padrão dos relatórios (interface e processamento em lote)
+LOGO_URL = "https://drive.google.com/uc?export=download&id=1AABdw4iGBJ7tsQ7fR1WGTP5cML3Jlfx_"
+
 @st.cache_data(ttl=3600)
 def get_logo_base64(url: str) -> str | None:
     """Faz o download de uma imagem de uma URL, converte para base64 e a armazena em cache."""
@@ -21,53 +33,34 @@ def get_logo_base64(url: str) -> str | None:
         st.error(f"Erro ao baixar a logo: {e}")
         return None
 
-def create_professional_html(df: pd.DataFrame, logo_base64: str | None, training_title: str) -> str:
-    """Cria a string HTML para o relatório com um design profissional."""
-    
-    # --- Preparação dos Dados ---
-    total_colaboradores = len(df)
-    aprovados = df[df['Status'] == 'Aprovado'].shape[0]
-    reprovados_nota = df[df['Status'] == 'Reprovado por Nota'].shape[0]
-    reprovados_freq = df[df['Status'] == 'Reprovado por Frequência'].shape[0]
-    reprovados_total = reprovados_nota + reprovados_freq
-    taxa_aprovacao = (aprovados / total_colaboradores * 100) if total_colaboradores > 0 else 0
+STATUS_COLORS = {
+    "Aprovado": "#28a745",
+    "Reprovado por Nota": "#dc3545",
+    "Reprovado por Frequência": "#ffc107"
+}
+STATUS_ICONS = {
+    "Aprovado": "✔",
+    "Reprovado por Nota": "✖",
+    "Reprovado por Frequência": "●"
+}
 
-    # --- Construção da Tabela HTML ---
-    table_rows = ""
-    status_colors = {
-        "Aprovado": "#28a745",
-        "Reprovado por Nota": "#dc3545",
-        "Reprovado por Frequência": "#ffc107"
-    }
-    status_icons = {
-        "Aprovado": "✔",
-        "Reprovado por Nota": "✖",
-        "Reprovado por Frequência": "●"
-    }
-
-    for _, row in df.iterrows():
-        status_color = status_colors.get(row['Status'], '#6c757d')
-        status_icon = status_icons.get(row['Status'], '')
-        
-        table_rows += f"""
+# Modelos pré-compilados do relatório: a linha da tabela e o documento completo
+_ROW_TEMPLATE = """
         <tr>
-            <td class="col-colaborador">{row['Colaborador']}</td>
-            <td>{row['Check-ins Pontuais']}</td>
-            <td>{row['Interações Válidas']}</td>
-            <td>{row['Acertos na Prova']}</td>
-            <td>{row['Nota Pontualidade']:.1f}</td>
-            <td>{row['Nota Interação']:.1f}</td>
-            <td>{row['Nota Avaliação']:.1f}</td>
-            <td class="nota-final">{row['Nota Final']:.1f}</td>
-            <td>{row['Frequência OK?']}</td>
-            <td style="color: {status_color}; font-weight: bold;">{status_icon} {row['Status']}</td>
+            <td class="col-colaborador">{}</td>
+            <td>{}</td>
+            <td>{}</td>
+            <td>{}</td>
+            <td>{:.1f}</td>
+            <td>{:.1f}</td>
+            <td>{:.1f}</td>
+            <td class="nota-final">{:.1f}</td>
+            <td>{}</td>
+            <td style="color: {}; font-weight: bold;">{} {}</td>
         </tr>
-        """
-    
-    # --- Estrutura HTML Principal ---
-    logo_element = f'<img src="{logo_base64}" alt="Logo">' if logo_base64 else ''
+        """.format
 
-    html_string = f"""
+_REPORT_TEMPLATE = string.Template("""
     <html>
         <head>
             <meta charset="UTF-8">
@@ -75,11 +68,11 @@ def create_professional_html(df: pd.DataFrame, logo_base64: str | None, training
         <body>
             <header>
                 <div class="logo-container">
-                    {logo_element}
+                    $logo_element
                 </div>
                 <div class="title-container">
                     <h1>Relatório de Avaliação de Treinamento</h1>
-                    <p>{training_title}</p>
+                    <p>$training_title</p>
                 </div>
             </header>
             
@@ -88,20 +81,20 @@ def create_professional_html(df: pd.DataFrame, logo_base64: str | None, training
                 <div class="summary-grid">
                     <div class="summary-card">
                         <h3>Participantes</h3>
-                        <p class="total-value">{total_colaboradores}</p>
+                        <p class="total-value">$total_colaboradores</p>
                     </div>
                     <div class="summary-card">
                         <h3>Aprovados</h3>
-                        <p class="approved-value">{aprovados}</p>
+                        <p class="approved-value">$aprovados</p>
                     </div>
                     <div class="summary-card">
                         <h3>Reprovados</h3>
-                        <p class="failed-value">{reprovados_total}</p>
-                        <small>Nota: {reprovados_nota} | Frequência: {reprovados_freq}</small>
+                        <p class="failed-value">$reprovados_total</p>
+                        <small>Nota: $reprovados_nota | Frequência: $reprovados_freq</small>
                     </div>
                     <div class="summary-card">
                         <h3>Taxa de Aprovação</h3>
-                        <p class="rate-value">{taxa_aprovacao:.1f}%</p>
+                        <p class="rate-value">$taxa_aprovacao%</p>
                     </div>
                 </div>
 
@@ -122,18 +115,66 @@ def create_professional_html(df: pd.DataFrame, logo_base64: str | None, training
                         </tr>
                     </thead>
                     <tbody>
-                        {table_rows}
+                        $table_rows
                     </tbody>
                 </table>
             </main>
             
             <footer>
-                Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')} | Documento de Referência: 040.010.060.0999.IT
+                Gerado em: $gerado_em | Documento de Referência: 040.010.060.0999.IT
             </footer>
         </body>
     </html>
-    """
-    return html_string
+    """)
+
+def create_professional_html(df: pd.DataFrame, logo_base64: str | None, training_title: str) -> str:
+    """Cria a string HTML para o relatório com um design profissional."""
+    
+    # --- Preparação dos Dados ---
+    # Os textos de exibição ("3/4", "Sim"/"Não") só são gerados aqui, na renderização
+    df = formatar_resultados(df)
+    total_colaboradores = len(df)
+    contagem_status = df['Status'].value_counts()
+    aprovados = int(contagem_status.get('Aprovado', 0))
+    reprovados_nota = int(contagem_status.get('Reprovado por Nota', 0))
+    reprovados_freq = int(contagem_status.get('Reprovado por Frequência', 0))
+    reprovados_total = reprovados_nota + reprovados_freq
+    taxa_aprovacao = (aprovados / total_colaboradores * 100) if total_colaboradores > 0 else 0
+
+    # --- Construção da Tabela HTML ---
+    # Linhas geradas direto das colunas (listas Python) e unidas uma única vez
+    status = df['Status']
+    table_rows = "".join(map(
+        _ROW_TEMPLATE,
+        map(html.escape, df['Colaborador'].astype(str).tolist()),
+        df['Check-ins Pontuais'].tolist(),
+        df['Interações Válidas'].tolist(),
+        df['Acertos na Prova'].tolist(),
+        df['Nota Pontualidade'].astype(float).tolist(),
+        df['Nota Interação'].astype(float).tolist(),
+        df['Nota Avaliação'].astype(float).tolist(),
+        df['Nota Final'].astype(float).tolist(),
+        df['Frequência OK?'].tolist(),
+        status.map(STATUS_COLORS).fillna('#6c757d').tolist(),
+        status.map(STATUS_ICONS).fillna('').tolist(),
+        status.tolist(),
+    ))
+    
+    # --- Estrutura HTML Principal ---
+    logo_element = f'<img src="{logo_base64}" alt="Logo">' if logo_base64 else ''
+
+    return _REPORT_TEMPLATE.substitute(
+        logo_element=logo_element,
+        training_title=html.escape(training_title),
+        total_colaboradores=total_colaboradores,
+        aprovados=aprovados,
+        reprovados_total=reprovados_total,
+        reprovados_nota=reprovados_nota,
+        reprovados_freq=reprovados_freq,
+        taxa_aprovacao=f"{taxa_aprovacao:.1f}",
+        table_rows=table_rows,
+        gerado_em=datetime.now().strftime('%d/%m/%Y às %H:%M:%S'),
+    )
 
 def get_professional_css() -> str:
     """Retorna a string CSS para o relatório profissional em paisagem."""
@@ -269,19 +310,112 @@ def get_professional_css() -> str:
             color: #777;
             text-align: center;
         }
+
+        /* --- Certificados individuais --- */
+        .certificado {
+            border: 6px double #002A4D;
+            padding: 40px 60px;
+            height: 14cm;
+            text-align: center;
+        }
+        .certificado .logo-container img {
+            max-height: 60px;
+        }
+        .certificado h1 {
+            font-size: 32pt;
+            color: #002A4D;
+            font-weight: 300;
+            margin: 20px 0 10px 0;
+        }
+        .certificado .nome {
+            font-size: 24pt;
+            color: #00A859;
+            font-weight: 700;
+            margin: 25px 0;
+        }
+        .certificado .texto {
+            font-size: 13pt;
+            color: #555;
+            line-height: 1.6;
+        }
+        .certificado .nota {
+            margin-top: 25px;
+            font-size: 12pt;
+            color: #002A4D;
+        }
     """
 
+@functools.lru_cache(maxsize=1)
+def get_stylesheet() -> CSS:
+    """Compila a folha de estilos uma única vez por processo e a reutiliza."""
+    return CSS(string=get_professional_css())
+
 def generate_pdf_report(df, logo_url: str, training_title: str) -> io.BytesIO:
     """Função principal que orquestra a criação do relatório em PDF."""
     
     logo_base64 = get_logo_base64(logo_url)
     html_content = create_professional_html(df, logo_base64, training_title)
     
-    css_string = get_professional_css()
-    css = CSS(string=css_string)
-    
     pdf_file = io.BytesIO()
-    HTML(string=html_content).write_pdf(pdf_file, stylesheets=[css])
+    HTML(string=html_content).write_pdf(pdf_file, stylesheets=[get_stylesheet()])
     pdf_file.seek(0)
     
     return pdf_file
+
+# --- Relatórios memorizados e renderizados em segundo plano ---
+
+MAX_RELATORIOS_EM_CACHE = 64
+_report_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="relatorio-pdf")
+_report_futures = collections.OrderedDict()
+_report_lock = threading.Lock()
+
+def get_report_key(df: pd.DataFrame, logo_base64: str | None, training_title: str) -> str:
+    """Gera a chave do relatório a partir do conteúdo dos resultados, do título e da logo."""
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    h.update("\x1f".join(map(str, df.columns)).encode('utf-8'))
+    h.update(training_title.encode('utf-8'))
+    h.update((logo_base64 or '').encode('utf-8'))
+    return h.hexdigest()
+
+def _render_report_bytes(df: pd.DataFrame, logo_base64: str | None, training_title: str) -> bytes:
+    """Renderiza o relatório sem acessar o Streamlit (executado em thread de fundo)."""
+    html_content = create_professional_html(df, logo_base64, training_title)
+    return HTML(string=html_content).write_pdf(stylesheets=[get_stylesheet()])
+
+def request_pdf_report(df: pd.DataFrame, logo_url: str, training_title: str) -> Future:
+    """
+    Agenda a renderização do relatório em segundo plano, reaproveitando o resultado
+    de chamadas anteriores com os mesmos dados, título e logo.
+
+    Retorna um Future com os bytes do PDF; chamadas repetidas (ex: a cada rerun
+    do Streamlit) não renderizam o documento de novo.
+    """
+    # A logo é resolvida aqui, na thread do script, por usar o cache do Streamlit
+    logo_base64 = get_logo_base64(logo_url)
+    key = get_report_key(df, logo_base64, training_title)
+
+    with _report_lock:
+        future = _report_futures.get(key)
+        if future is not None:
+            _report_futures.move_to_end(key)
+            return future
+
+        future = _report_executor.submit(_render_report_bytes, df.copy(), logo_base64, training_title)
+        _report_futures[key] = future
+        while len(_report_futures) > MAX_RELATORIOS_EM_CACHE:
+            _report_futures.popitem(last=False)
+
+    def _discard_on_error(done: Future):
+        # Falhas não ficam memorizadas: a próxima solicitação tenta de novo
+        if done.exception() is not None:
+            with _report_lock:
+                if _report_futures.get(key) is done:
+                    del _report_futures[key]
+
+    future.add_done_callback(_discard_on_error)
+    return future
+
+def get_pdf_report_bytes(df: pd.DataFrame, logo_url: str, training_title: str) -> bytes:
+    """Retorna os bytes do relatório, aguardando a renderização apenas se ainda não terminou."""
+    return request_pdf_report(df, logo_url, training_title).result()
@@ -0,0 +1,413 @@
+import codecs
+import csv
+import io
+import itertools
+import logging
+import re
+import unicodedata
+from typing import Iterable, Iterator
+
+import pandas as pd
+from openpyxl import load_workbook
+from pypdf import PdfReader
+
+# Títulos da seção de atividades nos relatórios de presença exportados pelo Teams
+# (em português e em inglês), comparados sem diferenciar maiúsculas
+MARCADORES_ATIVIDADES = ("atividades em reunião", "in-meeting activities")
+
+# Tipos de arquivo aceitos para leitura local
+TIPOS_EXCEL = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "application/vnd.ms-excel")
+TIPOS_CSV = ("text/csv", "application/csv")
+TIPO_PDF = "application/pdf"
+# Leitura do CSV em blocos: o início do arquivo define a codificação
+TAMANHO_BLOCO_CSV = 64 * 1024
+# Codificação usada quando o arquivo não é UTF-8 válido (exportações antigas do Excel/Windows)
+CODIFICACAO_ALTERNATIVA = "latin-1"
+
+# Formato de timestamp usado pelo restante da aplicação (o mesmo pedido à IA)
+FORMATO_TIMESTAMP = '%m/%d/%Y, %I:%M:%S %p'
+
+# Aliases de cabeçalho já normalizados (minúsculas e sem acentos)
+ALIASES_NOME = {"full name", "nome completo", "nome", "name", "participante", "participant"}
+ALIASES_ACAO = {"user action", "action", "acao", "acao do usuario", "atividade", "activity"}
+ALIASES_TIMESTAMP = {"timestamp", "data/hora", "date/time", "horario", "time", "carimbo de data/hora", "data e hora"}
+# "Primeira entrada"/"Última saída" ("First Join"/"Last Leave") ficam de fora de propósito: são
+# colunas do resumo de participantes, que cobrem as ausências entre a primeira entrada e a última saída
+ALIASES_ENTRADA = {"hora de entrada", "join time", "entrada", "horario de entrada"}
+ALIASES_SAIDA = {"hora de saida", "leave time", "saida", "horario de saida"}
+
+PREFIXOS_ENTRADA = ("joined", "entrou", "ingressou", "join")
+PREFIXOS_SAIDA = ("left", "saiu", "leave", "sair")
+
+# Formatos candidatos, nas duas ordens de data (MM/DD e DD/MM), com e sem AM/PM
+FORMATOS_MES_DIA = [
+    '%m/%d/%Y, %I:%M:%S %p', '%m/%d/%Y %I:%M:%S %p', '%m/%d/%y, %I:%M:%S %p', '%m/%d/%y %I:%M:%S %p',
+    '%m/%d/%Y, %H:%M:%S', '%m/%d/%Y %H:%M:%S', '%m/%d/%y, %H:%M:%S', '%m/%d/%y %H:%M:%S',
+]
+FORMATOS_DIA_MES = [
+    '%d/%m/%Y, %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d/%m/%y, %H:%M:%S', '%d/%m/%y %H:%M:%S',
+    '%d/%m/%Y, %I:%M:%S %p', '%d/%m/%Y %I:%M:%S %p', '%d/%m/%Y %H:%M', '%d/%m/%Y, %H:%M',
+]
+FORMATOS_ISO = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S']
+
+_RE_DATA = re.compile(r'^\s*(\d{1,2})/(\d{1,2})/\d{2,4}')
+# Células de uma linha do PDF: separadas por tabulação ou dois ou mais espaços
+_RE_SEPARADOR_PDF = re.compile(r'\t|\s{2,}')
+# Páginas sem nenhum texto indicam um PDF digitalizado (apenas imagens): a leitura é
+# abandonada quando elas chegam a este número e são a maioria das páginas lidas
+PAGINAS_SEM_TEXTO_PARA_DESISTIR = 3
+
+
+def _eh_marcador(texto) -> bool:
+    """Indica se o texto (linha, célula ou nome de aba) é o título da seção de atividades."""
+    if not isinstance(texto, str):
+        return False
+    texto = texto.casefold()
+    return any(marcador in texto for marcador in MARCADORES_ATIVIDADES)
+
+
+def _normalizar(texto) -> str:
+    """Converte um valor para texto minúsculo, sem acentos e sem espaços nas pontas."""
+    if texto is None:
+        return ""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.replace("\ufeff", "").lower().split())
+
+
+def _mapear_cabecalho(linha: list) -> dict | None:
+    """Identifica as colunas de interesse em uma linha candidata a cabeçalho."""
+    colunas = {}
+    for indice, celula in enumerate(linha):
+        valor = _normalizar(celula)
+        for chave, aliases in (("nome", ALIASES_NOME), ("acao", ALIASES_ACAO), ("timestamp", ALIASES_TIMESTAMP),
+                               ("entrada", ALIASES_ENTRADA), ("saida", ALIASES_SAIDA)):
+            if valor in aliases and chave not in colunas:
+                colunas[chave] = indice
+
+    if "nome" not in colunas:
+        return None
+    # Layout de eventos (Nome / Ação / Timestamp) ou de intervalos (Nome / Entrada / Saída)
+    if "acao" in colunas and "timestamp" in colunas:
+        return colunas
+    if "entrada" in colunas and "saida" in colunas:
+        return colunas
+    return None
+
+
+def normalizar_acao(valor) -> str | None:
+    """Normaliza as variantes de ação do Teams para 'Joined' ou 'Left'."""
+    acao = _normalizar(valor)
+    if acao.startswith(PREFIXOS_ENTRADA):
+        return "Joined"
+    if acao.startswith(PREFIXOS_SAIDA):
+        return "Left"
+    return None
+
+
+def _formatos_candidatos(valores: pd.Series) -> list:
+    """Ordena os formatos de data conforme a evidência encontrada nos próprios valores."""
+    # Poucas datas distintas se repetem em milhares de linhas: basta analisar os prefixos únicos
+    datas = pd.Series(valores.str.slice(0, 10).unique(), dtype=object)
+    partes = datas.str.extract(_RE_DATA).dropna().astype(int)
+    tem_am_pm = valores.head(1000).str.contains(r'\b[AaPp]\.?[Mm]\.?\b', regex=True).any()
+
+    if not partes.empty and (partes[0] > 12).any():
+        return FORMATOS_DIA_MES + FORMATOS_MES_DIA + FORMATOS_ISO
+    if not partes.empty and (partes[1] > 12).any():
+        return FORMATOS_MES_DIA + FORMATOS_DIA_MES + FORMATOS_ISO
+    # Sem evidência pelos números: AM/PM indica exportação em inglês (MM/DD), senão padrão brasileiro
+    if tem_am_pm:
+        return FORMATOS_MES_DIA + FORMATOS_DIA_MES + FORMATOS_ISO
+    return FORMATOS_DIA_MES + FORMATOS_MES_DIA + FORMATOS_ISO
+
+
+def parse_timestamps(valores: pd.Series) -> pd.Series:
+    """Converte uma coluna de timestamps do Teams escolhendo o formato que melhor a descreve."""
+    valores = valores.astype(str).str.strip()
+    formatos = _formatos_candidatos(valores)
+
+    # O primeiro formato que interpreta toda a amostra é aplicado antes dos demais,
+    # evitando conversões completas que falhariam linha a linha
+    amostra = valores[valores.ne("")].head(50)
+    for formato in formatos:
+        if pd.to_datetime(amostra, format=formato, errors='coerce').notna().all():
+            formatos = [formato] + [f for f in formatos if f != formato]
+            break
+
+    resultado = pd.Series(pd.NaT, index=valores.index, dtype='datetime64[ns]')
+    for formato in formatos:
+        faltantes = resultado.isna()
+        if not faltantes.any():
+            break
+        resultado[faltantes] = pd.to_datetime(valores[faltantes], format=formato, errors='coerce')
+    return resultado
+
+
+def parse_activity_rows(linhas: Iterable) -> pd.DataFrame | None:
+    """
+    Reconhece o cabeçalho da seção de atividades e converte as linhas seguintes em eventos.
+
+    Retorna um DataFrame com as colunas 'Full Name', 'Timestamp' (datetime) e 'Action'
+    ('Joined'/'Left'), ou None se o layout não for reconhecido.
+    """
+    colunas = None
+    dados = []
+    for linha in linhas:
+        linha = ["" if celula is None else str(celula) for celula in linha]
+        if colunas is None:
+            colunas = _mapear_cabecalho(linha)
+            continue
+        if not any(celula.strip() for celula in linha):
+            # Linha em branco encerra a seção depois que os dados começaram
+            if dados:
+                break
+            continue
+        dados.append(linha)
+
+    if colunas is None or not dados:
+        return None
+
+    largura = max(colunas.values()) + 1
+    dados = [linha + [""] * (largura - len(linha)) for linha in dados]
+    bruto = pd.DataFrame(dados)
+    nomes = bruto[colunas["nome"]].str.strip()
+
+    if "acao" in colunas and "timestamp" in colunas:
+        eventos = pd.DataFrame({
+            'Full Name': nomes,
+            'Timestamp': parse_timestamps(bruto[colunas["timestamp"]]),
+            'Action': bruto[colunas["acao"]].map(normalizar_acao),
+        })
+    else:
+        entradas = pd.DataFrame({'Full Name': nomes, 'Timestamp': parse_timestamps(bruto[colunas["entrada"]]), 'Action': 'Joined'})
+        saidas = pd.DataFrame({'Full Name': nomes, 'Timestamp': parse_timestamps(bruto[colunas["saida"]]), 'Action': 'Left'})
+        eventos = pd.concat([entradas, saidas], ignore_index=True)
+
+    eventos = eventos[eventos['Full Name'].ne("")].dropna(subset=['Timestamp', 'Action'])
+    if eventos.empty:
+        return None
+    return eventos.reset_index(drop=True)
+
+
+def _detectar_delimitador(texto: str) -> str:
+    """Detecta o separador do CSV exportado (tabulação, vírgula ou ponto e vírgula)."""
+    amostra = texto[:8192]
+    # Timestamps em inglês contêm vírgulas, por isso a tabulação vence empates
+    contagens = {delimitador: amostra.count(delimitador) for delimitador in ("\t", ";", ",")}
+    melhor = max(contagens, key=contagens.get)
+    return melhor if contagens[melhor] > 0 else ","
+
+
+def eventos_para_registros(eventos: pd.DataFrame) -> list:
+    """Converte os eventos para o mesmo formato de registros retornado pela IA."""
+    registros = eventos.assign(Timestamp=eventos['Timestamp'].dt.strftime(FORMATO_TIMESTAMP))
+    return registros[['Full Name', 'Timestamp', 'Action']].to_dict('records')
+
+
+def detectar_codificacao(prefixo: bytes) -> str:
+    """
+    Detecta a codificação do CSV pelo BOM ou, sem ele, pelo início do arquivo.
+
+    UTF-16 só é aceito com BOM: sem ele, quase qualquer sequência de bytes de
+    tamanho par "decodifica" como UTF-16.
+    """
+    if prefixo.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if prefixo.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False tolera um caractere multibyte cortado no fim do prefixo
+        codecs.getincrementaldecoder("utf-8")().decode(prefixo, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return CODIFICACAO_ALTERNATIVA
+
+
+def _decodificar_linhas(arquivo, encoding: str) -> Iterator[str]:
+    """Decodifica o arquivo em blocos e gera suas linhas (com a quebra de linha original)."""
+    decodificador = codecs.getincrementaldecoder(encoding)()
+    pendente = ""
+    while True:
+        bloco = arquivo.read(TAMANHO_BLOCO_CSV)
+        texto = pendente + decodificador.decode(bloco, final=not bloco)
+        linhas = texto.splitlines(keepends=True)
+        # A última linha pode continuar no próximo bloco (inclusive um '\r\n' partido ao meio)
+        pendente = linhas.pop() if bloco and linhas else ""
+        yield from linhas
+        if not bloco:
+            return
+
+
+def _linhas_csv(arquivo, encoding: str) -> Iterator[str]:
+    """
+    Gera as linhas da seção de atividades do CSV, decodificadas sob demanda.
+
+    As linhas anteriores ao marcador são apenas percorridas; sem marcador, o
+    arquivo é relido desde o início e processado por completo.
+    """
+    linhas = _decodificar_linhas(arquivo, encoding)
+    for linha in linhas:
+        if _eh_marcador(linha):
+            yield from linhas
+            return
+
+    logging.warning("[Teams] Seção de atividades não encontrada. Processando arquivo completo.")
+    arquivo.seek(0)
+    yield from _decodificar_linhas(arquivo, encoding)
+
+
+def parse_csv_lines(linhas: Iterator[str]) -> pd.DataFrame | None:
+    """Converte as linhas da seção de atividades de um CSV em eventos, sem juntá-las em um texto."""
+    # O separador é detectado nos primeiros 8 KB da seção, que são repassados ao leitor
+    amostra, tamanho = [], 0
+    for linha in linhas:
+        amostra.append(linha)
+        tamanho += len(linha)
+        if tamanho >= 8192:
+            break
+    if not any(linha.strip() for linha in amostra):
+        return None
+    leitor = csv.reader(itertools.chain(amostra, linhas), delimiter=_detectar_delimitador("".join(amostra)))
+    return parse_activity_rows(leitor)
+
+
+def _linhas_xlsx(arquivo):
+    """
+    Gera as linhas da seção de atividades de uma planilha, lidas sob demanda.
+
+    A pasta de trabalho é aberta em modo somente leitura. A busca pelo marcador
+    percorre as abas em ordem (pelo nome da aba ou por uma célula) e as linhas
+    seguintes são repassadas diretamente. Sem marcador, a primeira aba inteira
+    é usada.
+    """
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        for planilha in livro.worksheets:
+            # Algumas exportações gravam dimensões erradas; sem elas as linhas são lidas até o fim
+            planilha.reset_dimensions()
+            linhas = planilha.iter_rows(values_only=True)
+            if _eh_marcador(planilha.title):
+                yield from linhas
+                return
+            for linha in linhas:
+                if any(_eh_marcador(celula) for celula in linha):
+                    yield from linhas
+                    return
+
+        logging.warning("[Teams] Seção de atividades não encontrada. Processando planilha completa.")
+        if livro.worksheets:
+            yield from livro.worksheets[0].iter_rows(values_only=True)
+    finally:
+        livro.close()
+
+
+def _linhas_para_csv(linhas: Iterable) -> str:
+    """Serializa as linhas em CSV (usado apenas quando a seção precisa ser enviada à IA)."""
+    saida = io.StringIO()
+    csv.writer(saida).writerows(["" if celula is None else celula for celula in linha] for linha in linhas)
+    return saida.getvalue()
+
+
+def _linhas_pdf(leitor: PdfReader):
+    """
+    Gera as linhas do PDF como listas de células, uma página por vez.
+
+    O texto é extraído no modo de layout, que preserva o espaçamento entre as
+    colunas da tabela. As linhas anteriores ao marcador da seção de atividades
+    são apenas percorridas; sem marcador, o documento é relido desde o início
+    e usado por completo. Em nenhum dos casos as linhas ficam acumuladas.
+    PDFs em que a maioria das páginas não tem texto encerram a leitura.
+    """
+    digitalizado = False
+
+    def linhas_de_texto():
+        nonlocal digitalizado
+        paginas_sem_texto = 0
+        for numero, pagina in enumerate(leitor.pages, start=1):
+            texto = pagina.extract_text(extraction_mode="layout")
+            if not texto.strip():
+                paginas_sem_texto += 1
+                if paginas_sem_texto >= PAGINAS_SEM_TEXTO_PARA_DESISTIR and paginas_sem_texto * 2 > numero:
+                    logging.info(f"[Teams] PDF sem camada de texto em {paginas_sem_texto} de {numero} páginas (provavelmente digitalizado).")
+                    digitalizado = True
+                    return
+                continue
+            for linha in texto.splitlines():
+                if linha.strip():
+                    yield linha
+
+    linhas = linhas_de_texto()
+    for linha in linhas:
+        if _eh_marcador(linha):
+            for linha in linhas:
+                yield _RE_SEPARADOR_PDF.split(linha.strip())
+            return
+
+    if not digitalizado:
+        logging.warning("[Teams] Seção de atividades não encontrada no PDF. Processando documento completo.")
+        for linha in linhas_de_texto():
+            yield _RE_SEPARADOR_PDF.split(linha.strip())
+
+
+def ler_pdf(arquivo) -> pd.DataFrame | None:
+    """
+    Reconstrói os eventos a partir da camada de texto de um PDF de presença do Teams.
+
+    As páginas são lidas sob demanda, conforme `parse_activity_rows` consome as
+    linhas. Retorna None para PDFs digitalizados ou de layout não reconhecido.
+    """
+    try:
+        leitor = PdfReader(arquivo)
+        eventos = parse_activity_rows(_linhas_pdf(leitor))
+    except Exception as e:
+        logging.warning(f"[Teams] Não foi possível ler a camada de texto do PDF: {e}")
+        return None
+    if eventos is not None:
+        logging.info(f"[Teams] {len(eventos)} eventos lidos da camada de texto do PDF ({len(leitor.pages)} páginas).")
+    return eventos
+
+
+def ler_exportacao(arquivo, mime_type: str) -> tuple[pd.DataFrame | None, str | None]:
+    """
+    Lê uma exportação de presença do Teams (CSV, XLSX ou PDF) sem usar a IA.
+
+    Retorna (eventos, texto_para_ia): `eventos` é o DataFrame de `parse_activity_rows`
+    quando o layout é reconhecido; caso contrário vem None e `texto_para_ia` traz a
+    seção de atividades em CSV para a extração pela IA (para PDFs vem None: o
+    próprio arquivo deve ser enviado).
+    """
+    arquivo.seek(0)
+    if mime_type in TIPOS_EXCEL:
+        eventos = parse_activity_rows(_linhas_xlsx(arquivo))
+        if eventos is not None:
+            logging.info(f"[Teams] {len(eventos)} eventos lidos da planilha.")
+            return eventos, None
+
+        # Layout não reconhecido: a seção é relida e convertida em CSV para a IA
+        arquivo.seek(0)
+        return None, _linhas_para_csv(_linhas_xlsx(arquivo))
+
+    if mime_type in TIPOS_CSV:
+        encoding = detectar_codificacao(arquivo.read(TAMANHO_BLOCO_CSV))
+        arquivo.seek(0)
+        try:
+            eventos = parse_csv_lines(_linhas_csv(arquivo, encoding))
+        except UnicodeDecodeError:
+            # O início era UTF-8 válido, mas o restante não: relê com a codificação alternativa
+            logging.warning(f"[Teams] Arquivo não é {encoding} válido após o início. Usando {CODIFICACAO_ALTERNATIVA}.")
+            encoding = CODIFICACAO_ALTERNATIVA
+            arquivo.seek(0)
+            eventos = parse_csv_lines(_linhas_csv(arquivo, encoding))
+        logging.info(f"[Teams] Arquivo decodificado usando {encoding}.")
+        if eventos is not None:
+            return eventos, None
+
+        # Layout não reconhecido: a seção é relida e enviada como texto para a IA
+        arquivo.seek(0)
+        return None, "".join(_linhas_csv(arquivo, encoding))
+
+    if mime_type == TIPO_PDF:
+        return ler_pdf(arquivo), None
+
+    raise ValueError(f"Tipo de arquivo não suportado para leitura local: {mime_type}.")